@@ -1,8 +1,73 @@
-from typing import Dict
-import re
+from typing import Dict, List
+
+try:
+    import ahocorasick  # pyahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+class KeywordMatcher:
+    """
+    Reports which of a fixed list of keywords occur in a text.
+
+    Uses pyahocorasick's C automaton (one pass, cost independent of the
+    number of keywords) when installed. Otherwise falls back to one
+    `in` check per keyword, which in CPython beats any pure-Python
+    multi-pattern scan for a keyword list this size.
+    """
+
+    def __init__(self, keywords: List[str]):
+        self.keywords = keywords
+        self._automaton = None
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for kid, word in enumerate(keywords):
+                self._automaton.add_word(word, (kid, len(word)))
+            self._automaton.make_automaton()
+
+    def find(self, text: str, word_boundary: bool = False) -> set:
+        """
+        Returns the ids of keywords found in `text`. With `word_boundary`,
+        a match only counts when it is not flanked by letters or digits.
+        """
+        if self._automaton is None:
+            check = _bounded_in if word_boundary else _substring_in
+            return {kid for kid, word in enumerate(self.keywords) if check(word, text)}
+
+        found = set()
+        n = len(text)
+        for end, (kid, length) in self._automaton.iter(text):
+            if word_boundary and not _is_bounded(text, end - length + 1, end + 1, n):
+                continue
+            found.add(kid)
+        return found
+
+
+def _substring_in(word: str, text: str) -> bool:
+    return word in text
+
+
+def _bounded_in(word: str, text: str) -> bool:
+    n = len(text)
+    start = text.find(word)
+    while start != -1:
+        if _is_bounded(text, start, start + len(word), n):
+            return True
+        start = text.find(word, start + 1)
+    return False
+
+
+def _is_bounded(text: str, start: int, end: int, n: int) -> bool:
+    return (start == 0 or not text[start - 1].isalnum()) and (end == n or not text[end].isalnum())
+
 
 class CaseClassifier:
-    def __init__(self):
+    def __init__(self, word_boundary: bool = False):
+        """
+        `word_boundary=False` keeps the original substring semantics
+        ("cheat" matches "cheated"), so scores are unchanged.
+        """
+        self.word_boundary = word_boundary
         self.categories = [
             "Criminal", "Civil", "Family", "Property",
             "Cyber Crime", "Corporate", "Consumer", "Labor", "Others"
@@ -56,15 +121,20 @@ class CaseClassifier:
             ]
         }
 
+        # keyword -> categories it scores for (a keyword may repeat)
+        self._keyword_cats: Dict[str, List[str]] = {}
+        for cat, words in self.keywords.items():
+            for w in words:
+                self._keyword_cats.setdefault(w, []).append(cat)
+        self._matcher = KeywordMatcher(list(self._keyword_cats))
 
     def classify(self, text: str) -> Dict[str, float]:
         scores = {cat: 0.0 for cat in self.categories}
-        text = text.lower()
+        found = self._matcher.find(text.lower(), self.word_boundary)
 
-        for cat, words in self.keywords.items():
-            for w in words:
-                if w in text:
-                    scores[cat] += 1.0
+        for kid in found:
+            for cat in self._keyword_cats[self._matcher.keywords[kid]]:
+                scores[cat] += 1.0
 
         total = sum(scores.values())
         if total == 0:
@@ -78,7 +148,10 @@ class CaseClassifier:
             scores[k] = min(scores[k], 0.78)
 
         return dict(sorted(scores.items(), key=lambda x: x[1], reverse=True))
-    
+
+    def classify_many(self, texts: List[str]) -> List[Dict[str, float]]:
+        return [self.classify(t) for t in texts]
+
     def calculate_confidence(self, scores: Dict[str, float]) -> int:
         """
         Soft confidence calibration.
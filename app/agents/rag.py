@@ -1,4 +1,24 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
+import re
+
+from app.core.metrics import metrics
+
+# "Section 138 NI Act", "Article 21", "u/s 420 IPC", "498A IPC" ...
+_CITATION_PATTERN = re.compile(
+    r"\b(?:section|sec\.?|s\.|u/s|article|art\.?)\s*\d+[a-z]?\b|\b\d+[a-z]?\s+(?:ipc|crpc|ni act)\b",
+    re.IGNORECASE
+)
+
+# Precedent summaries only need the start of each chunk
+SUMMARY_CHARS = 300
+
+
+def is_citation_lookup(text: str, max_words: int = 12) -> bool:
+    """
+    Short queries that cite a provision are answered lexically (BM25);
+    embedding them adds latency without improving the match.
+    """
+    return len(text.split()) <= max_words and bool(_CITATION_PATTERN.search(text))
 
 
 class LegalReasoningAgent:
@@ -12,21 +32,64 @@ class LegalReasoningAgent:
         secondary_case: Optional[str] = None
     ) -> Dict[str, Any]:
 
-        # --------- QUERY ENRICHMENT ---------
+        results = []
+        if is_citation_lookup(text):
+            results = self.vector_store.search(text, k=3, mode="lexical", snippet=SUMMARY_CHARS)
+
+        if not results:
+            query = self._enriched_query(text, primary_case, secondary_case)
+            results = self.vector_store.search(query, k=3, snippet=SUMMARY_CHARS)
+
+        with metrics.span("rag.opinion"):
+            return self._analysis(text, primary_case, secondary_case, results)
+
+    def analyze_cases_sync(
+        self,
+        cases: List[Tuple[str, str, Optional[str]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Batch form of analyze_case_sync for (text, primary, secondary)
+        tuples: every dense query is encoded in one batch and answered by
+        a single multi-row index search.
+        """
+        results: List[List[Dict[str, Any]]] = [[] for _ in cases]
+        for i, (text, _, _) in enumerate(cases):
+            if is_citation_lookup(text):
+                results[i] = self.vector_store.search(text, k=3, mode="lexical", snippet=SUMMARY_CHARS)
+
+        dense = [i for i, r in enumerate(results) if not r]
+        queries = [self._enriched_query(*cases[i]) for i in dense]
+        for i, r in zip(dense, self.vector_store.search_many(queries, k=3, snippet=SUMMARY_CHARS)):
+            results[i] = r
+
+        with metrics.span("rag.opinion"):
+            return [
+                self._analysis(text, primary, secondary, r)
+                for (text, primary, secondary), r in zip(cases, results)
+            ]
+
+    # --------- QUERY ENRICHMENT ---------
+    def _enriched_query(self, text: str, primary_case: str, secondary_case: Optional[str]) -> str:
         query = f"{primary_case} legal dispute"
         if secondary_case:
             query += f" with possible {secondary_case} liability"
 
-        query += f": {text}"
-
-        results = self.vector_store.search(query, k=3)
+        return query + f": {text}"
 
+    def _analysis(
+        self,
+        text: str,
+        primary_case: str,
+        secondary_case: Optional[str],
+        results: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
         # --------- PRECEDENTS ---------
         similar_cases: List[Dict[str, Any]] = []
         for r in results:
             similar_cases.append({
                 "pdf_name": r.get("source", "Unknown PDF"),
-                "summary": r.get("text", "")[:300] + "...",
+                "doc_id": r.get("doc_id"),
+                "summary": r.get("text", "")[:SUMMARY_CHARS] + "...",
                 "relevance": r.get("relevance", "N/A")
             })
 
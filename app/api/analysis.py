@@ -1,21 +1,27 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from app.api.deps import token_required
 from app.models.user import User
-from app.agents.classifier import CaseClassifier
-from app.agents.rag import LegalReasoningAgent
-from app.vector_store.faiss_store import VectorStore
-from app.etl.extractor import extract_text_from_pdf
 from app.models.case import CaseRecord
 from app.core.database import SessionLocal
+from app.core.cache import LRUCache, normalize_query
+from app.core.config import settings
+from app.core.jobs import JobQueue
+from app.core.metrics import metrics
+from app.core.registry import registry
+from app.core.uploads import save_upload, upload_digest, extract_text_cached
 
-import os
-import uuid
+import copy
+import json
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 analysis_bp = Blueprint("analysis", __name__)
 
-classifier = CaseClassifier()
-vector_store = VectorStore()
-rag_agent = LegalReasoningAgent(vector_store)
+job_queue = JobQueue(max_workers=settings.ANALYSIS_WORKERS)
+
+# (normalized description, upload hashes, index version) -> (primary, secondary,
+# confidence, classification scores, rag analysis)
+analysis_cache = LRUCache(settings.ANALYSIS_CACHE_SIZE, settings.ANALYSIS_CACHE_TTL)
 
 @analysis_bp.route("/analyze", methods=["POST"])
 @token_required
@@ -27,60 +33,238 @@ def analyze_case(current_user: User):
     if not description:
         return jsonify({"error": "Description is required"}), 400
 
-    file_texts = ""
-    upload_dir = "data/uploads"
-    os.makedirs(upload_dir, exist_ok=True)
+    # Stored by content hash, so repeated uploads share one file
+    file_paths = []
+    with metrics.span("analyze.save_uploads"):
+        for file in files:
+            if file and file.filename.endswith(".pdf"):
+                file_paths.append(save_upload(file))
 
-    for file in files:
-        if file and file.filename.endswith(".pdf"):
-            file_id = str(uuid.uuid4())
-            file_path = os.path.join(upload_dir, f"{file_id}_{file.filename}")
-            file.save(file_path)
+    # Opt-in background mode: answer with a job id and let a worker do the rest
+    if request.args.get("async") in ("1", "true") or request.form.get("async") in ("1", "true"):
+        job_id = job_queue.submit(current_user.id, run_analysis, current_user.id, description, file_paths)
+        return jsonify({"job_id": job_id, "status": "queued"}), 202
 
-            try:
-                file_texts += "\n" + extract_text_from_pdf(file_path)
-            except Exception as e:
-                print("PDF extraction error:", e)
+    return jsonify(run_analysis(current_user.id, description, file_paths))
 
-    full_text = description + "\n" + file_texts
 
-    classification_scores = classifier.classify(full_text)
-    confidence = classifier.calculate_confidence(classification_scores)
+@analysis_bp.route("/analyze/batch", methods=["POST"])
+@token_required
+def analyze_batch(current_user: User):
+    """
+    Analyzes many text-only cases in one call. The body is either
+    {"cases": [{"description": ...}, ...]}, a bare JSON list of cases, or
+    NDJSON with one case object per line, which is read incrementally.
 
-    labels = list(classification_scores.keys())
-    primary = labels[0]
-    secondary = None
+    Answers with NDJSON, one {"index": ...} line per case in input order,
+    streamed as each group of settings.ANALYSIS_BATCH_SIZE cases is done.
+    """
+    if request.mimetype == "application/x-ndjson":
+        cases = _iter_ndjson(request.stream)
+    else:
+        data = request.get_json(silent=True)
+        cases = data.get("cases") if isinstance(data, dict) else data
+        if not isinstance(cases, list):
+            return jsonify({"error": "Body must be {\"cases\": [...]} or a list of cases"}), 400
 
-    if len(labels) > 1 and classification_scores[labels[1]] >= classification_scores[labels[0]] * 0.75:
-        secondary = labels[1]
+    user_id = current_user.id
 
-    analysis_result = rag_agent.analyze_case_sync(
-        full_text, primary, secondary
+    def generate():
+        items = enumerate(cases)
+        while True:
+            group = list(islice(items, settings.ANALYSIS_BATCH_SIZE))
+            if not group:
+                break
+            for line in run_analysis_batch(user_id, group):
+                yield json.dumps(line) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+def _iter_ndjson(stream) -> Iterator[Any]:
+    for raw in stream:
+        if not raw.strip():
+            continue
+        try:
+            yield json.loads(raw)
+        except ValueError:
+            yield None
+
+
+@analysis_bp.route("/analyze/<job_id>", methods=["GET"])
+@token_required
+def analysis_job_status(current_user: User, job_id: str):
+    job = job_queue.get(job_id, current_user.id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+
+@analysis_bp.route("/judgments/<int:doc_id>", methods=["GET"])
+@token_required
+def judgment_text(current_user: User, doc_id: int):
+    """
+    Full text of an indexed judgment (see "doc_id" in similar_precedents),
+    or a byte range of it with ?offset=&length=.
+    """
+    text_store = registry.get("vector_store").text_store
+    if not 0 <= doc_id < len(text_store):
+        return jsonify({"error": "Judgment not found"}), 404
+
+    offset = request.args.get("offset", 0, type=int)
+    length = request.args.get("length", None, type=int)
+    return jsonify({
+        "doc_id": doc_id,
+        "name": text_store.name(doc_id),
+        "text": text_store.read(doc_id, max(offset, 0), length)
+    })
+
+
+def run_analysis(user_id: int, description: str, file_paths: List[str]) -> Dict[str, Any]:
+    """
+    Extract -> classify -> retrieve -> store. Runs on the request thread
+    or on a job worker, so it only takes plain values.
+
+    Identical submissions against the same index version skip straight to
+    the store step (see `analysis_cache`).
+    """
+    rag_agent = registry.get("rag_agent")
+    # Analysed in normalized form so every submission sharing a key gets
+    # the same result
+    normalized = normalize_query(description)
+    cache_key = (
+        normalized,
+        tuple(upload_digest(p) for p in file_paths),
+        rag_agent.vector_store.version
     )
 
+    cached = analysis_cache.get(cache_key)
+    if cached is None:
+        cached = _analyze(normalized, file_paths, rag_agent)
+        analysis_cache.put(cache_key, cached)
+    primary, secondary, confidence, classification_scores, analysis_result = copy.deepcopy(cached)
+
     db = SessionLocal()
     try:
         new_case = CaseRecord(
-            user_id=current_user.id,
+            user_id=user_id,
             description=description,
             case_type=primary,
             classification_json=classification_scores,
             analysis_json=analysis_result
         )
 
-        db.add(new_case)
-        db.commit()
-        db.refresh(new_case)
+        with metrics.span("analyze.db_commit"):
+            db.add(new_case)
+            db.commit()
+            db.refresh(new_case)
 
-        return jsonify({
-            "id": new_case.id,
-            "classification": {
-                "primary": primary,
-                "secondary": f"{secondary} (subject to proof of intent)" if secondary else None,
-                "confidence": f"{confidence}%"
-            },
-            "analysis": analysis_result
-        })
+        return _response(new_case.id, primary, secondary, confidence, analysis_result)
 
     finally:
         db.close()
+
+
+def run_analysis_batch(user_id: int, items: Iterable[Tuple[int, Any]]) -> List[Dict[str, Any]]:
+    """
+    Classifies (index, case) pairs in bulk, retrieves precedents for all of
+    them with one encode + index search, and stores the CaseRecords in a
+    single transaction. Returns one line per pair.
+    """
+    lines: Dict[int, Dict[str, Any]] = {}
+    valid = []
+    for index, case in items:
+        description = case.get("description") if isinstance(case, dict) else None
+        if not isinstance(description, str) or not description.strip():
+            lines[index] = {"index": index, "error": "Description is required"}
+        else:
+            valid.append((index, description, normalize_query(description)))
+
+    if valid:
+        classifier = registry.get("classifier")
+        rag_agent = registry.get("rag_agent")
+
+        with metrics.span("batch.classify"):
+            all_scores = classifier.classify_many([n for _, _, n in valid])
+        labels = [_labels(scores) for scores in all_scores]
+        analyses = rag_agent.analyze_cases_sync(
+            [(n, primary, secondary) for (_, _, n), (primary, secondary) in zip(valid, labels)]
+        )
+
+        records = [
+            CaseRecord(
+                user_id=user_id,
+                description=description,
+                case_type=primary,
+                classification_json=scores,
+                analysis_json=analysis
+            )
+            for (_, description, _), (primary, _), scores, analysis in zip(valid, labels, all_scores, analyses)
+        ]
+
+        db = SessionLocal()
+        try:
+            with metrics.span("batch.db_commit"):
+                db.add_all(records)
+                db.flush()
+                ids = [r.id for r in records]
+                db.commit()
+        finally:
+            db.close()
+
+        for (index, _, _), case_id, (primary, secondary), scores, analysis in zip(
+            valid, ids, labels, all_scores, analyses
+        ):
+            lines[index] = {
+                "index": index,
+                **_response(case_id, primary, secondary, classifier.calculate_confidence(scores), analysis)
+            }
+
+    return [lines[index] for index in sorted(lines)]
+
+
+def _labels(classification_scores: Dict[str, float]) -> Tuple[str, Optional[str]]:
+    labels = list(classification_scores.keys())
+    primary = labels[0]
+    secondary = None
+
+    if len(labels) > 1 and classification_scores[labels[1]] >= classification_scores[labels[0]] * 0.75:
+        secondary = labels[1]
+    return primary, secondary
+
+
+def _response(case_id: int, primary: str, secondary: Optional[str], confidence: int, analysis_result) -> Dict[str, Any]:
+    return {
+        "id": case_id,
+        "classification": {
+            "primary": primary,
+            "secondary": f"{secondary} (subject to proof of intent)" if secondary else None,
+            "confidence": f"{confidence}%"
+        },
+        "analysis": analysis_result
+    }
+
+
+def _analyze(description: str, file_paths: List[str], rag_agent) -> tuple:
+    file_texts = []
+    with metrics.span("analyze.extract"):
+        for file_path in file_paths:
+            try:
+                file_texts.append(extract_text_cached(file_path))
+            except Exception as e:
+                print("PDF extraction error:", e)
+
+    full_text = description + "\n" + "".join("\n" + t for t in file_texts)
+
+    classifier = registry.get("classifier")
+
+    with metrics.span("analyze.classify"):
+        classification_scores = classifier.classify(full_text)
+        confidence = classifier.calculate_confidence(classification_scores)
+    primary, secondary = _labels(classification_scores)
+
+    # Timed inside as search.* and rag.opinion
+    analysis_result = rag_agent.analyze_case_sync(
+        full_text, primary, secondary
+    )
+    return primary, secondary, confidence, classification_scores, analysis_result
@@ -1,10 +1,52 @@
 from functools import wraps
 from flask import request, jsonify
 import jwt
+from sqlalchemy import event, inspect
+from app.core.cache import LRUCache
 from app.core.config import settings
 from app.core.database import SessionLocal
 from app.models.user import User
 
+# Authenticated users by token subject (email). Entries are detached User
+# rows; each process keeps its own cache, so the TTL bounds how long another
+# worker can serve a stale row after an update there.
+principal_cache = LRUCache(settings.PRINCIPAL_CACHE_SIZE, settings.PRINCIPAL_CACHE_TTL)
+
+
+def invalidate_principal(email: str):
+    principal_cache.pop(email)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user(mapper, connection, target):
+    invalidate_principal(target.email)
+    # Old address too, if the email itself changed
+    for old_email in inspect(target).attrs.email.history.deleted or ():
+        invalidate_principal(old_email)
+
+
+def _load_principal(email: str, user_id=None):
+    user = principal_cache.get(email)
+    if user is not None:
+        return user
+
+    db = SessionLocal()
+    try:
+        if user_id is not None:
+            user = db.get(User, user_id)
+            if user is not None and user.email != email:
+                user = None
+        else:
+            user = db.query(User).filter(User.email == email).first()
+    finally:
+        db.close()
+
+    if user is not None:
+        principal_cache.put(email, user)
+    return user
+
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
@@ -32,13 +74,10 @@ def token_required(f):
         except jwt.InvalidTokenError:
             return jsonify({"detail": "Invalid token"}), 401
 
-        db = SessionLocal()
-        try:
-            user = db.query(User).filter(User.email == email).first()
-            if not user:
-                return jsonify({"detail": "User not found"}), 401
-        finally:
-            db.close()
+        # Tokens issued before "uid" was added fall back to the email lookup
+        user = _load_principal(email, payload.get("uid"))
+        if not user:
+            return jsonify({"detail": "User not found"}), 401
 
         return f(user, *args, **kwargs)
 
@@ -1,10 +1,97 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, request, jsonify
+from sqlalchemy import select, func, tuple_
+from app.api.deps import token_required
+from app.core.database import SessionLocal
+from app.models.case import CaseRecord
+from app.models.user import User
 
 history_bp = Blueprint("history", __name__)
 
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# Characters of the description shown in the list view
+PREVIEW_CHARS = 200
+
+
 @history_bp.route("/", methods=["GET"])
-def history():
-    return jsonify([
-        {"case": "Cheque Bounce", "date": "2025-01-10"},
-        {"case": "Property Dispute", "date": "2025-01-15"}
-    ])
+@token_required
+def history(current_user: User):
+    """
+    The user's cases, newest first, without the JSON blobs.
+
+    Keyset pagination: pass the previous page's `next_cursor` as
+    ?cursor= to continue. Each page is one range scan of the
+    (user_id, created_at, id) index, however deep it is.
+    """
+    limit = min(max(request.args.get("limit", PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+    cursor = request.args.get("cursor", None, type=int)
+
+    query = (
+        select(
+            CaseRecord.id,
+            CaseRecord.case_type,
+            func.substr(CaseRecord.description, 1, PREVIEW_CHARS).label("description"),
+            CaseRecord.created_at
+        )
+        .where(CaseRecord.user_id == current_user.id)
+        .order_by(CaseRecord.created_at.desc(), CaseRecord.id.desc())
+        .limit(limit + 1)
+    )
+
+    if cursor is not None:
+        # Compare against the cursor row's own created_at so the value
+        # never round-trips through Python datetime formatting.
+        cursor_created = (
+            select(CaseRecord.created_at)
+            .where(CaseRecord.id == cursor, CaseRecord.user_id == current_user.id)
+            .scalar_subquery()
+        )
+        query = query.where(
+            tuple_(CaseRecord.created_at, CaseRecord.id) < tuple_(cursor_created, cursor)
+        )
+
+    db = SessionLocal()
+    try:
+        rows = db.execute(query).all()
+    finally:
+        db.close()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return jsonify({
+        "items": [
+            {
+                "id": r.id,
+                "case_type": r.case_type,
+                "description": r.description,
+                "created_at": r.created_at.isoformat() if r.created_at else None
+            }
+            for r in rows
+        ],
+        "next_cursor": str(rows[-1].id) if has_more else None
+    })
+
+
+@history_bp.route("/<int:case_id>", methods=["GET"])
+@token_required
+def history_detail(current_user: User, case_id: int):
+    db = SessionLocal()
+    try:
+        case = db.execute(
+            select(CaseRecord).where(CaseRecord.id == case_id, CaseRecord.user_id == current_user.id)
+        ).scalar_one_or_none()
+
+        if case is None:
+            return jsonify({"error": "Case not found"}), 404
+
+        return jsonify({
+            "id": case.id,
+            "case_type": case.case_type,
+            "description": case.description,
+            "classification": case.classification_json,
+            "analysis": case.analysis_json,
+            "created_at": case.created_at.isoformat() if case.created_at else None
+        })
+    finally:
+        db.close()
@@ -0,0 +1,94 @@
+import time
+from typing import Iterator
+
+from flask import Blueprint, Response, g, request
+
+from app.api.analysis import analysis_cache
+from app.api.deps import principal_cache
+from app.core.metrics import Family, metrics
+from app.core.registry import registry
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@metrics_bp.before_app_request
+def _start_timer():
+    if metrics.enabled:
+        g.request_start = time.perf_counter()
+        metrics.request_started()
+
+
+@metrics_bp.after_app_request
+def _server_timing(response):
+    # A streamed body has not been generated yet, so its stages are still
+    # to come; those requests only show up in /metrics
+    if metrics.enabled and "request_start" in g and not response.is_streamed:
+        response.headers["Server-Timing"] = metrics.server_timing(time.perf_counter() - g.request_start)
+    return response
+
+
+@metrics_bp.teardown_app_request
+def _stop_timer(exc):
+    # Teardown also runs for failed requests, so the in-flight gauge
+    # cannot drift. It runs twice for stream_with_context responses, so
+    # only the first run records the request.
+    start = g.pop("request_start", None)
+    if metrics.enabled and start is not None:
+        metrics.request_finished(request.endpoint or "unknown", time.perf_counter() - start)
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    if not metrics.enabled:
+        return Response("Metrics are disabled (LEGALAI_METRICS=0)\n", status=404, mimetype="text/plain")
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+def _app_metrics() -> Iterator[Family]:
+    """
+    Index size, cache and encoder counters of whatever is loaded. Models
+    that are not loaded yet are skipped rather than loaded by the scrape.
+    """
+    caches = {"principal": principal_cache, "analysis": analysis_cache}
+    encoders = {}
+
+    if registry.is_loaded("vector_store"):
+        vs = registry.get("vector_store")
+        yield ("legalai_index_vectors", "gauge", "Vectors in the FAISS index.", [({}, vs.index.ntotal)])
+        yield ("legalai_text_store_documents", "gauge", "Judgments in the text store.", [({}, len(vs.text_store))])
+        caches["query_embedding"] = vs.query_cache
+        if vs.query_encoder:
+            encoders["vector_store"] = vs.query_encoder
+
+    if registry.is_loaded("ipc_matcher"):
+        matcher = registry.get("ipc_matcher")
+        caches["ipc_query"] = matcher.query_cache
+        if matcher.query_encoder:
+            encoders["ipc_matcher"] = matcher.query_encoder
+
+    cache_stats = {name: cache.stats() for name, cache in caches.items()}
+    for field, kind, help in (
+        ("hits", "counter", "Cache hits."),
+        ("misses", "counter", "Cache misses."),
+        ("size", "gauge", "Entries currently cached.")
+    ):
+        name = f"legalai_cache_{field}_total" if kind == "counter" else f"legalai_cache_{field}"
+        yield (name, kind, help, [({"cache": c}, s[field]) for c, s in cache_stats.items()])
+
+    encoder_stats = {name: encoder.stats() for name, encoder in encoders.items()}
+    for field, kind, help in (
+        ("batches", "counter", "Batched encode calls."),
+        ("items", "counter", "Texts encoded through the batcher."),
+        ("queue_depth", "gauge", "Texts waiting for the next batch.")
+    ):
+        name = f"legalai_encoder_{field}_total" if kind == "counter" else f"legalai_encoder_{field}"
+        yield (name, kind, help, [({"encoder": e}, s[field]) for e, s in encoder_stats.items()])
+
+    status = registry.status()
+    yield ("legalai_model_ready", "gauge", "1 once the registry entry has loaded.",
+           [({"model": name}, int(s["state"] == "ready")) for name, s in status.items()])
+    yield ("legalai_model_load_seconds", "gauge", "Time the registry entry took to load.",
+           [({"model": name}, s["load_seconds"]) for name, s in status.items() if s.get("load_seconds") is not None])
+
+
+metrics.register_collector(_app_metrics)
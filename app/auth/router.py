@@ -79,7 +79,7 @@ def login():
             return jsonify({"detail": "Invalid credentials"}), 401
 
         token = create_access_token(
-            data={"sub": user.email},
+            data={"sub": user.email, "uid": user.id},
             expires_delta=timedelta(
                 minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
             )
@@ -0,0 +1,124 @@
+import os
+import queue
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from typing import Callable, List, Sequence
+
+import numpy as np
+
+
+# Live encoders, reset in forked children (see _reset_after_fork)
+_instances: "weakref.WeakSet[BatchingEncoder]" = weakref.WeakSet()
+
+
+class BatchingEncoder:
+    """
+    Collects encode requests from concurrent callers for up to
+    `max_batch_size` texts or `max_wait_ms` milliseconds, runs one batched
+    `encode_fn` call on a background thread and hands each caller its rows.
+    A request that finds nobody else queued is encoded right away.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], np.ndarray],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5,
+        name: str = "encoder"
+    ):
+        self.encode_fn = encode_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        self.batches = 0
+        self.items = 0
+        self.max_seen_batch = 0
+        self.max_seen_depth = 0
+        _instances.add(self)
+
+    def _after_fork(self):
+        # The batching thread does not exist in a forked child, and the
+        # queue/lock may have been held by it at fork time
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._loop, name=f"batching-{self.name}", daemon=True
+                    )
+                    self._thread.start()
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Blocking; returns a (len(texts), dim) array like encode_fn would.
+        """
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((list(texts), future))
+        self.max_seen_depth = max(self.max_seen_depth, self._queue.qsize())
+        return future.result()
+
+    def _loop(self):
+        while True:
+            requests = [self._queue.get()]
+            size = len(requests[0][0])
+            # Nobody else queued means no load to batch with: don't wait
+            deadline = time.monotonic() + self.max_wait if not self._queue.empty() else 0.0
+
+            while size < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                requests.append(item)
+                size += len(item[0])
+
+            texts = [t for r in requests for t in r[0]]
+            try:
+                embeddings = np.asarray(self.encode_fn(texts))
+            except Exception as e:
+                for _, future in requests:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(texts)
+            self.max_seen_batch = max(self.max_seen_batch, len(texts))
+
+            offset = 0
+            for r_texts, future in requests:
+                future.set_result(embeddings[offset:offset + len(r_texts)])
+                offset += len(r_texts)
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_queue_depth": self.max_seen_depth,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_seen_batch
+        }
+
+
+def _reset_after_fork():
+    for encoder in list(_instances):
+        encoder._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -1,7 +1,69 @@
+import os
+
 class Settings:
     DATABASE_URL = "sqlite:///./legalai.db"
     SECRET_KEY = "super-secret-key"
     ACCESS_TOKEN_EXPIRE_MINUTES = 60
     ALGORITHM = "HS256"
 
+    # Authenticated users cached by token subject (see app/api/deps.py)
+    PRINCIPAL_CACHE_SIZE = 4096
+    PRINCIPAL_CACHE_TTL = 300
+
+    # Query embedding LRU cache (VectorStore.search / IPCMatcher.find_ipc)
+    QUERY_CACHE_SIZE = 1024
+    QUERY_CACHE_TTL = 3600
+
+    # Micro-batching of query encodes across concurrent requests (a query
+    # that finds nobody else queued is encoded without waiting)
+    EMBED_BATCHING = True
+    EMBED_MAX_BATCH = 32
+    EMBED_MAX_WAIT_MS = 5
+
+    # Registry entries loaded at startup and required by /ready
+    WARMUP_MODELS = ["classifier", "vector_store", "rag_agent"]
+
+    # zlib-compress judgment texts in 64 KB blocks (smaller on disk, but
+    # range reads decompress instead of slicing the mmap)
+    TEXT_STORE_COMPRESS = os.environ.get("LEGALAI_TEXT_COMPRESS", "0") == "1"
+
+    # Candidates re-ranked with exact distances when the index is compressed
+    VECTOR_RERANK = 50
+
+    # VectorStore.remove_ids keeps a trained index's centroids/codebooks
+    # unless more than this fraction of the vectors is removed at once
+    VECTOR_RETRAIN_FRACTION = 0.3
+
+    # Multi-worker serving: memory-map the vector index/metadata read-only,
+    # and load models when `main` is imported (e.g. gunicorn --preload) so
+    # forked workers share them copy-on-write.
+    VECTOR_STORE_MMAP = os.environ.get("LEGALAI_VECTOR_MMAP", "0") == "1"
+    PRELOAD_MODELS = os.environ.get("LEGALAI_PRELOAD", "0") == "1"
+
+    # Embedding backend per model: torch | torch-int8 | onnx | onnx-int8.
+    # Check agreement with app/vector_store/compare_encoders.py first.
+    DEFAULT_ENCODER_BACKEND = os.environ.get("LEGALAI_ENCODER_BACKEND", "torch")
+    ENCODER_BACKENDS = {
+        # "all-MiniLM-L6-v2": "onnx-int8",
+        # "nlpaueb/legal-bert-base-uncased": "onnx",
+    }
+    ONNX_EXPORT_DIR = "data/models"
+    ONNX_QUANTIZATION = "avx2"  # arm64 | avx2 | avx512 | avx512_vnni
+
+    # Background /api/analyze jobs (?async=1)
+    ANALYSIS_WORKERS = 2
+
+    # Cases classified, searched and stored together by /api/analyze/batch
+    ANALYSIS_BATCH_SIZE = 64
+
+    # Repeat submissions: cached analysis results (per process) and
+    # extracted upload text on disk, keyed by content hash
+    ANALYSIS_CACHE_SIZE = 512
+    ANALYSIS_CACHE_TTL = 24 * 3600
+    EXTRACT_CACHE_MAX_MB = 512
+
+    # Stage timings, /metrics and the Server-Timing header (0 = spans are
+    # no-ops and /metrics is not served)
+    METRICS_ENABLED = os.environ.get("LEGALAI_METRICS", "1") == "1"
+
 settings = Settings()
@@ -0,0 +1,57 @@
+import os
+import re
+
+from app.core.config import settings
+
+BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+
+
+def backend_for(model_name: str) -> str:
+    return settings.ENCODER_BACKENDS.get(model_name, settings.DEFAULT_ENCODER_BACKEND)
+
+
+def load_encoder(model_name: str, backend: str = None):
+    """
+    Returns a SentenceTransformer for `model_name` running on `backend`:
+
+      torch       full-precision PyTorch (reference)
+      torch-int8  PyTorch with Linear layers dynamically quantized to int8
+      onnx        ONNX Runtime export of the model
+      onnx-int8   ONNX Runtime export with dynamic int8 quantization
+
+    ONNX exports are written once under settings.ONNX_EXPORT_DIR and
+    reused. All backends expose the same `encode` API.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    backend = backend or backend_for(model_name)
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown encoder backend: {backend} (expected one of {BACKENDS})")
+
+    if backend == "torch":
+        return SentenceTransformer(model_name)
+
+    if backend == "torch-int8":
+        import torch
+
+        model = SentenceTransformer(model_name, device="cpu")
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    export_dir = os.path.join(settings.ONNX_EXPORT_DIR, re.sub(r"[^A-Za-z0-9_.-]", "_", model_name))
+    if not os.path.exists(os.path.join(export_dir, "onnx", "model.onnx")):
+        SentenceTransformer(model_name, backend="onnx").save(export_dir)
+
+    if backend == "onnx":
+        return SentenceTransformer(export_dir, backend="onnx")
+
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    config = settings.ONNX_QUANTIZATION
+    file_name = f"model_qint8_{config}.onnx"
+    if not os.path.exists(os.path.join(export_dir, "onnx", file_name)):
+        export_dynamic_quantized_onnx_model(
+            SentenceTransformer(export_dir, backend="onnx"), config, export_dir
+        )
+    return SentenceTransformer(
+        export_dir, backend="onnx", model_kwargs={"file_name": f"onnx/{file_name}"}
+    )
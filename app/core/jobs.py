@@ -0,0 +1,138 @@
+import os
+import socket
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Set
+
+from app.core.database import SessionLocal
+from app.models.job import AnalysisJob
+
+INTERRUPTED = "Interrupted by server restart"
+
+
+def _boot_id() -> str:
+    try:
+        with open("/proc/sys/kernel/random/boot_id") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+class JobQueue:
+    """
+    In-process background job runner. Work runs on a bounded thread pool;
+    job state lives in the `analysis_jobs` table so it can be polled from
+    any request and survives the process for inspection.
+    """
+
+    def __init__(self, max_workers: int = 2):
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Jobs submitted by this process, to tell them apart from those of
+        # an earlier process that had the same pid
+        self._submitted: Set[str] = set()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="analysis-job"
+            )
+        return self._executor
+
+    def submit(self, user_id: int, fn: Callable[..., Dict[str, Any]], *args, **kwargs) -> str:
+        job_id = uuid.uuid4().hex
+
+        db = SessionLocal()
+        try:
+            db.add(AnalysisJob(id=job_id, user_id=user_id, status="queued", owner=self._owner()))
+            db.commit()
+        finally:
+            db.close()
+
+        self._submitted.add(job_id)
+
+        self.executor.submit(self._run, job_id, fn, args, kwargs)
+        return job_id
+
+    def _run(self, job_id: str, fn: Callable[..., Dict[str, Any]], args, kwargs):
+        self._update(job_id, status="running")
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            traceback.print_exc()
+            self._update(job_id, status="failed", error=str(e))
+            return
+        self._update(job_id, status="done", result_json=result)
+
+    def _update(self, job_id: str, **fields):
+        db = SessionLocal()
+        try:
+            job = db.get(AnalysisJob, job_id)
+            if job is None:
+                return
+            for key, value in fields.items():
+                setattr(job, key, value)
+            db.commit()
+        finally:
+            db.close()
+
+    def get(self, job_id: str, user_id: int) -> Optional[Dict[str, Any]]:
+        db = SessionLocal()
+        try:
+            job = db.get(AnalysisJob, job_id)
+            if job is None or job.user_id != user_id:
+                return None
+            if job.status in ("queued", "running") and not self._is_alive(job):
+                # Its worker died after startup recovery ran (e.g. a restart)
+                job.status, job.error = "failed", INTERRUPTED
+                db.commit()
+            return {
+                "job_id": job.id,
+                "status": job.status,
+                "result": job.result_json,
+                "error": job.error,
+                "created_at": job.created_at.isoformat() if job.created_at else None,
+                "updated_at": job.updated_at.isoformat() if job.updated_at else None
+            }
+        finally:
+            db.close()
+
+    def recover(self):
+        """
+        Marks jobs left queued/running by a process that no longer exists
+        as failed, since their in-memory work is gone. Safe to run in every
+        server worker: jobs of live workers are left alone.
+        """
+        db = SessionLocal()
+        try:
+            jobs = db.query(AnalysisJob).filter(AnalysisJob.status.in_(("queued", "running"))).all()
+            for job in jobs:
+                if not self._is_alive(job):
+                    job.status, job.error = "failed", INTERRUPTED
+            db.commit()
+        finally:
+            db.close()
+
+    # ---------------- OWNERSHIP ----------------
+    def _owner(self) -> str:
+        return f"{socket.gethostname()}:{_boot_id()}:{os.getpid()}"
+
+    def _is_alive(self, job: AnalysisJob) -> bool:
+        if not job.owner:
+            return False  # created before owners were recorded
+        host, boot_id, pid = job.owner.rsplit(":", 2)
+        if host != socket.gethostname():
+            return True  # cannot check another machine's processes
+        if boot_id != _boot_id():
+            return False
+        if int(pid) == os.getpid():
+            return job.id in self._submitted
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
@@ -0,0 +1,203 @@
+import bisect
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+
+# Seconds; covers cache hits (sub-ms) up to cold model loads
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# A collector returns (name, type, help, [(labels, value), ...]) tuples,
+# evaluated on every scrape
+Sample = Tuple[Dict[str, str], float]
+Family = Tuple[str, str, str, List[Sample]]
+
+# Spans finished while serving the current request, for Server-Timing
+_request_spans: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_spans", default=None)
+
+
+class Histogram:
+    """
+    Thread-safe cumulative histogram keyed by one label value.
+    """
+
+    def __init__(self, name: str, help: str, label: str, buckets: Tuple[float, ...] = BUCKETS):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = buckets
+        # label value -> [per-bucket counts (+Inf last), sum]
+        self._series: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value: str, seconds: float):
+        slot = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][slot] += 1
+            series[1] += seconds
+
+    def render(self) -> List[str]:
+        with self._lock:
+            snapshot = {k: (list(counts), total) for k, (counts, total) in self._series.items()}
+
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for value in sorted(snapshot):
+            counts, total = snapshot[value]
+            label = f'{self.label}="{_escape(value)}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label}}} {total:.6f}")
+            lines.append(f"{self.name}_count{{{label}}} {cumulative}")
+        return lines
+
+
+class _Span:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics: "Metrics", name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class Metrics:
+    """
+    Stage timings and request counters, rendered in the Prometheus text
+    format. When disabled, `span` hands out a shared no-op context manager
+    and nothing is recorded.
+
+        with metrics.span("search.faiss"):
+            index.search(...)
+
+    Spans time leaf stages and are not nested (search.* inside a RAG
+    call is not wrapped again), so a request's stages add up to at most
+    its total and no time is counted twice.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.stages = Histogram("legalai_stage_seconds", "Time spent per processing stage.", "stage")
+        self.requests = Histogram("legalai_http_request_seconds", "HTTP request latency per endpoint.", "endpoint")
+        self.requests_in_flight = 0
+        self._lock = threading.Lock()
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+    # ---------------- STAGES ----------------
+    def span(self, name: str):
+        if not self.enabled:
+            return _NOOP
+        return _Span(self, name)
+
+    def observe(self, name: str, seconds: float):
+        """
+        Records a stage duration measured elsewhere (e.g. in an ETL worker
+        process).
+        """
+        if not self.enabled:
+            return
+        self.stages.observe(name, seconds)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append((name, seconds))
+
+    # ---------------- REQUESTS ----------------
+    def request_started(self):
+        if not self.enabled:
+            return
+        _request_spans.set([])
+        with self._lock:
+            self.requests_in_flight += 1
+
+    def request_finished(self, endpoint: str, seconds: float):
+        if not self.enabled:
+            return
+        _request_spans.set(None)
+        self.requests.observe(endpoint, seconds)
+        with self._lock:
+            self.requests_in_flight -= 1
+
+    def server_timing(self, total_seconds: float) -> str:
+        """
+        Server-Timing header value for the spans of the current request,
+        repeated stages summed, plus "total".
+        """
+        durations: Dict[str, float] = {}
+        for name, seconds in _request_spans.get() or ():
+            durations[name] = durations.get(name, 0.0) + seconds
+        durations["total"] = total_seconds
+        return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in durations.items())
+
+    # ---------------- EXPORT ----------------
+    def register_collector(self, collector: Callable[[], Iterable[Family]]):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = self.stages.render() + self.requests.render()
+        lines += _render_family((
+            "legalai_http_requests_in_flight", "gauge", "Requests currently being served.",
+            [({}, self.requests_in_flight)]
+        ))
+        for collector in self._collectors:
+            try:
+                for family in collector():
+                    lines += _render_family(family)
+            except Exception as e:
+                print(f"Warning: Metrics collector failed: {e}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """
+        Writes `render()` to `path` atomically, e.g. for the node_exporter
+        textfile collector after a batch job.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _render_family(family: Family) -> List[str]:
+    name, kind, help, samples = family
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        label_str = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+        lines.append(f"{name}{{{label_str}}} {value}" if label_str else f"{name} {value}")
+    return lines
+
+
+metrics = Metrics(enabled=settings.METRICS_ENABLED)
@@ -0,0 +1,121 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+
+class ModelRegistry:
+    """
+    Process-wide holder for expensive objects (models, indexes). Each entry
+    is built once by its factory, lazily on first `get` or eagerly via
+    `warmup`, and load state/timings are kept for the readiness endpoint.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._status: Dict[str, Dict[str, Any]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._warmup_pid: Optional[int] = None
+
+    def register(self, name: str, factory: Callable[[], Any]):
+        with self._lock:
+            self._factories[name] = factory
+            self._locks.setdefault(name, threading.Lock())
+            self._status.setdefault(name, {"state": "not_loaded", "load_seconds": None, "error": None})
+
+    def get(self, name: str) -> Any:
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        if name not in self._factories:
+            raise KeyError(f"Nothing registered as '{name}'")
+
+        with self._locks[name]:
+            instance = self._instances.get(name)
+            if instance is not None:
+                return instance
+
+            status = self._status[name]
+            status.update(state="loading", error=None)
+            start = time.perf_counter()
+            try:
+                instance = self._factories[name]()
+            except Exception as e:
+                status.update(state="failed", error=str(e), load_seconds=round(time.perf_counter() - start, 3))
+                raise
+
+            status.update(state="ready", load_seconds=round(time.perf_counter() - start, 3))
+            self._instances[name] = instance
+            return instance
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._instances
+
+    def warmup(self, names: Optional[Iterable[str]] = None):
+        """
+        Loads the given (default: all) entries now. Failures are recorded
+        in `status()` rather than raised, so one bad model does not block
+        the others.
+        """
+        for name in list(names or self._factories):
+            try:
+                self.get(name)
+            except Exception as e:
+                print(f"Warning: Failed to load '{name}': {e}")
+
+    def warmup_async(self, names: Optional[Iterable[str]] = None):
+        """
+        Starts `warmup` on a daemon thread, once per process. Call it from
+        the serving process (after any fork): a thread started before a
+        fork does not exist in the children.
+        """
+        pid = os.getpid()
+        if self._warmup_pid == pid:
+            return
+        with self._lock:
+            if self._warmup_pid == pid:
+                return
+            self._warmup_pid = pid
+        threading.Thread(target=self.warmup, args=(names,), name="registry-warmup", daemon=True).start()
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        return {name: dict(s) for name, s in self._status.items()}
+
+
+registry = ModelRegistry()
+
+
+# ---------------- DEFAULT ENTRIES ----------------
+# Heavy imports (faiss, sentence-transformers, pandas) happen inside the
+# factories, so importing the web app stays cheap.
+
+def _load_classifier():
+    from app.agents.classifier import CaseClassifier
+    return CaseClassifier()
+
+
+def _load_vector_store():
+    from app.core.config import settings
+    from app.vector_store.faiss_store import VectorStore
+    # The server never writes; read-only also keeps a worker that starts
+    # mid-ETL from truncating files the ETL is still appending to
+    return VectorStore(read_only=True, mmap=settings.VECTOR_STORE_MMAP)
+
+
+def _load_rag_agent():
+    from app.agents.rag import LegalReasoningAgent
+    return LegalReasoningAgent(registry.get("vector_store"))
+
+
+def _load_ipc_matcher():
+    from app.models.ipc_resolver import IPCMatcher
+    return IPCMatcher()
+
+
+registry.register("classifier", _load_classifier)
+registry.register("vector_store", _load_vector_store)
+registry.register("rag_agent", _load_rag_agent)
+registry.register("ipc_matcher", _load_ipc_matcher)
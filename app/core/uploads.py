@@ -0,0 +1,103 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import settings
+from app.etl.extractor import extract_text_from_pdf
+
+_CHUNK = 1 << 20
+
+
+def save_upload(file, upload_dir: str = "data/uploads") -> str:
+    """
+    Stores an uploaded file under the sha256 of its content and returns the
+    path. Re-uploads of the same PDF reuse the existing file.
+    """
+    os.makedirs(upload_dir, exist_ok=True)
+    digest = hashlib.sha256()
+
+    fd, tmp_path = tempfile.mkstemp(dir=upload_dir, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                block = file.stream.read(_CHUNK)
+                if not block:
+                    break
+                digest.update(block)
+                out.write(block)
+
+        path = os.path.join(upload_dir, digest.hexdigest() + ".pdf")
+        if os.path.exists(path):
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, path)
+        return path
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def upload_digest(path: str) -> str:
+    """
+    Content hash of a file stored by `save_upload`.
+    """
+    return Path(path).stem
+
+
+def extract_text_cached(path: str, cache_dir: str = "data/extract_cache") -> str:
+    """
+    extract_text_from_pdf, memoized on disk by the upload's content hash.
+    The cache is kept under settings.EXTRACT_CACHE_MAX_MB by dropping the
+    least recently used entries.
+    """
+    cache_path = os.path.join(cache_dir, upload_digest(path) + ".txt")
+
+    text = _read_cached(cache_path)
+    if text is not None:
+        return text
+
+    text = extract_text_from_pdf(path)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".part")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, cache_path)
+
+    _prune(cache_dir, settings.EXTRACT_CACHE_MAX_MB * 1024 * 1024)
+    return text
+
+
+def _read_cached(cache_path: str) -> Optional[str]:
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            text = f.read()
+    except FileNotFoundError:
+        return None
+    os.utime(cache_path)  # mtime doubles as last-used time for eviction
+    return text
+
+
+def _prune(cache_dir: str, max_bytes: int):
+    entries = []
+    total = 0
+    for entry in os.scandir(cache_dir):
+        if entry.name.endswith(".txt"):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+    if total <= max_bytes:
+        return
+
+    for _, size, path in sorted(entries):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        if total <= max_bytes:
+            break
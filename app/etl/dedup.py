@@ -0,0 +1,153 @@
+import hashlib
+import os
+import pickle
+import zlib
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Mersenne prime for the MinHash permutations; shingle hashes are kept
+# below it so (a * x + b) never overflows uint64.
+_PRIME = (1 << 31) - 1
+
+
+class ChunkDeduplicator:
+    """
+    Detects exact (content hash) and near (MinHash + LSH) duplicate chunks.
+
+    Chunks are identified by their position in the VectorStore. A chunk is
+    a near-duplicate when its estimated Jaccard similarity over word
+    shingles with an earlier chunk is at least `threshold`.
+    """
+
+    def __init__(
+        self,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 3,
+        threshold: float = 0.85,
+        seed: int = 1
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.threshold = threshold
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=num_perm, dtype=np.uint64)
+
+        self.n_chunks = 0
+        self._exact: Dict[bytes, int] = {}
+        self._buckets: Dict[Tuple[int, bytes], List[int]] = {}
+        self._signatures: Dict[int, np.ndarray] = {}
+
+        self.stats = {"seen": 0, "exact": 0, "near": 0}
+
+    # ---------------- SIGNATURES ----------------
+    def _normalize(self, text: str) -> str:
+        return " ".join(text.lower().split())
+
+    def _signature(self, normalized: str) -> np.ndarray:
+        words = normalized.split(" ")
+        n = max(1, len(words) - self.shingle_size + 1)
+        shingles = {" ".join(words[i:i + self.shingle_size]) for i in range(n)}
+
+        x = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) % _PRIME for s in shingles),
+            dtype=np.uint64, count=len(shingles)
+        )
+        hashed = (np.outer(x, self._a) + self._b) % _PRIME
+        return hashed.min(axis=0).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    # ---------------- LOOKUP ----------------
+    def check(self, text: str, chunk_id: int) -> Optional[int]:
+        """
+        Returns the id of an earlier duplicate of `text`, or registers
+        `text` under `chunk_id` and returns None.
+        """
+        self.stats["seen"] += 1
+        normalized = self._normalize(text)
+
+        digest = hashlib.sha1(normalized.encode("utf-8")).digest()
+        existing = self._exact.get(digest)
+        if existing is not None:
+            self.stats["exact"] += 1
+            return existing
+
+        signature = self._signature(normalized)
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self._buckets.get(key, ()))
+
+        best, best_score = None, 0.0
+        for cid in candidates:
+            score = float(np.mean(self._signatures[cid] == signature))
+            if score > best_score:
+                best, best_score = cid, score
+
+        if best is not None and best_score >= self.threshold:
+            self.stats["near"] += 1
+            return best
+
+        self._exact[digest] = chunk_id
+        self._signatures[chunk_id] = signature
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, []).append(chunk_id)
+        self.n_chunks = max(self.n_chunks, chunk_id + 1)
+        return None
+
+    def remap(self, mapping: Sequence[int]):
+        """
+        Follows a VectorStore.remove_ids renumbering (old id -> new id,
+        -1 = removed), forgetting removed chunks.
+        """
+        self._exact = {d: mapping[i] for d, i in self._exact.items() if mapping[i] >= 0}
+        self._signatures = {mapping[i]: s for i, s in self._signatures.items() if mapping[i] >= 0}
+        buckets = {}
+        for key, ids in self._buckets.items():
+            kept = [mapping[i] for i in ids if mapping[i] >= 0]
+            if kept:
+                buckets[key] = kept
+        self._buckets = buckets
+        self.n_chunks = sum(1 for new in mapping[:self.n_chunks] if new >= 0)
+
+    # ---------------- PERSISTENCE ----------------
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(self, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, n_chunks: int, text_of: Callable[[int], str], **kwargs) -> "ChunkDeduplicator":
+        """
+        Loads a saved deduplicator and indexes any of the first `n_chunks`
+        chunks it has not seen yet (e.g. ones recovered from the vector
+        log), reading their text with `text_of(chunk_id)`.
+        """
+        dedup = None
+        if os.path.exists(path):
+            try:
+                with open(path, "rb") as f:
+                    dedup = pickle.load(f)
+            except Exception as e:
+                print(f"Warning: Could not load dedup index: {e}")
+
+        if dedup is None or dedup.n_chunks > n_chunks:
+            dedup = cls(**kwargs)
+
+        for chunk_id in range(dedup.n_chunks, n_chunks):
+            dedup.check(text_of(chunk_id), chunk_id)
+        dedup.n_chunks = n_chunks
+        dedup.stats = {"seen": 0, "exact": 0, "near": 0}
+        return dedup
@@ -1,11 +1,17 @@
-import fitz  # PyMuPDF
+from typing import Iterator
+
+def iter_pdf_pages(file_path: str) -> Iterator[str]:
+    """
+    Yields the text of each page in order, keeping only one page in memory.
+    """
+    import fitz  # PyMuPDF, imported lazily to keep app startup fast
+
+    with fitz.open(file_path) as doc:
+        for page in doc:
+            yield page.get_text()
 
 def extract_text_from_pdf(file_path: str) -> str:
     """
     Extracts text from a PDF file using PyMuPDF (fitz).
     """
-    doc = fitz.open(file_path)
-    text = ""
-    for page in doc:
-        text += page.get_text()
-    return text
+    return "".join(iter_pdf_pages(file_path))
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class EtlManifest:
+    """
+    What the ETL has indexed, per PDF name:
+
+        {"dir": "/abs/pdf/dir", "size": ..., "mtime_ns": ..., "sha256": ...,
+         "doc_id": 3, "chunks": [start, end], "shared": [chunk ids]}
+
+    `chunks` is the contiguous range of chunk ids the PDF added and `shared`
+    the other chunks it is a source of (deduplicated onto, or handed over
+    when another PDF was released). `n_chunks` is the store
+    size the manifest was saved at; chunks beyond it come from a run that
+    did not finish.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.n_chunks = 0
+
+    @classmethod
+    def load(cls, path: str) -> Optional["EtlManifest"]:
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Warning: Could not load ETL manifest: {e}")
+            return None
+
+        manifest = cls(path)
+        manifest.files = data["files"]
+        manifest.n_chunks = data["n_chunks"]
+        return manifest
+
+    @classmethod
+    def bootstrap(cls, path: str, metadata: Sequence[Dict[str, Any]], pdf_dir: str) -> "EtlManifest":
+        """
+        Builds a manifest for a store indexed before manifests existed.
+        PDFs still present in `pdf_dir` are assumed unchanged since they
+        were indexed; the others get no "dir" and are never treated as
+        deleted.
+        """
+        manifest = cls(path)
+        owned: Dict[str, List[int]] = {}
+        for chunk_id, m in enumerate(metadata):
+            owner = m.get("source")
+            owned.setdefault(owner, []).append(chunk_id)
+            manifest.files.setdefault(owner, {"chunks": [0, 0], "shared": []})
+            for name in m.get("sources", [owner]):
+                if name != owner:
+                    manifest.files.setdefault(name, {"chunks": [0, 0], "shared": []})["shared"].append(chunk_id)
+
+        # A release hands a chunk to its next source, so what a PDF owns
+        # need not be contiguous: its longest run becomes "chunks" and the
+        # rest is tracked like shared chunks.
+        for owner, chunk_ids in owned.items():
+            runs = []
+            for chunk_id in chunk_ids:
+                if runs and runs[-1][1] == chunk_id:
+                    runs[-1][1] = chunk_id + 1
+                else:
+                    runs.append([chunk_id, chunk_id + 1])
+            longest = max(runs, key=lambda run: run[1] - run[0])
+            entry = manifest.files[owner]
+            entry["chunks"] = longest
+            entry["shared"] = sorted(
+                entry["shared"] + [i for run in runs if run is not longest for i in range(*run)]
+            )
+
+        for name, entry in manifest.files.items():
+            path_in_dir = os.path.join(pdf_dir, name)
+            entry["doc_id"] = None
+            entry["dir"] = None
+            if os.path.exists(path_in_dir):
+                stat = os.stat(path_in_dir)
+                entry.update(
+                    dir=pdf_dir, size=stat.st_size, mtime_ns=stat.st_mtime_ns,
+                    sha256=file_sha256(path_in_dir)
+                )
+
+        manifest.n_chunks = len(metadata)
+        return manifest
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"n_chunks": self.n_chunks, "files": self.files}, f)
+        os.replace(tmp_path, self.path)
+
+    # ---------------- CHANGES ----------------
+    def release(self, name: str, metadata: Sequence[Dict[str, Any]]) -> List[int]:
+        """
+        Forgets `name` and removes it from the "sources" of its chunks.
+        Returns the chunk ids no other PDF still refers to.
+        """
+        entry = self.files.pop(name, None)
+        if entry is None:
+            return []
+
+        orphaned = []
+        for chunk_id in list(range(*entry["chunks"])) + entry["shared"]:
+            m = metadata[chunk_id]
+            sources = [s for s in m.get("sources", [m.get("source")]) if s != name]
+            if not sources:
+                orphaned.append(chunk_id)
+                continue
+            m["sources"] = sources
+            if m.get("source") == name:
+                m["source"] = sources[0]
+        return orphaned
+
+    def remap(self, mapping: Sequence[int]):
+        """
+        Applies a VectorStore.remove_ids renumbering (old id -> new id,
+        -1 = removed) to every entry.
+        """
+        for entry in self.files.values():
+            start, end = entry["chunks"]
+            entry["chunks"] = [mapping[start], mapping[end - 1] + 1] if end > start else [0, 0]
+            entry["shared"] = [mapping[i] for i in entry["shared"] if mapping[i] >= 0]
+        self.n_chunks = sum(1 for new in mapping[:self.n_chunks] if new >= 0)
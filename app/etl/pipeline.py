@@ -1,90 +1,369 @@
 import os
 import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
-import pickle
+from typing import List, Dict, Any
 
 # Add project root to path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
-from app.etl.extractor import extract_text_from_pdf
-from app.etl.transformer import chunk_text, extract_legal_entities
+from app.etl.extractor import iter_pdf_pages
+from app.etl.transformer import iter_chunks, iter_chunk_entities
+from app.etl.dedup import ChunkDeduplicator
+from app.etl.manifest import EtlManifest, file_sha256
+from app.core.metrics import metrics
 from app.vector_store.faiss_store import VectorStore
 
-# Max PDFs to process
+# Max new or changed PDFs to process per run
 MAX_PDFS = 1000
-# Metadata file to track processed PDFs (from your VectorStore)
-METADATA_FILE = "data/metadata.pkl"
+# Per-PDF stat/hash and chunk ids, kept next to the FAISS index
+MANIFEST_FILE = "data/etl_manifest.json"
+# Exact/near-duplicate chunk signatures, kept in step with the VectorStore
+DEDUP_FILE = "data/dedup.pkl"
+# Full texts of extracted PDFs on their way from workers to the TextStore
+SPOOL_DIR = "data/etl_spool"
 
 
-def run_etl_pipeline(pdf_dir: str):
-    print(f"Starting ETL process for directory: {pdf_dir}")
+def process_pdf(file_path: str, spool_dir: str = SPOOL_DIR) -> Dict[str, Any]:
+    """
+    Extract + chunk + entity stage. Runs in a worker process, so it only
+    takes and returns picklable values.
+
+    Pages stream through the chunker one at a time. The full text, which
+    the main process stores in the TextStore, is spooled to a file under
+    `spool_dir` ("document_path") instead of being kept in memory.
+    """
+    start = time.perf_counter()
+    name = Path(file_path).name
+    sha256 = None
+    spool_path = None
+    n_pages = 0
+    try:
+        sha256 = file_sha256(file_path)
+        os.makedirs(spool_dir, exist_ok=True)
+        fd, spool_path = tempfile.mkstemp(dir=spool_dir, suffix=".txt")
+
+        texts = []
+        metadatas = []
+        with os.fdopen(fd, "wb") as spool:
+            def pages():
+                nonlocal n_pages
+                for page in iter_pdf_pages(file_path):
+                    n_pages += 1
+                    spool.write(page.encode("utf-8"))
+                    yield page
+
+            # 1️⃣ Extract pages + 2️⃣ chunk them as they stream in
+            offset = prev_start = 0
+            for chunk, entities in iter_chunk_entities(iter_chunks(pages())):
+                if texts:
+                    # Byte offset advanced over the text since the previous chunk
+                    offset += len(texts[-1][:chunk["start"] - prev_start].encode("utf-8"))
+                prev_start = chunk["start"]
+
+                texts.append(chunk["text"])
+                metadatas.append({
+                    "source": name,                # PDF name
+                    "offset": offset,              # chunk bytes within the stored document
+                    "length": len(chunk["text"].encode("utf-8")),
+                    "page_start": chunk["page_start"],
+                    "page_end": chunk["page_end"],
+                    "ipc_sections": entities.get("ipc_sections", []),
+                    "articles": entities.get("articles", []),
+                    "acts": entities.get("acts", [])
+                })
+
+        if not any(t.strip() for t in texts):
+            os.remove(spool_path)
+            return {"name": name, "sha256": sha256, "pages": n_pages, "texts": [], "metadatas": [],
+                    "error": "empty PDF", "seconds": time.perf_counter() - start}
+
+        return {"name": name, "sha256": sha256, "pages": n_pages, "document_path": spool_path, "texts": texts,
+                "metadatas": metadatas, "error": None, "seconds": time.perf_counter() - start}
+
+    except Exception as e:
+        if spool_path and os.path.exists(spool_path):
+            os.remove(spool_path)
+        return {"name": name, "sha256": sha256, "pages": 0, "texts": [], "metadatas": [], "error": str(e),
+                "seconds": time.perf_counter() - start}
+
 
-    # Initialize VectorStore
-    vs = VectorStore()
+def run_etl_pipeline(
+    pdf_dir: str,
+    checkpoint_every: int = 5000,
+    extract_workers: int = None,
+    encode_workers: int = 1,
+    encode_batch_size: int = 256,
+    queue_size: int = None,
+    dedup: bool = True,
+    dedup_threshold: float = 0.85,
+    metrics_out: str = None
+):
+    """
+    Staged pipeline: a process pool extracts/chunks PDFs while the main
+    process encodes. Chunks are batched across documents until
+    `encode_batch_size` is reached. At most `queue_size` PDFs are in
+    flight at once, so memory stays bounded while the encoder catches up.
+    `extract_workers=0` processes PDFs inline.
 
-    # Load already processed PDF names from metadata to skip them
-    processed_pdfs = set()
-    if Path(METADATA_FILE).exists():
-        try:
-            with open(METADATA_FILE, "rb") as f:
-                metadata = pickle.load(f)
-                processed_pdfs = {m["source"] for m in metadata}
-        except Exception as e:
-            print(f"Warning: Could not load metadata file: {e}")
+    With `dedup`, a chunk that exactly or nearly (MinHash Jaccard >=
+    `dedup_threshold`) matches an already indexed chunk is not embedded
+    again; its PDF is added to that chunk's "sources" list instead. A
+    run without `dedup` that removes chunks drops DEDUP_FILE, which the
+    next dedup run rebuilds from the store.
+
+    Runs are incremental against MANIFEST_FILE: PDFs whose size/mtime and
+    then content hash are unchanged are skipped, changed ones are
+    re-indexed and ones deleted from `pdf_dir` are dropped, with their
+    vectors removed from the index. The manifest is saved after every
+    encode batch, so chunks a crashed run added past it are discarded
+    and their PDFs redone on the next run.
+
+    Stage timings go to app.core.metrics; `metrics_out` writes them to a
+    Prometheus text file at the end (the pipeline serves no /metrics).
+
+    Returns the stage counters and timings (None if there was nothing to
+    do).
+    """
+    print(f"Starting ETL process for directory: {pdf_dir}")
+
+    # Initialize VectorStore (replays any vectors left in the append log)
+    vs = VectorStore(checkpoint_every=checkpoint_every)
 
     pdf_path = Path(pdf_dir)
     if not pdf_path.exists():
         print(f"Error: Directory {pdf_dir} does not exist.")
         return
+    pdf_dir_abs = str(pdf_path.resolve())
+
+    # Texts spooled by a run that stopped before storing them
+    for stale in Path(SPOOL_DIR).glob("*.txt"):
+        stale.unlink()
+
+    manifest = EtlManifest.load(MANIFEST_FILE)
+    if manifest is not None and manifest.n_chunks > len(vs.metadata):
+        print("Warning: ETL manifest is ahead of the vector store; rebuilding it.")
+        manifest = None
+    if manifest is None:
+        manifest = EtlManifest.bootstrap(MANIFEST_FILE, vs.metadata, pdf_dir_abs)
+
+    deduper = (
+        ChunkDeduplicator.load(DEDUP_FILE, len(vs.metadata), vs.chunk_text, threshold=dedup_threshold)
+        if dedup else None
+    )
+
+    # Chunks from a run that stopped before recording them in the manifest
+    to_remove = set(range(manifest.n_chunks, len(vs.metadata)))
+    if to_remove:
+        print(f"Discarding {len(to_remove)} chunks from an interrupted run.")
+        known = manifest.files
+        for m in vs.metadata[:manifest.n_chunks]:
+            sources = m.get("sources")
+            if sources and any(s not in known for s in sources):
+                m["sources"] = [s for s in sources if s in known] or sources[:1]
+
+    # What changed since the last run: stat first, hash only on a mismatch
+    new_files, changed_files, present = [], [], set()
+    for file_path in sorted(pdf_path.glob("*.pdf")):
+        present.add(file_path.name)
+        entry = manifest.files.get(file_path.name)
+        if entry is None:
+            new_files.append(file_path)
+            continue
+        stat = file_path.stat()
+        if entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+            continue
+        digest = file_sha256(str(file_path))
+        if digest == entry.get("sha256"):
+            entry.update(dir=pdf_dir_abs, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+        else:
+            changed_files.append(file_path)
+
+    deleted = [name for name, e in manifest.files.items() if e.get("dir") == pdf_dir_abs and name not in present]
+
+    # Limit number of PDFs (deletions are not capped)
+    pdf_files = (changed_files + new_files)[:MAX_PDFS]
+    reindexed = [f.name for f in pdf_files if f.name in manifest.files]
+    print(f"{len(new_files)} new, {len(changed_files)} changed, {len(deleted)} deleted PDFs; "
+          f"processing {len(pdf_files)} (limit {MAX_PDFS}).")
+
+    for name in deleted + reindexed:
+        to_remove.update(manifest.release(name, vs.metadata))
+
+    if to_remove:
+        def remap(mapping):
+            manifest.remap(mapping)
+            if deduper:
+                deduper.remap(mapping)
+            elif os.path.exists(DEDUP_FILE):
+                # Its chunk ids are about to go stale: the next dedup run
+                # rebuilds it from the store instead
+                os.remove(DEDUP_FILE)
+
+        print(f"Removing {len(to_remove)} chunks from the index...")
+        with metrics.span("etl.remove"):
+            vs.remove_ids(sorted(to_remove), on_remap=remap)
+        if deduper:
+            deduper.save(DEDUP_FILE)
+    elif deleted or reindexed:
+        vs.checkpoint()  # "sources" edits on chunks other PDFs still share
+    manifest.n_chunks = len(vs.metadata)
+    manifest.save()
 
-    pdf_files = [f for f in pdf_path.glob("*.pdf") if f.name not in processed_pdfs]
     if not pdf_files:
         print("No new PDFs to process. Exiting.")
         return
 
-    # Limit number of PDFs
-    pdf_files = pdf_files[:MAX_PDFS]
-    print(f"Processing {len(pdf_files)} PDF files (limit {MAX_PDFS}).")
+    if extract_workers is None:
+        extract_workers = max(1, (os.cpu_count() or 2) - 1)
+    if queue_size is None:
+        queue_size = max(2, extract_workers * 2)
+
+    file_stats = {f.name: f.stat() for f in pdf_files}
+
+    stats = {"docs": 0, "pages": 0, "chunks": 0, "extract_s": 0.0, "encode_s": 0.0}
+    buffer_texts: List[str] = []
+    buffer_metas: List[Dict[str, Any]] = []
+    # (name, manifest entry, buffer positions of its own chunks)
+    pending: List[tuple] = []
+
+    def flush_buffer():
+        start_id = len(vs.metadata)
+        if buffer_texts:
+            # 3️⃣ Load into FAISS
+            start = time.perf_counter()
+            vs.add_texts(buffer_texts, buffer_metas)
+            stats["encode_s"] += time.perf_counter() - start
+            stats["chunks"] += len(buffer_texts)
+            buffer_texts.clear()
+            buffer_metas.clear()
+
+        if pending:
+            for name, entry, (first, last) in pending:
+                entry["chunks"] = [start_id + first, start_id + last]
+                manifest.files[name] = entry
+            pending.clear()
+            manifest.n_chunks = len(vs.metadata)
+            manifest.save()
 
-    for i, file_path in enumerate(pdf_files):
-        print(f"[{i+1}/{len(pdf_files)}] Processing {file_path.name}...")
+    def collect(result: Dict[str, Any]):
+        stats["docs"] += 1
+        stats["pages"] += result["pages"]
+        stats["extract_s"] += result["seconds"]
+        metrics.observe("etl.extract", result["seconds"])
+        prefix = f"[{stats['docs']}/{len(pdf_files)}] {result['name']}"
 
-        try:
-            # 1️⃣ Extract text
-            text = extract_text_from_pdf(str(file_path))
-            if not text.strip():
-                print("   Skipping empty PDF.")
+        stat = file_stats[result["name"]]
+        entry = {"dir": pdf_dir_abs, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                 "sha256": result["sha256"], "doc_id": None, "shared": []}
+        first = len(buffer_texts)
+
+        if result["error"]:
+            # Recorded too, so an unreadable PDF is only retried once it changes
+            print(f"{prefix}: skipped ({result['error']})")
+            entry["error"] = result["error"]
+            pending.append((result["name"], entry, (first, first)))
+            return
+        print(f"{prefix}: {len(result['texts'])} chunks")
+
+        # The full judgment is stored once; chunks keep (doc_id, offset, length)
+        with metrics.span("etl.text_store"):
+            doc_id = entry["doc_id"] = vs.text_store.add_file(result["name"], result["document_path"])
+        os.remove(result["document_path"])
+
+        for text, meta in zip(result["texts"], result["metadatas"]):
+            next_id = len(vs.metadata) + len(buffer_texts)
+            with metrics.span("etl.dedup"):
+                dup = deduper.check(text, next_id) if deduper else None
+            if dup is None:
+                meta["doc_id"] = doc_id
+                meta["sources"] = [result["name"]]
+                buffer_texts.append(text)
+                buffer_metas.append(meta)
                 continue
 
-            # 2️⃣ Chunk text
-            chunks = chunk_text(text)
+            if dup < len(vs.metadata):
+                # Already indexed: logged, so the attribution survives a crash
+                sources = vs.metadata[dup].get("sources", [vs.metadata[dup]["source"]])
+                if result["name"] not in sources:
+                    vs.update_metadata(dup, sources=sources + [result["name"]])
+                    entry["shared"].append(dup)
+                continue
 
-            texts_to_add = []
-            metadatas = []
+            # Still buffered: logged with the chunk when it is added
+            target = buffer_metas[dup - len(vs.metadata)]
+            sources = target.setdefault("sources", [target["source"]])
+            if result["name"] not in sources:
+                sources.append(result["name"])
+                entry["shared"].append(dup)
 
-            for chunk in chunks:
-                entities = extract_legal_entities(chunk)
+        pending.append((result["name"], entry, (first, len(buffer_texts))))
 
-                texts_to_add.append(chunk)
+        if len(buffer_texts) >= encode_batch_size:
+            flush_buffer()
 
-                metadatas.append({
-                    "source": file_path.name,      # PDF name
-                    "text": chunk,                 # REQUIRED for RAG summary
-                    "ipc_sections": entities.get("ipc_sections", []),
-                    "articles": entities.get("articles", []),
-                    "acts": entities.get("acts", [])
-                })
+    wall_start = time.perf_counter()
+    vs.start_encode_pool(encode_workers)
+    try:
+        if extract_workers == 0:
+            for file_path in pdf_files:
+                collect(process_pdf(str(file_path)))
+        else:
+            with ProcessPoolExecutor(max_workers=extract_workers) as pool:
+                todo = iter(pdf_files)
+                in_flight = set()
+                while True:
+                    for file_path in todo:
+                        in_flight.add(pool.submit(process_pdf, str(file_path)))
+                        if len(in_flight) >= queue_size:
+                            break
+                    if not in_flight:
+                        break
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(future.result())
+        flush_buffer()
+    finally:
+        vs.stop_encode_pool()
 
-            # 3️⃣ Load into FAISS
-            if texts_to_add:
-                vs.add_texts(texts_to_add, metadatas)
-                print(f"   Added {len(texts_to_add)} chunks.")
+    # 4️⃣ Persist whatever is still only in the append log
+    with metrics.span("etl.checkpoint"):
+        vs.checkpoint()
+    if deduper:
+        deduper.save(DEDUP_FILE)
+    wall_s = time.perf_counter() - wall_start
 
-        except Exception as e:
-            print(f"   Error processing {file_path.name}: {e}")
+    print("Stage throughput:")
+    print(f"   extract+chunk: {stats['docs']} docs in {stats['extract_s']:.1f}s worker time "
+          f"({_rate(stats['docs'], stats['extract_s'])} docs/s per worker, {max(extract_workers, 1)} workers)")
+    print(f"   encode+index:  {stats['chunks']} chunks in {stats['encode_s']:.1f}s "
+          f"({_rate(stats['chunks'], stats['encode_s'])} chunks/s)")
+    print(f"   overall:       {_rate(stats['docs'], wall_s)} docs/s, {_rate(stats['chunks'], wall_s)} chunks/s "
+          f"over {wall_s:.1f}s")
 
+    if deduper:
+        dups = deduper.stats["exact"] + deduper.stats["near"]
+        per_chunk_s = stats["encode_s"] / stats["chunks"] if stats["chunks"] else 0.0
+        print("Deduplication:")
+        print(f"   {deduper.stats['seen']} chunks seen, {deduper.stats['exact']} exact and "
+              f"{deduper.stats['near']} near duplicates skipped "
+              f"({100 * dups / max(deduper.stats['seen'], 1):.1f}%)")
+        print(f"   ~{dups * vs.dimension * 4 / 1e6:.1f} MB of vectors and "
+              f"~{dups * per_chunk_s:.1f}s of encoding saved")
+    if metrics_out and metrics.enabled:
+        metrics.write(metrics_out)
+        print(f"Stage metrics written to {metrics_out}")
     print("ETL process completed successfully.")
 
+    stats["wall_s"] = wall_s
+    return stats
+
+
+def _rate(count: int, seconds: float) -> str:
+    return f"{count / seconds:.1f}" if seconds > 0 else "n/a"
+
 
 if __name__ == "__main__":
     import argparse
@@ -96,6 +375,66 @@ if __name__ == "__main__":
         required=True,
         help="Directory containing PDF files"
     )
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=5000,
+        help="Rewrite the FAISS index and metadata after this many new vectors"
+    )
+
+    parser.add_argument(
+        "--extract-workers",
+        type=int,
+        default=None,
+        help="Processes for PDF extraction/chunking (default: CPUs - 1, 0 = inline)"
+    )
+    parser.add_argument(
+        "--encode-workers",
+        type=int,
+        default=1,
+        help="Processes for SentenceTransformer encoding (1 = in-process)"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=256,
+        help="Chunks collected across PDFs before each encode call"
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=None,
+        help="Max PDFs in flight between extraction and encoding"
+    )
+
+    parser.add_argument(
+        "--no-dedup",
+        action="store_true",
+        help="Embed every chunk, even exact/near duplicates of indexed ones"
+    )
+    parser.add_argument(
+        "--dedup-threshold",
+        type=float,
+        default=0.85,
+        help="Estimated Jaccard similarity at which a chunk counts as a near duplicate"
+    )
+
+    parser.add_argument(
+        "--metrics-out",
+        type=str,
+        default=None,
+        help="Write stage timings as Prometheus text to this file (e.g. for node_exporter)"
+    )
 
     args = parser.parse_args()
-    run_etl_pipeline(args.dir)
+    run_etl_pipeline(
+        args.dir,
+        checkpoint_every=args.checkpoint_every,
+        extract_workers=args.extract_workers,
+        encode_workers=args.encode_workers,
+        encode_batch_size=args.batch_size,
+        queue_size=args.queue_size,
+        dedup=not args.no_dedup,
+        dedup_threshold=args.dedup_threshold,
+        metrics_out=args.metrics_out
+    )
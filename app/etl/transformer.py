@@ -1,5 +1,7 @@
 import re
-from typing import List, Dict
+from bisect import bisect_right
+from collections import deque
+from typing import List, Dict, Iterable, Iterator, Any
 
 def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
     """
@@ -16,26 +18,173 @@ def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> List[st
         start += chunk_size - overlap
     return chunks
 
+def iter_chunks(
+    pages: Iterable[str],
+    chunk_size: int = 1000,
+    overlap: int = 200
+) -> Iterator[Dict[str, Any]]:
+    """
+    Streaming version of chunk_text over page texts. Yields the same
+    chunks as chunk_text("".join(pages)) without building the whole
+    document, each as {"text", "start", "page_start", "page_end"}
+    (1-based page numbers).
+    """
+    step = chunk_size - overlap
+    page_starts: List[int] = []
+
+    buf = ""
+    buf_offset = 0      # absolute offset of buf[0]
+    start = 0           # absolute offset of the next chunk
+    total = 0
+
+    def make_chunk(text: str) -> Dict[str, Any]:
+        return {
+            "text": text,
+            "start": start,
+            "page_start": bisect_right(page_starts, start),
+            "page_end": bisect_right(page_starts, start + len(text) - 1)
+        }
+
+    for page in pages:
+        page_starts.append(total)
+        total += len(page)
+        buf += page
+
+        while start + chunk_size <= total:
+            local = start - buf_offset
+            yield make_chunk(buf[local:local + chunk_size])
+            start += step
+
+        # Drop text no future chunk can reach
+        if start > buf_offset:
+            buf = buf[start - buf_offset:]
+            buf_offset = start
+
+    while start < total:
+        local = start - buf_offset
+        yield make_chunk(buf[local:local + chunk_size])
+        start += step
+
+# IPC Sections, Constitution Articles and Acts (Name Act, Year), each
+# compiled once. Acts stay case-sensitive; section/article numbers may
+# carry a letter suffix (498A).
+_SECTION_NO = r"\d+[A-Za-z]?\b"
+_ENTITY_PATTERNS = (
+    # Case-insensitive, but with each branch's first letter as a plain set
+    # (every character that folds to s / i), which re can skip to quickly
+    ("ipc_sections", re.compile(
+        rf"[Ssſ](?i:ection\s+{_SECTION_NO}\s+(?:of\s+(?:the\s+)?IPC|Indian\s+Penal\s+Code))"
+        rf"|[Iiİı](?i:PC\s+Section\s+{_SECTION_NO})"
+    )),
+    ("articles", re.compile(rf"Article\s+{_SECTION_NO}\s+of\s+(?:the\s+)?Constitution", re.IGNORECASE)),
+    ("acts", re.compile(r"[A-Z][a-zA-Z\s]+Act,\s+\d{4}"))
+)
+_NUMBER_PATTERN = re.compile(_SECTION_NO)
+
+# No entity match spans a character outside [\w\s,], so streamed text can
+# be scanned up to the last such character without seeing what follows
+_BREAK = re.compile(r"[^\w\s,]")
+
+# Unscanned text kept without a break before it is scanned anyway
+MAX_CARRY = 64 * 1024
+
+ENTITY_TYPES = tuple(kind for kind, _ in _ENTITY_PATTERNS)
+
+
+def normalize_entity(kind: str, raw: str) -> str:
+    """
+    "Section 420 of the IPC" -> "420", "Article 21 of Constitution" -> "21",
+    acts are whitespace-collapsed ("Negotiable Instruments Act, 1881").
+    """
+    if kind == "acts":
+        return " ".join(raw.split())
+    m = _NUMBER_PATTERN.search(raw)
+    return m.group(0).upper() if m else raw.strip().upper()
+
+
+def find_legal_entities(text: str, offset: int = 0) -> List[Dict[str, Any]]:
+    """
+    One pass per entity type over `text`. Returns matches ordered by
+    position as {"type", "value", "start", "end"} with normalized values
+    and offsets shifted by `offset`.
+    """
+    matches = []
+    for kind, pattern in _ENTITY_PATTERNS:
+        for m in pattern.finditer(text):
+            matches.append({
+                "type": kind,
+                "value": normalize_entity(kind, m.group()),
+                "start": offset + m.start(),
+                "end": offset + m.end()
+            })
+    matches.sort(key=lambda m: m["start"])
+    return matches
+
+
+def _group_entities(matches: Iterable[Dict[str, Any]]) -> Dict[str, List[str]]:
+    entities = {kind: set() for kind in ENTITY_TYPES}
+    for m in matches:
+        entities[m["type"]].add(m["value"])
+    return {kind: sorted(values) for kind, values in entities.items()}
+
+
 def extract_legal_entities(text: str) -> Dict[str, List[str]]:
     """
-    Extracts IPC sections, Articles, and Acts using Regex.
+    Extracts normalized IPC sections, Articles, and Acts using Regex.
     """
-    entities = {
-        "ipc_sections": [],
-        "articles": [],
-        "acts": []
-    }
-    
-    # IPC Sections patterns
-    ipc_pattern = r"(Section\s+\d+\s+of\s+(?:the\s+)?IPC|IPC\s+Section\s+\d+|Section\s+\d+\s+Indian\s+Penal\s+Code)"
-    entities["ipc_sections"] = list(set(re.findall(ipc_pattern, text, re.IGNORECASE)))
-    
-    # Constitution Articles
-    article_pattern = r"(Article\s+\d+\s+of\s+(?:the\s+)?Constitution)"
-    entities["articles"] = list(set(re.findall(article_pattern, text, re.IGNORECASE)))
-    
-    # Acts (Basic pattern: Name Act, Year)
-    act_pattern = r"([A-Z][a-zA-Z\s]+Act,\s+\d{4})"
-    entities["acts"] = list(set(re.findall(act_pattern, text)))
+    return _group_entities(find_legal_entities(text))
+
+
+def extract_legal_entities_many(texts: Iterable[str]) -> List[Dict[str, List[str]]]:
+    return [extract_legal_entities(t) for t in texts]
+
+
+def iter_chunk_entities(chunks: Iterable[Dict[str, Any]]) -> Iterator[tuple]:
+    """
+    Yields (chunk, entities) for chunks from iter_chunks, with the entities
+    whose match lies entirely inside the chunk, as a scan of the whole
+    document would find them.
+
+    Only the text each chunk adds past the previous one is new; it is
+    scanned once, up to its last break character (see _BREAK), and
+    the rest is carried into the next scan. A chunk is yielded once the
+    scan has passed its end, so at most a couple of chunks are held.
+    """
+    pending: deque = deque()   # (chunk, end) waiting for the scan to pass end
+    matches: deque = deque()   # found, ordered by start
+    carry, carry_start = "", 0
+    scanned = frontier = 0
+
+    def scan(text: str, offset: int):
+        matches.extend(find_legal_entities(text, offset))
+
+    def ready(upto: int) -> Iterator[tuple]:
+        while pending and pending[0][1] <= upto:
+            chunk, end = pending.popleft()
+            while matches and matches[0]["start"] < chunk["start"]:
+                matches.popleft()
+            inside = []
+            for m in matches:
+                if m["start"] >= end:
+                    break
+                if m["end"] <= end:
+                    inside.append(m)
+            yield chunk, _group_entities(inside)
+
+    for chunk in chunks:
+        end = chunk["start"] + len(chunk["text"])
+        if end > frontier:
+            text = carry + chunk["text"][frontier - chunk["start"]:]
+            frontier = end
+            brk = _BREAK.search(text[::-1])
+            cut = len(text) - brk.start() if brk else (len(text) if len(text) > MAX_CARRY else 0)
+            if cut:
+                scan(text[:cut], carry_start)
+                scanned = carry_start + cut
+            carry, carry_start = text[cut:], carry_start + cut
+        pending.append((chunk, end))
+        yield from ready(scanned)
 
-    return entities
+    if carry:
+        scan(carry, carry_start)
+    yield from ready(frontier)
@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Index
 from sqlalchemy.sql import func
 from app.core.database import Base
 
 class CaseRecord(Base):
     __tablename__ = "case_records"
+    __table_args__ = (
+        # Backs keyset pagination of a user's history, newest first
+        Index("ix_case_records_user_created", "user_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -1,14 +1,40 @@
 import pandas as pd
 import faiss
 import numpy as np
-import pickle
-from sentence_transformers import SentenceTransformer
+import hashlib
+import os
+
+from app.core.batching import BatchingEncoder
+from app.core.cache import LRUCache, normalize_query
+from app.core.config import settings
+from app.core.encoders import backend_for, load_encoder
 
 
 class IPCMatcher:
-    def __init__(self):
+    def __init__(
+        self,
+        csv_path: str = "data/ipc_sections.csv",
+        model_name: str = "nlpaueb/legal-bert-base-uncased",
+        cache_dir: str = "data/ipc_cache",
+        query_cache: LRUCache = None
+    ):
+        self.model_name = model_name
+        self.backend = backend_for(model_name)
+        self._model = None
+        if query_cache is None:
+            query_cache = LRUCache(settings.QUERY_CACHE_SIZE, settings.QUERY_CACHE_TTL)
+        self.query_cache = query_cache
+        self.query_encoder = None
+        if settings.EMBED_BATCHING:
+            self.query_encoder = BatchingEncoder(
+                lambda texts: self.model.encode(texts, normalize_embeddings=True),
+                settings.EMBED_MAX_BATCH, settings.EMBED_MAX_WAIT_MS, name="legal-bert"
+            )
+
         # Load IPC dataset
-        self.df = pd.read_csv("data/ipc_sections.csv")
+        with open(csv_path, "rb") as f:
+            raw = f.read()
+        self.df = pd.read_csv(csv_path)
 
         # Combine section text
         self.texts = (
@@ -17,26 +43,54 @@ class IPCMatcher:
             self.df["description"]
         ).tolist()
 
-        # Load Legal-BERT
-        self.model = SentenceTransformer("nlpaueb/legal-bert-base-uncased")
+        # Section embeddings only change with the CSV, the model or its backend
+        key = hashlib.sha256(raw + f"{model_name}:{self.backend}".encode("utf-8")).hexdigest()[:16]
+        cache_path = os.path.join(cache_dir, f"{key}.index")
+
+        if os.path.exists(cache_path):
+            self.index = faiss.read_index(cache_path)
+        else:
+            self.index = self._build_index()
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = cache_path + ".tmp"
+            faiss.write_index(self.index, tmp_path)
+            os.replace(tmp_path, cache_path)
+
+    @property
+    def model(self):
+        # Legal-BERT is only needed to encode queries, or on a cache miss
+        if self._model is None:
+            self._model = load_encoder(self.model_name, self.backend)
+        return self._model
 
+    def _build_index(self):
         # Create embeddings
         embeddings = self.model.encode(self.texts, normalize_embeddings=True)
-        embeddings = np.array(embeddings)
+        embeddings = np.array(embeddings).astype("float32")
 
         # Create FAISS index
         dim = embeddings.shape[1]
-        self.index = faiss.IndexFlatIP(dim)
-        self.index.add(embeddings)
+        index = faiss.IndexFlatIP(dim)
+        index.add(embeddings)
+        return index
 
     def find_ipc(self, case_text, top_k=3):
-        query_emb = self.model.encode([case_text], normalize_embeddings=True)
-        query_emb = np.array(query_emb)
+        key = (self.model_name, normalize_query(case_text))
+        query_emb = self.query_cache.get(key)
+        if query_emb is None:
+            if self.query_encoder:
+                query_emb = self.query_encoder.encode([key[1]])
+            else:
+                query_emb = self.model.encode([key[1]], normalize_embeddings=True)
+            query_emb = np.array(query_emb).astype("float32")
+            self.query_cache.put(key, query_emb)
 
         D, I = self.index.search(query_emb, top_k)
 
         results = []
         for idx, score in zip(I[0], D[0]):
+            if idx == -1:
+                continue
             row = self.df.iloc[idx]
             results.append({
                 "section": f"IPC {row['section']}",
@@ -0,0 +1,125 @@
+import heapq
+import math
+import os
+import pickle
+import re
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Incremental sparse inverted index with Okapi BM25 scoring. Document
+    ids are the VectorStore chunk ids, so results line up with metadata.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        # term -> (doc ids, term frequencies), appended in doc id order
+        self.postings: Dict[str, Tuple[array, array]] = {}
+        self.doc_lengths = array("I")
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    # ---------------- BUILD ----------------
+    def add(self, doc_id: int, text: str):
+        if doc_id != len(self.doc_lengths):
+            raise ValueError(f"Expected doc id {len(self.doc_lengths)}, got {doc_id}")
+
+        tokens = tokenize(text)
+        counts: Dict[str, int] = {}
+        for t in tokens:
+            counts[t] = counts.get(t, 0) + 1
+
+        for term, tf in counts.items():
+            entry = self.postings.get(term)
+            if entry is None:
+                entry = self.postings[term] = (array("I"), array("I"))
+            entry[0].append(doc_id)
+            entry[1].append(tf)
+
+        self.doc_lengths.append(len(tokens))
+        self.total_length += len(tokens)
+
+    def add_many(self, start_id: int, texts: Iterable[str]):
+        for doc_id, text in enumerate(texts, start_id):
+            self.add(doc_id, text)
+
+    def remap(self, mapping: Sequence[int]):
+        """
+        Drops documents mapped to -1 and renumbers the rest
+        (`mapping[old] = new`, order preserving) without re-tokenizing.
+        """
+        postings: Dict[str, Tuple[array, array]] = {}
+        for term, (ids, tfs) in self.postings.items():
+            new_ids, new_tfs = array("I"), array("I")
+            for doc_id, tf in zip(ids, tfs):
+                new_id = mapping[doc_id]
+                if new_id >= 0:
+                    new_ids.append(new_id)
+                    new_tfs.append(tf)
+            if new_ids:
+                postings[term] = (new_ids, new_tfs)
+
+        self.postings = postings
+        self.doc_lengths = array("I", (n for doc_id, n in enumerate(self.doc_lengths) if mapping[doc_id] >= 0))
+        self.total_length = sum(self.doc_lengths)
+
+    # ---------------- SEARCH ----------------
+    def scores(self, query: str, allowed: Optional[set] = None) -> Dict[int, float]:
+        n_docs = len(self.doc_lengths)
+        if not n_docs:
+            return {}
+
+        avg_len = self.total_length / n_docs
+        k1, b = self.k1, self.b
+        doc_lengths = self.doc_lengths
+        scores: Dict[int, float] = {}
+
+        for term in set(tokenize(query)):
+            entry = self.postings.get(term)
+            if entry is None:
+                continue
+            ids, tfs = entry
+            idf = math.log(1 + (n_docs - len(ids) + 0.5) / (len(ids) + 0.5))
+            for doc_id, tf in zip(ids, tfs):
+                if allowed is not None and doc_id not in allowed:
+                    continue
+                norm = k1 * (1 - b + b * doc_lengths[doc_id] / avg_len)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+
+        return scores
+
+    def search(self, query: str, k: int = 10, allowed: Optional[set] = None) -> List[Tuple[int, float]]:
+        """
+        Returns up to k (doc_id, score) pairs, best first.
+        """
+        scores = self.scores(query, allowed)
+        return heapq.nlargest(k, scores.items(), key=lambda x: x[1])
+
+    # ---------------- PERSISTENCE ----------------
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        if os.path.exists(path):
+            try:
+                with open(path, "rb") as f:
+                    return pickle.load(f)
+            except Exception as e:
+                print(f"Warning: Could not load BM25 index: {e}")
+        return cls()
@@ -0,0 +1,84 @@
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from app.core.encoders import BACKENDS, load_encoder
+from app.vector_store.faiss_store import VectorStore
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype="float32")
+    return x / np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-12)
+
+
+def compare_backends(
+    model_name: str,
+    texts,
+    backend: str,
+    reference: str = "torch",
+    k: int = 10,
+    n_queries: int = 100
+):
+    """
+    Encodes `texts` with the reference and candidate backends and reports
+    per-text cosine agreement, top-k retrieval overlap (the first
+    `n_queries` texts searched against all of them) and encode speed.
+    """
+    results = {}
+    embeddings = {}
+    for name in (reference, backend):
+        encoder = load_encoder(model_name, name)
+        encoder.encode(texts[:8])  # warm up
+        start = time.perf_counter()
+        embeddings[name] = _normalize(encoder.encode(texts, batch_size=64))
+        results[f"{name}_texts_per_s"] = len(texts) / (time.perf_counter() - start)
+
+    ref, cand = embeddings[reference], embeddings[backend]
+    cosine = np.sum(ref * cand, axis=1)
+
+    queries = slice(0, min(n_queries, len(texts)))
+    k = min(k, len(texts))
+    ref_top = np.argsort(-(ref[queries] @ ref.T), axis=1)[:, :k]
+    cand_top = np.argsort(-(cand[queries] @ ref.T), axis=1)[:, :k]
+    overlap = np.mean([len(set(a) & set(b)) / k for a, b in zip(ref_top, cand_top)])
+
+    results.update({
+        "cosine_mean": float(cosine.mean()),
+        "cosine_min": float(cosine.min()),
+        "cosine_p5": float(np.percentile(cosine, 5)),
+        f"top{k}_overlap": float(overlap)
+    })
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Measure how closely an encoder backend matches the reference model on our corpus"
+    )
+    parser.add_argument("--backend", choices=BACKENDS, required=True)
+    parser.add_argument("--reference", choices=BACKENDS, default="torch")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--samples", type=int, default=1000, help="Chunks sampled from the vector store")
+    parser.add_argument("--k", type=int, default=10)
+
+    args = parser.parse_args()
+
+    vs = VectorStore(read_only=True)
+    if not len(vs.metadata):
+        print("Vector store is empty; run the ETL pipeline first.")
+        sys.exit(1)
+
+    rng = np.random.default_rng(0)
+    picks = rng.choice(len(vs.metadata), min(args.samples, len(vs.metadata)), replace=False)
+    texts = [vs.chunk_text(int(i)) for i in picks]
+
+    report = compare_backends(args.model, texts, args.backend, args.reference, k=args.k)
+    for key, value in report.items():
+        print(f"{key:<24}{value:.4f}")
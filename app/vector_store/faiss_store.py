@@ -1,41 +1,257 @@
 import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+import json
 import pickle
 import os
 
+from app.core.batching import BatchingEncoder
+from app.core.cache import LRUCache, normalize_query
+from app.core.config import settings
+from app.core.encoders import load_encoder
+from app.core.metrics import metrics
+from app.etl.transformer import ENTITY_TYPES, normalize_entity
+from app.vector_store.bm25 import BM25Index
+from app.vector_store.mmap_metadata import MmapMetadata, write_mmap_metadata
+from app.vector_store.text_store import TextStore
+
+
+INDEX_TYPES = ("flat", "ivf", "hnsw", "ivfpq")
+COMPRESSIONS = ("none", "fp16", "sq8", "pq")
+SEARCH_MODES = ("dense", "lexical", "hybrid")
+
+# Reciprocal rank fusion constant for hybrid search
+RRF_K = 60
+
+# start_id marker of append-log entries that edit existing metadata
+LOG_UPDATE = "update"
+
+# IO_FLAG_MMAP only maps IVF inverted lists; flat/SQ/PQ codes (the
+# default IndexFlatL2 included) are still read into each process. Newer
+# faiss releases add IO_FLAG_MMAP_IFC, which maps those codes as well.
+MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+
+def build_index(
+    index_type: str,
+    dimension: int,
+    n_vectors: int = 0,
+    nlist: int = None,
+    hnsw_m: int = 32,
+    pq_m: int = 48,
+    pq_bits: int = 8,
+    compression: str = "none"
+):
+    """
+    Returns an empty (possibly untrained) L2 index of the given type.
+    `nlist` defaults to 4 * sqrt(n_vectors).
+
+    `compression` sets how vectors are stored: "none" (float32), "fp16",
+    "sq8" (8-bit scalar quantization) or "pq" (product quantization with
+    `pq_m` sub-quantizers of `pq_bits` bits). "ivfpq" is always PQ.
+    """
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression: {compression} (expected one of {COMPRESSIONS})")
+    qtype = {
+        "fp16": faiss.ScalarQuantizer.QT_fp16,
+        "sq8": faiss.ScalarQuantizer.QT_8bit
+    }.get(compression)
+
+    if index_type == "flat":
+        if compression == "pq":
+            return faiss.IndexPQ(dimension, pq_m, pq_bits)
+        if qtype is not None:
+            return faiss.IndexScalarQuantizer(dimension, qtype, faiss.METRIC_L2)
+        return faiss.IndexFlatL2(dimension)
+
+    if index_type == "hnsw":
+        if compression == "pq":
+            return faiss.IndexHNSWPQ(dimension, pq_m, hnsw_m)
+        if qtype is not None:
+            return faiss.IndexHNSWSQ(dimension, qtype, hnsw_m)
+        return faiss.IndexHNSWFlat(dimension, hnsw_m)
+
+    if nlist is None:
+        nlist = max(1, int(4 * np.sqrt(max(n_vectors, 1))))
+
+    quantizer = faiss.IndexFlatL2(dimension)
+    if index_type == "ivfpq" or (index_type == "ivf" and compression == "pq"):
+        return faiss.IndexIVFPQ(quantizer, dimension, nlist, pq_m, pq_bits)
+    if index_type == "ivf":
+        if qtype is not None:
+            return faiss.IndexIVFScalarQuantizer(quantizer, dimension, nlist, qtype, faiss.METRIC_L2)
+        return faiss.IndexIVFFlat(quantizer, dimension, nlist)
+
+    raise ValueError(f"Unknown index type: {index_type} (expected one of {INDEX_TYPES})")
+
+
+def index_type_of(index) -> str:
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivfpq"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf"
+    return "flat"
+
+
+def compression_of(index) -> str:
+    if isinstance(index, faiss.IndexHNSW):
+        index = faiss.downcast_index(index.storage)
+    if isinstance(index, (faiss.IndexPQ, faiss.IndexIVFPQ)):
+        return "pq"
+    if isinstance(index, (faiss.IndexScalarQuantizer, faiss.IndexIVFScalarQuantizer)):
+        return "fp16" if index.sq.qtype == faiss.ScalarQuantizer.QT_fp16 else "sq8"
+    return "none"
+
+
+def describe_index(index) -> Dict[str, Any]:
+    """
+    Settings recorded next to the index file (<index_path>.json).
+    """
+    info = {
+        "index_type": index_type_of(index),
+        "compression": compression_of(index),
+        "dimension": index.d,
+        "ntotal": index.ntotal
+    }
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        info["nlist"] = ivf.nlist
+    if isinstance(index, faiss.IndexHNSW):
+        info["hnsw_m"] = index.hnsw.nb_neighbors(1)
+    pq = getattr(faiss.downcast_index(index.storage) if isinstance(index, faiss.IndexHNSW) else index, "pq", None)
+    if pq is not None:
+        info["pq_m"] = pq.M
+        info["pq_bits"] = pq.nbits
+    return info
+
 
 class VectorStore:
     def __init__(
         self,
         index_path: str = "data/faiss_index.bin",
-        metadata_path: str = "data/metadata.pkl"
+        metadata_path: str = "data/metadata.pkl",
+        log_path: str = "data/vectors.log",
+        embeddings_path: str = "data/embeddings.f32",
+        entity_index_path: str = "data/entity_index.pkl",
+        bm25_path: str = "data/bm25.pkl",
+        text_store_dir: str = "data/texts",
+        checkpoint_every: int = 5000,
+        read_only: bool = False,
+        mmap: bool = False
     ):
-        self.encoder = SentenceTransformer("all-MiniLM-L6-v2")
+        """
+        New vectors are appended to `log_path` and only folded into the
+        index/metadata files every `checkpoint_every` vectors (or on an
+        explicit `checkpoint()`). Set `checkpoint_every=0` to checkpoint
+        after every `add_texts` call.
+
+        Raw float32 embeddings are kept in `embeddings_path` so the index
+        can be rebuilt as a different type (see `rebuild_index`). A new
+        store always starts as a flat index.
+
+        `entity_index_path` holds the inverted index from normalized
+        IPC section / Article / Act to chunk ids used by filtered search,
+        and `bm25_path` the lexical index used by lexical/hybrid search.
+
+        Full judgment texts live in the TextStore under `text_store_dir`.
+        Chunks added with a "doc_id" reference their text there as
+        (doc_id, offset, length) instead of carrying it in metadata; the
+        text is read back only for the results a search returns.
+
+        `mmap=True` (implies `read_only`) maps the FAISS index (see
+        MMAP_FLAGS) and the JSON-lines copy of the metadata written at
+        checkpoint instead of reading them into memory, so server workers
+        share one page-cache copy (benchmarks/worker_memory.py measures
+        it). A read-only store ignores the append log and rejects
+        `add_texts`.
+        """
+        self.model_name = "all-MiniLM-L6-v2"
+        self.encoder = load_encoder(self.model_name)
         self.dimension = 384
         self.index_path = index_path
         self.metadata_path = metadata_path
+        self.log_path = log_path
+        self.embeddings_path = embeddings_path
+        self.entity_index_path = entity_index_path
+        self.bm25_path = bm25_path
+        self.checkpoint_every = checkpoint_every
+        self.read_only = read_only or mmap
+        self.text_store = TextStore(text_store_dir, compress=settings.TEXT_STORE_COMPRESS, read_only=self.read_only)
+        base = os.path.splitext(metadata_path)[0]
+        self.metadata_jsonl_path = base + ".jsonl"
+        self.metadata_offsets_path = base + ".offsets"
+        self.commit_path = index_path + ".commit"
         self.metadata: List[Dict[str, Any]] = []
+        self._pending = 0
+        self._unsaved: List[np.ndarray] = []
+        self.query_cache = LRUCache(settings.QUERY_CACHE_SIZE, settings.QUERY_CACHE_TTL)
+        self.encode_pool = None
+        self.query_encoder = None
+        if settings.EMBED_BATCHING:
+            self.query_encoder = BatchingEncoder(
+                self.encoder.encode, settings.EMBED_MAX_BATCH, settings.EMBED_MAX_WAIT_MS, name="minilm"
+            )
+        # {"ipc_sections": {"420": [chunk ids]}, "articles": {...}, "acts": {...}}
+        self.entity_index: Dict[str, Dict[str, List[int]]] = {kind: {} for kind in ENTITY_TYPES}
+
+        if os.path.exists(self.commit_path):
+            # A checkpoint or rewrite committed but did not finish
+            if self.read_only:
+                raise RuntimeError(
+                    f"{self.commit_path} exists: a checkpoint was interrupted; "
+                    "open the store writable once to finish it"
+                )
+            self._finish_commit()
 
-        if os.path.exists(index_path) and os.path.exists(metadata_path):
+        if mmap and os.path.exists(index_path) and os.path.exists(self.metadata_offsets_path):
+            self.index = faiss.read_index(index_path, MMAP_FLAGS)
+            if not hasattr(faiss, "IO_FLAG_MMAP_IFC") and not isinstance(self.index, faiss.IndexIVF):
+                print(f"Warning: this faiss version cannot map {index_type_of(self.index)} index codes; "
+                      "each worker holds its own copy of the vectors.")
+            self.metadata = MmapMetadata(self.metadata_jsonl_path, self.metadata_offsets_path)
+            if len(self.metadata) != self.index.ntotal:
+                raise RuntimeError(
+                    f"{self.metadata_jsonl_path} has {len(self.metadata)} records but the index "
+                    f"has {self.index.ntotal} vectors; run a checkpoint first"
+                )
+        elif os.path.exists(index_path) and os.path.exists(metadata_path):
+            if mmap:
+                print(f"Warning: {self.metadata_offsets_path} missing, loading metadata into memory.")
             self.index = faiss.read_index(index_path)
             with open(metadata_path, "rb") as f:
                 self.metadata = pickle.load(f)
         else:
             self.index = faiss.IndexFlatL2(self.dimension)
 
+        if not self.read_only:
+            self._truncate_embeddings(self.index.ntotal)
+        self._load_entity_index()
+        self._load_bm25()
+        if not self.read_only:
+            self._replay_log()
+        elif os.path.exists(self.log_path):
+            print(f"Warning: {self.log_path} has vectors not yet checkpointed; "
+                  "they are not visible to this read-only store.")
+
     # ---------------- ADD TEXTS ----------------
     def add_texts(
         self,
         texts: List[str],
-        metadatas: List[Dict[str, Any]]
+        metadatas: List[Dict[str, Any]],
+        batch_size: int = 32
     ):
         """
         Required metadata structure:
         {
             "source": "pdf_name.pdf",
-            "text": "chunk text",
+            "sources": ["pdf_name.pdf", ...],   # optional, PDFs sharing this chunk
+            "doc_id": 0,                # optional, TextStore document holding the chunk
+            "offset": 0,                # byte offset of the chunk in that document
+            "length": 1000,             # byte length of the chunk
+            "page_start": 1,            # optional
+            "page_end": 2,              # optional
             "ipc_sections": [],
             "articles": [],
             "acts": []
@@ -44,57 +260,695 @@ class VectorStore:
 
         if not texts:
             return
+        if self.read_only:
+            raise RuntimeError("VectorStore was opened read-only")
 
-        embeddings = self.encoder.encode(
-            texts, show_progress_bar=True
-        )
-
-        self.index.add(np.array(embeddings).astype("float32"))
+        with metrics.span("add.encode"):
+            if self.encode_pool is not None:
+                embeddings = self.encoder.encode_multi_process(
+                    texts, self.encode_pool, batch_size=batch_size
+                )
+            else:
+                embeddings = self.encoder.encode(
+                    texts, batch_size=batch_size, show_progress_bar=True
+                )
+            embeddings = np.array(embeddings).astype("float32")
 
+        records = []
         for m, t in zip(metadatas, texts):
-            self.metadata.append({
-                "source": m.get("source", "Unknown PDF"),
-                "text": t,
+            source = m.get("source", "Unknown PDF")
+            record = {
+                "source": source,
+                "sources": m.get("sources", [source]),
+                "page_start": m.get("page_start"),
+                "page_end": m.get("page_end"),
                 "ipc_sections": m.get("ipc_sections", []),
                 "articles": m.get("articles", []),
                 "acts": m.get("acts", [])
-            })
+            }
+            if m.get("doc_id") is not None:
+                record.update(doc_id=m["doc_id"], offset=m["offset"], length=m["length"])
+            else:
+                record["text"] = t
+            records.append(record)
+
+        with metrics.span("add.log"):
+            self._append_log(self.index.ntotal, embeddings, records)
+        with metrics.span("add.index"):
+            self._apply(embeddings, records, texts)
+        self._pending += len(records)
 
-        self.save()
+        if self._pending >= self.checkpoint_every:
+            with metrics.span("add.checkpoint"):
+                self.checkpoint()
+
+    def start_encode_pool(self, workers: int):
+        """
+        Fans `add_texts` encoding out to `workers` CPU processes.
+        """
+        if self.encode_pool is None and workers > 1:
+            self.encode_pool = self.encoder.start_multi_process_pool(["cpu"] * workers)
+
+    def stop_encode_pool(self):
+        if self.encode_pool is not None:
+            self.encoder.stop_multi_process_pool(self.encode_pool)
+            self.encode_pool = None
+
+    def _apply(self, embeddings: np.ndarray, records: List[Dict[str, Any]], texts: List[str] = None):
+        self.index.add(embeddings)
+        start_id = len(self.metadata)
+        self.metadata.extend(records)
+        self._index_entities(start_id, records)
+        if texts is None:
+            texts = [self._record_text(r) for r in records]
+        self.bm25.add_many(start_id, texts)
+        self._unsaved.append(embeddings)
+
+    # ---------------- TEXT ----------------
+    def _record_text(self, record: Dict[str, Any], limit: int = None) -> str:
+        if "text" in record or record.get("doc_id") is None:
+            text = record.get("text", "")
+            return text[:limit] if limit is not None else text
+        length = record["length"] if limit is None else min(limit, record["length"])
+        return self.text_store.read(record["doc_id"], record["offset"], length)
+
+    def chunk_text(self, idx: int) -> str:
+        """
+        Text of chunk `idx`, read from the TextStore when the metadata only
+        holds a reference.
+        """
+        return self._record_text(self.metadata[idx])
+
+    def document_text(self, doc_id: int) -> str:
+        """
+        Full text of a stored judgment.
+        """
+        return self.text_store.read(doc_id)
+
+    # ---------------- ENTITY INDEX ----------------
+    def _index_entities(self, start_id: int, records: List[Dict[str, Any]]):
+        for chunk_id, record in enumerate(records, start_id):
+            for kind in ENTITY_TYPES:
+                postings = self.entity_index[kind]
+                for raw in record.get(kind, []):
+                    ids = postings.setdefault(normalize_entity(kind, raw), [])
+                    if not ids or ids[-1] != chunk_id:
+                        ids.append(chunk_id)
+
+    def _load_entity_index(self):
+        covered = 0
+        if os.path.exists(self.entity_index_path):
+            try:
+                with open(self.entity_index_path, "rb") as f:
+                    covered, entity_index = pickle.load(f)
+                if covered <= len(self.metadata):
+                    self.entity_index = entity_index
+                else:
+                    covered = 0
+            except Exception as e:
+                print(f"Warning: Could not load entity index: {e}")
+                covered = 0
+
+        # Chunks saved before the entity index existed (or after its last save)
+        self._index_entities(covered, self.metadata[covered:])
+
+    def _load_bm25(self):
+        self.bm25 = BM25Index.load(self.bm25_path)
+        if len(self.bm25) > len(self.metadata):
+            self.bm25 = BM25Index()
+        start_id = len(self.bm25)
+        self.bm25.add_many(start_id, (self._record_text(m) for m in self.metadata[start_id:]))
+
+    def chunk_ids_for(self, filters: Dict[str, List[str]]) -> List[int]:
+        """
+        Resolves {"ipc_sections": ["420"], "acts": [...]} to chunk ids.
+        Values of one type are OR-ed, different types are AND-ed. Values
+        are normalized, so "Section 420 IPC" and "420" are equivalent.
+        """
+        result = None
+        for kind, values in filters.items():
+            if kind not in self.entity_index:
+                raise ValueError(f"Unknown filter: {kind} (expected one of {ENTITY_TYPES})")
+            if isinstance(values, str):
+                values = [values]
+
+            ids = set()
+            for v in values:
+                ids.update(self.entity_index[kind].get(normalize_entity(kind, v), ()))
+            result = ids if result is None else result & ids
+
+        return sorted(result or ())
 
     # ---------------- SEARCH ----------------
-    def search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
-        embedding = self.encoder.encode([query])
-        distances, indices = self.index.search(
-            np.array(embedding).astype("float32"), k
-        )
+    def search(
+        self,
+        query: str,
+        k: int = 5,
+        nprobe: int = None,
+        ef_search: int = None,
+        filters: Optional[Dict[str, List[str]]] = None,
+        mode: str = "dense",
+        candidates: int = 100,
+        rerank: int = None,
+        snippet: int = None
+    ) -> List[Dict[str, Any]]:
+        """
+        `nprobe` (IVF indexes) and `ef_search` (HNSW) trade recall for
+        latency per call; they are ignored by index types that lack them.
 
-        results = []
-        for i, idx in enumerate(indices[0]):
-            if idx == -1 or idx >= len(self.metadata):
-                continue
+        `filters` restricts results to chunks citing the given entities,
+        e.g. {"ipc_sections": ["420"]} (see `chunk_ids_for`).
+
+        `mode`:
+          "dense"   - FAISS over the query embedding
+          "lexical" - BM25 only, the encoder is never called
+          "hybrid"  - BM25 picks `candidates` chunks, FAISS re-scores only
+                      those, and both rankings are merged with reciprocal
+                      rank fusion
+
+        `rerank` fetches that many candidates from a compressed index and
+        re-orders them by exact distance (default settings.VECTOR_RERANK,
+        0 = off).
+
+        `snippet` limits each result's "text" to about that many bytes, so
+        only the part the caller shows is read from the TextStore.
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode} (expected one of {SEARCH_MODES})")
 
-            meta = self.metadata[idx].copy()
-            distance = float(distances[0][i])
+        allowed = None
+        if filters:
+            allowed = self.chunk_ids_for(filters)
+            if not allowed:
+                return []
 
-            relevance = max(55, int(100 - (distance * 10)))
+        if mode == "lexical":
+            with metrics.span("search.bm25"):
+                hits = self.bm25.search(query, k, set(allowed) if allowed is not None else None)
+            top = hits[0][1] if hits else 0.0
+            with metrics.span("search.results"):
+                return [
+                    self._result(idx, score, int(55 + 40 * score / top) if top else 55, snippet)
+                    for idx, score in hits
+                ]
 
-            results.append({
-                "source": meta.get("source"),
-                "text": meta.get("text", ""),
-                "ipc_sections": meta.get("ipc_sections", []),
-                "articles": meta.get("articles", []),
-                "acts": meta.get("acts", []),
-                "score": distance,
-                "relevance": f"{relevance}% match"
-            })
+        lexical = None
+        if mode == "hybrid":
+            with metrics.span("search.bm25"):
+                lexical = self.bm25.search(query, candidates, set(allowed) if allowed is not None else None)
+            if lexical:
+                allowed = sorted(idx for idx, _ in lexical)
 
+        if rerank is None:
+            rerank = settings.VECTOR_RERANK if compression_of(self.index) != "none" else 0
+
+        dense = self._dense_search(query, len(allowed) if lexical else k, nprobe, ef_search, allowed, rerank)
+
+        if lexical:
+            fused: Dict[int, float] = {}
+            for rank, (idx, _) in enumerate(lexical):
+                fused[idx] = 1.0 / (RRF_K + rank + 1)
+            for rank, (idx, _) in enumerate(dense):
+                fused[idx] = fused.get(idx, 0.0) + 1.0 / (RRF_K + rank + 1)
+
+            distances = dict(dense)
+            ranked = sorted(fused.items(), key=lambda x: x[1], reverse=True)[:k]
+            with metrics.span("search.results"):
+                return [
+                    self._result(idx, distances.get(idx, float("inf")), self._relevance(distances.get(idx)), snippet)
+                    for idx, _ in ranked
+                ]
+
+        with metrics.span("search.results"):
+            return [self._result(idx, distance, self._relevance(distance), snippet) for idx, distance in dense]
+
+    def _dense_search(
+        self,
+        query: str,
+        k: int,
+        nprobe: int = None,
+        ef_search: int = None,
+        allowed: Optional[List[int]] = None,
+        rerank: int = 0
+    ) -> List[tuple]:
+        with metrics.span("search.encode"):
+            embedding = self.encode_query(query)
+
+        if allowed is not None and isinstance(self.index, faiss.IndexPQ):
+            # IndexPQ rejects search parameters, so it cannot take a
+            # selector: score the allowed chunks exactly instead
+            with metrics.span("search.exact"):
+                exact = np.sum((self.full_vectors(allowed) - embedding[0]) ** 2, axis=1)
+                return sorted(zip(allowed, exact.tolist()), key=lambda x: x[1])[:k]
+
+        selector = None
+        if allowed is not None:
+            selector = faiss.IDSelectorBatch(np.array(allowed, dtype="int64"))
+        with metrics.span("search.faiss"):
+            distances, indices = self.index.search(
+                embedding, max(k, rerank),
+                params=self._search_params(nprobe, ef_search, selector)
+            )
+        return self._hits(embedding[0], indices[0], distances[0], k, rerank)
+
+    def _hits(self, embedding: np.ndarray, indices, distances, k: int, rerank: int) -> List[tuple]:
+        hits = [
+            (int(idx), float(distance))
+            for idx, distance in zip(indices, distances)
+            if idx != -1 and idx < len(self.metadata)
+        ]
+
+        if rerank and hits:
+            # Exact L2 against the full-precision vectors kept on disk
+            with metrics.span("search.rerank"):
+                ids = [idx for idx, _ in hits]
+                exact = np.sum((self.full_vectors(ids) - embedding) ** 2, axis=1)
+                hits = sorted(zip(ids, exact.tolist()), key=lambda x: x[1])
+
+        return hits[:k]
+
+    def search_many(
+        self,
+        queries: List[str],
+        k: int = 5,
+        nprobe: int = None,
+        ef_search: int = None,
+        rerank: int = None,
+        snippet: int = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Dense search for many queries at once: one encode call for the
+        queries not in the cache and a single multi-row index search.
+        Returns one result list per query, as `search` would.
+        """
+        if not queries:
+            return []
+        if rerank is None:
+            rerank = settings.VECTOR_RERANK if compression_of(self.index) != "none" else 0
+
+        with metrics.span("search.encode"):
+            embeddings = self.encode_queries(queries)
+        with metrics.span("search.faiss"):
+            distances, indices = self.index.search(
+                embeddings, max(k, rerank),
+                params=self._search_params(nprobe, ef_search)
+            )
+
+        results = []
+        for row in range(len(queries)):
+            hits = self._hits(embeddings[row], indices[row], distances[row], k, rerank)
+            with metrics.span("search.results"):
+                results.append([
+                    self._result(idx, distance, self._relevance(distance), snippet)
+                    for idx, distance in hits
+                ])
         return results
 
+    def _relevance(self, distance: Optional[float]) -> int:
+        if distance is None:
+            return 55
+        return max(55, int(100 - (distance * 10)))
+
+    def _result(self, idx: int, score: float, relevance: int, snippet: int = None) -> Dict[str, Any]:
+        meta = self.metadata[idx]
+        return {
+            "source": meta.get("source"),
+            "sources": meta.get("sources", [meta.get("source")]),
+            "doc_id": meta.get("doc_id"),
+            "text": self._record_text(meta, snippet),
+            "page_start": meta.get("page_start"),
+            "page_end": meta.get("page_end"),
+            "ipc_sections": meta.get("ipc_sections", []),
+            "articles": meta.get("articles", []),
+            "acts": meta.get("acts", []),
+            "score": score,
+            "relevance": f"{relevance}% match"
+        }
+
+    def encode_query(self, query: str) -> np.ndarray:
+        """
+        Returns a (1, dimension) float32 embedding, served from the LRU
+        cache when the same normalized query was seen recently.
+        """
+        key = normalize_query(query)
+        embedding = self.query_cache.get(key)
+        if embedding is None:
+            encode = self.query_encoder.encode if self.query_encoder else self.encoder.encode
+            embedding = np.array(encode([key])).astype("float32")
+            self.query_cache.put(key, embedding)
+        return embedding
+
+    def encode_queries(self, queries: List[str], batch_size: int = 64) -> np.ndarray:
+        """
+        (len(queries), dimension) embeddings; cache misses are encoded in
+        one batch.
+        """
+        keys = [normalize_query(q) for q in queries]
+        cached = [self.query_cache.get(key) for key in keys]
+
+        missing = sorted({key for key, e in zip(keys, cached) if e is None})
+        if missing:
+            encoded = np.array(self.encoder.encode(missing, batch_size=batch_size)).astype("float32")
+            fresh = {}
+            for key, embedding in zip(missing, encoded):
+                fresh[key] = embedding.reshape(1, -1)
+                self.query_cache.put(key, fresh[key])
+            cached = [e if e is not None else fresh[key] for key, e in zip(keys, cached)]
+
+        return np.vstack(cached)
+
+    def _search_params(self, nprobe: int = None, ef_search: int = None, selector=None):
+        # SearchParameters defaults would override the index's own
+        # nprobe/efSearch, so fall back to those explicitly.
+        index_type = index_type_of(self.index)
+        extra = {"sel": selector} if selector is not None else {}
+        if index_type in ("ivf", "ivfpq") and (nprobe is not None or extra):
+            if nprobe is None:
+                nprobe = faiss.extract_index_ivf(self.index).nprobe
+            return faiss.SearchParametersIVF(nprobe=nprobe, **extra)
+        if index_type == "hnsw" and (ef_search is not None or extra):
+            if ef_search is None:
+                ef_search = self.index.hnsw.efSearch
+            return faiss.SearchParametersHNSW(efSearch=ef_search, **extra)
+        if extra:
+            return faiss.SearchParameters(**extra)
+        return None
+
+    # ---------------- INDEX TYPE ----------------
+    def load_embeddings(self) -> np.ndarray:
+        """
+        Returns every stored embedding as an (ntotal, dimension) array.
+        """
+        parts = []
+        if os.path.exists(self.embeddings_path):
+            parts.append(
+                np.fromfile(self.embeddings_path, dtype="float32").reshape(-1, self.dimension)
+            )
+        elif self.index.ntotal and isinstance(self.index, faiss.IndexFlat):
+            # Stores created before embeddings were kept separately
+            saved = self.index.ntotal - sum(len(e) for e in self._unsaved)
+            parts.append(self.index.reconstruct_n(0, saved))
+        parts.extend(self._unsaved)
+
+        if not parts:
+            return np.zeros((0, self.dimension), dtype="float32")
+        return np.vstack(parts)
+
+    def full_vectors(self, ids: List[int]) -> np.ndarray:
+        """
+        Full-precision vectors for `ids`, read from the on-disk embeddings
+        file (or the not yet checkpointed in-memory batches).
+        """
+        unsaved = np.vstack(self._unsaved) if self._unsaved else None
+        saved = self.index.ntotal - (len(unsaved) if unsaved is not None else 0)
+
+        on_disk = None
+        if os.path.exists(self.embeddings_path):
+            on_disk = np.memmap(self.embeddings_path, dtype="float32", mode="r").reshape(-1, self.dimension)
+
+        rows = []
+        for i in ids:
+            if i >= saved:
+                rows.append(unsaved[i - saved])
+            elif on_disk is not None:
+                rows.append(on_disk[i])
+            else:
+                rows.append(self.index.reconstruct(int(i)))
+        return np.array(rows, dtype="float32").reshape(-1, self.dimension)
+
+    def rebuild_index(self, index_type: str = "flat", train_size: int = 100000, **params):
+        """
+        Rebuilds the index as `index_type` (and `compression`, see
+        build_index) from the stored embeddings, training where needed on
+        (a sample of) them, then commits it with the other files (see
+        _replace_index).
+        """
+        vectors = self._all_embeddings()
+        self._replace_index(self._build_trained(index_type, vectors, train_size, **params), vectors)
+
+    def remove_ids(self, ids, train_size: int = 100000, on_remap=None) -> List[int]:
+        """
+        Physically removes chunks `ids` and renumbers the rest in order,
+        and the BM25 and entity indexes follow. Text stays in the
+        TextStore. Nothing is re-encoded: flat indexes drop the rows in
+        place, and other types re-add the stored vectors to their trained
+        (empty) copy. They are retrained, like rebuild_index, only when
+        more than settings.VECTOR_RETRAIN_FRACTION of the vectors go.
+
+        Returns the renumbering as a list (old id -> new id, -1 =
+        removed). `on_remap(mapping)` runs before the new files are
+        committed so callers keeping chunk ids can update them first.
+        """
+        if self.read_only:
+            raise RuntimeError("VectorStore was opened read-only")
+
+        vectors = self._all_embeddings()
+        remove = np.zeros(len(vectors), dtype=bool)
+        remove[list(ids)] = True
+        keep = np.flatnonzero(~remove)
+        mapping = np.full(len(vectors), -1, dtype=np.int64)
+        mapping[keep] = np.arange(len(keep))
+        mapping = mapping.tolist()
+        n_removed = len(vectors) - len(keep)
+        vectors = vectors[keep]
+
+        if not len(vectors):
+            index = faiss.IndexFlatL2(self.dimension)
+        elif isinstance(self.index, faiss.IndexFlatCodes):
+            # Flat (and flat SQ/PQ) codes are shifted down over the removed
+            # rows, which is exactly the renumbering above
+            index = self.index
+            index.remove_ids(faiss.IDSelectorBatch(np.flatnonzero(remove).astype("int64")))
+        elif n_removed <= settings.VECTOR_RETRAIN_FRACTION * len(remove):
+            index = faiss.clone_index(self.index)
+            index.reset()
+            index.add(vectors)
+        else:
+            info = describe_index(self.index)
+            params = {k: info[k] for k in ("hnsw_m", "pq_m", "pq_bits") if k in info}
+            if "nlist" in info:
+                # IVF training needs at least one vector per list
+                params["nlist"] = min(info["nlist"], len(vectors))
+            index = self._build_trained(
+                info["index_type"], vectors, train_size, compression=info["compression"], **params
+            )
+
+        self.metadata = [self.metadata[i] for i in keep.tolist()]
+        self.entity_index = {kind: {} for kind in ENTITY_TYPES}
+        self._index_entities(0, self.metadata)
+        self.bm25.remap(mapping)
+
+        if on_remap is not None:
+            on_remap(mapping)
+        self._replace_index(index, vectors)
+        return mapping
+
+    def _all_embeddings(self) -> np.ndarray:
+        vectors = self.load_embeddings()
+        if len(vectors) != self.index.ntotal:
+            raise RuntimeError(
+                f"Stored embeddings ({len(vectors)}) do not match index size ({self.index.ntotal})"
+            )
+        return vectors
+
+    def _build_trained(self, index_type: str, vectors: np.ndarray, train_size: int, **params):
+        index = build_index(index_type, self.dimension, n_vectors=len(vectors), **params)
+        if not index.is_trained:
+            sample = vectors
+            if len(vectors) > train_size:
+                rng = np.random.default_rng(0)
+                sample = vectors[rng.choice(len(vectors), train_size, replace=False)]
+            index.train(sample)
+        index.add(vectors)
+        return index
+
+    def _replace_index(self, index, vectors: np.ndarray):
+        """
+        Swaps in an index whose ids no longer line up with the files on
+        disk. Everything, raw vectors included, is first written next to
+        its target and then committed at once (see _commit).
+        """
+        self.index = index
+        self._unsaved = []
+        renames = self._write_files(".new")
+        new_embeddings = self.embeddings_path + ".new"
+        np.ascontiguousarray(vectors, dtype="float32").tofile(new_embeddings)
+        renames.append((new_embeddings, self.embeddings_path))
+        self._commit(renames)
+
+    # ---------------- APPEND LOG ----------------
+    def update_metadata(self, chunk_id: int, **fields):
+        """
+        Changes fields (e.g. "sources") of an indexed chunk. The edit is
+        logged like an add, so it survives a crash before the next
+        checkpoint.
+        """
+        if self.read_only:
+            raise RuntimeError("VectorStore was opened read-only")
+        self._write_log((LOG_UPDATE, chunk_id, fields))
+        self.metadata[chunk_id].update(fields)
+        self._pending += 1
+
+    def _append_log(self, start_id: int, embeddings: np.ndarray, records: List[Dict[str, Any]]):
+        """
+        Each log entry is a pickled (start_id, embeddings, records) tuple.
+        `start_id` is the index position of the first vector, so entries
+        that already made it into a checkpoint are skipped on replay.
+        Metadata edits are (LOG_UPDATE, chunk_id, fields) entries.
+        """
+        self._write_log((start_id, embeddings, records))
+
+    def _write_log(self, entry: tuple):
+        os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+        with open(self.log_path, "ab") as f:
+            pickle.dump(entry, f)
+
+    def _replay_log(self):
+        if not os.path.exists(self.log_path):
+            return
+
+        replayed = updated = 0
+        with open(self.log_path, "rb") as f:
+            while True:
+                try:
+                    start_id, embeddings, records = pickle.load(f)
+                except EOFError:
+                    break
+                except Exception as e:
+                    # Torn write from a crash: everything before it is intact.
+                    print(f"Warning: Stopped replaying vector log: {e}")
+                    break
+
+                if start_id == LOG_UPDATE:
+                    # Setting fields is idempotent, so edits a checkpoint
+                    # already holds are simply applied again
+                    chunk_id, fields = embeddings, records
+                    if chunk_id < len(self.metadata):
+                        self.metadata[chunk_id].update(fields)
+                        updated += 1
+                    continue
+
+                skip = self.index.ntotal - start_id
+                if skip >= len(records):
+                    continue
+                if skip < 0:
+                    print("Warning: Gap in vector log, ignoring remaining entries.")
+                    break
+
+                self._apply(embeddings[skip:], records[skip:])
+                replayed += len(records) - skip
+
+        if replayed or updated:
+            print(f"Recovered {replayed} vectors and {updated} metadata edits from {self.log_path}.")
+        self._pending = replayed + updated
+
+    def flush(self):
+        """
+        Forces appended log entries to disk without checkpointing.
+        """
+        if not os.path.exists(self.log_path):
+            return
+        with open(self.log_path, "ab") as f:
+            f.flush()
+            os.fsync(f.fileno())
+
     # ---------------- SAVE ----------------
-    def save(self):
-        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
-        faiss.write_index(self.index, self.index_path)
+    def checkpoint(self):
+        """
+        Writes the full index and metadata, then truncates the append log.
+        The files are committed together (see _commit), so a crash never
+        leaves the index and metadata at different sizes.
+        """
+        if self.read_only:
+            raise RuntimeError("VectorStore was opened read-only")
+        renames = self._write_files(".tmp")
 
-        with open(self.metadata_path, "wb") as f:
+        # Crash after this but before the commit is undone by
+        # _truncate_embeddings on the next load.
+        if not os.path.exists(self.embeddings_path):
+            self._unsaved = [self.load_embeddings()]
+        if self._unsaved:
+            with open(self.embeddings_path, "ab") as f:
+                for e in self._unsaved:
+                    f.write(np.ascontiguousarray(e, dtype="float32").tobytes())
+
+        self._commit(renames)
+        self._unsaved = []
+
+    def _write_files(self, suffix: str) -> List[tuple]:
+        """
+        Writes the index, metadata (pickle and mmap copy), entity index,
+        BM25 index and index settings to their paths plus `suffix`.
+        Returns the (written, target) pairs, in the order to rename them.
+        """
+        os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+        renames = []
+
+        def staged(path: str) -> str:
+            renames.append((path + suffix, path))
+            return path + suffix
+
+        faiss.write_index(self.index, staged(self.index_path))
+        with open(staged(self.metadata_path), "wb") as f:
             pickle.dump(self.metadata, f)
+        write_mmap_metadata(self.metadata, staged(self.metadata_jsonl_path), staged(self.metadata_offsets_path))
+        with open(staged(self.entity_index_path), "wb") as f:
+            pickle.dump((len(self.metadata), self.entity_index), f)
+        self.bm25.save(staged(self.bm25_path))
+        with open(staged(self.index_path + ".json"), "w") as f:
+            json.dump(describe_index(self.index), f, indent=2)
+        return renames
+
+    def _commit(self, renames: List[tuple]):
+        """
+        Renaming the list of staged files to <index_path>.commit is the
+        commit point: a crash before it keeps the old files, a crash after
+        it is finished by _finish_commit on the next load.
+        """
+        tmp_path = self.commit_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(renames, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.commit_path)
+        self._finish_commit()
+
+    def _finish_commit(self):
+        """
+        Moves the files of a commit into place and drops the append log.
+        Safe to run again after a crash part-way through.
+        """
+        with open(self.commit_path) as f:
+            renames = json.load(f)
+        for new_path, path in renames:
+            if os.path.exists(new_path):
+                os.replace(new_path, path)
+        # The committed files hold everything logged (and after a rewrite
+        # the logged ids are stale)
+        if os.path.exists(self.log_path):
+            os.remove(self.log_path)
+        os.remove(self.commit_path)
+        self._pending = 0
+
+    @property
+    def version(self) -> tuple:
+        """
+        Changes whenever search results may change: vectors were added or
+        the index was rewritten (checkpoint / rebuild_index).
+        """
+        try:
+            mtime = os.stat(self.index_path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = 0
+        return (self.index.ntotal, mtime)
+
+    def _truncate_embeddings(self, n_vectors: int):
+        if not os.path.exists(self.embeddings_path):
+            return
+        size = n_vectors * self.dimension * 4
+        if os.path.getsize(self.embeddings_path) > size:
+            with open(self.embeddings_path, "r+b") as f:
+                f.truncate(size)
+
+    def save(self):
+        self.checkpoint()
@@ -0,0 +1,61 @@
+import json
+import mmap
+import os
+from typing import Any, Dict, Iterator, List
+
+import numpy as np
+
+
+def write_mmap_metadata(metadata: List[Dict[str, Any]], path: str, offsets_path: str):
+    """
+    Writes metadata as JSON lines plus a uint64 array of line offsets
+    (n + 1 entries), so records can be read by position from a shared mmap.
+    """
+    offsets = np.zeros(len(metadata) + 1, dtype=np.uint64)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        for i, record in enumerate(metadata):
+            f.write(json.dumps(record, ensure_ascii=False).encode("utf-8"))
+            f.write(b"\n")
+            offsets[i + 1] = f.tell()
+
+    tmp_offsets = offsets_path + ".tmp"
+    offsets.tofile(tmp_offsets)
+    os.replace(tmp_path, path)
+    os.replace(tmp_offsets, offsets_path)
+
+
+class MmapMetadata:
+    """
+    Read-only, list-like view over metadata written by write_mmap_metadata.
+    Records are decoded on access; the file pages are shared by every
+    process that maps it.
+    """
+
+    def __init__(self, path: str, offsets_path: str):
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(path) else b""
+        self._offsets = np.memmap(offsets_path, dtype=np.uint64, mode="r")
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        start, end = int(self._offsets[i]), int(self._offsets[i + 1])
+        return json.loads(self._mm[start:end])
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def append(self, record):
+        raise RuntimeError("Metadata is memory-mapped read-only")
+
+    def extend(self, records):
+        raise RuntimeError("Metadata is memory-mapped read-only")
@@ -0,0 +1,95 @@
+import sys
+import time
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from app.vector_store.faiss_store import (
+    VectorStore, INDEX_TYPES, COMPRESSIONS, index_type_of, compression_of, describe_index
+)
+
+
+def recall_report(vs: VectorStore, k: int = 10, n_queries: int = 200, settings=None):
+    """
+    Compares the current index against exact (flat) search, using a sample
+    of stored chunk embeddings as queries. `settings` is a list of
+    (nprobe, ef_search) pairs to try.
+    """
+    vectors = vs.load_embeddings()
+    if not len(vectors):
+        print("Index is empty, nothing to compare.")
+        return []
+
+    rng = np.random.default_rng(0)
+    queries = vectors[rng.choice(len(vectors), min(n_queries, len(vectors)), replace=False)]
+
+    exact = faiss.IndexFlatL2(vs.dimension)
+    exact.add(vectors)
+
+    start = time.perf_counter()
+    _, truth = exact.search(queries, k)
+    flat_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    print(f"{'setting':<24}{'recall@' + str(k):>12}{'ms/query':>12}")
+    print(f"{'flat (exact)':<24}{1.0:>12.3f}{flat_ms:>12.3f}")
+
+    rows = []
+    for nprobe, ef_search in settings or [(None, None)]:
+        params = vs._search_params(nprobe, ef_search)
+        start = time.perf_counter()
+        _, found = vs.index.search(queries, k, params=params)
+        ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        hits = sum(len(set(t) & set(f)) for t, f in zip(truth, found))
+        recall = hits / truth.size
+
+        label = f"nprobe={nprobe}" if nprobe is not None else f"efSearch={ef_search}" if ef_search is not None else "default"
+        print(f"{label:<24}{recall:>12.3f}{ms:>12.3f}")
+        rows.append({"nprobe": nprobe, "ef_search": ef_search, "recall": recall, "ms_per_query": ms})
+
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rebuild or migrate the FAISS index from stored embeddings")
+    parser.add_argument("--type", choices=INDEX_TYPES, help="Index type to rebuild as (default: current)")
+    parser.add_argument("--compression", choices=COMPRESSIONS, help="Vector storage to migrate to (default: current)")
+    parser.add_argument("--nlist", type=int, default=None, help="IVF cells (default 4*sqrt(N))")
+    parser.add_argument("--hnsw-m", type=int, default=32, help="HNSW neighbours per node")
+    parser.add_argument("--pq-m", type=int, default=48, help="PQ sub-quantizers (must divide 384)")
+    parser.add_argument("--pq-bits", type=int, default=8, help="Bits per PQ code")
+    parser.add_argument("--report", action="store_true", help="Print a recall-vs-latency report against flat")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="*", default=[1, 4, 16, 64])
+    parser.add_argument("--ef-search", type=int, nargs="*", default=[16, 32, 64, 128])
+
+    args = parser.parse_args()
+
+    vs = VectorStore()
+
+    print(f"Current index: {describe_index(vs.index)}")
+
+    if args.type or args.compression:
+        index_type = args.type or index_type_of(vs.index)
+        compression = args.compression or compression_of(vs.index)
+        print(f"Rebuilding {vs.index.ntotal} vectors as '{index_type}' with '{compression}' storage...")
+        params = {"nlist": args.nlist, "hnsw_m": args.hnsw_m, "pq_m": args.pq_m,
+                  "pq_bits": args.pq_bits, "compression": compression}
+        vs.rebuild_index(index_type, **params)
+        print(f"Done: {describe_index(vs.index)}")
+
+    if args.report:
+        current = index_type_of(vs.index)
+        if current in ("ivf", "ivfpq"):
+            settings = [(n, None) for n in args.nprobe]
+        elif current == "hnsw":
+            settings = [(None, e) for e in args.ef_search]
+        else:
+            settings = None
+        recall_report(vs, k=args.k, settings=settings)
@@ -0,0 +1,170 @@
+import json
+import mmap
+import os
+import threading
+import zlib
+from typing import Any, Dict, Iterable, List, Optional
+
+# Raw bytes per compressed block; a range read decompresses only the
+# blocks it touches.
+BLOCK_SIZE = 64 * 1024
+
+
+class TextStore:
+    """
+    Append-only store holding each judgment's full text once on disk.
+
+    `texts.bin` holds the UTF-8 documents back to back (or as zlib blocks
+    when `compress=True`); `texts.jsonl` has one entry per document and is
+    written after the data, so a torn write at the tail is ignored on load.
+    Chunks reference text as (doc_id, byte offset, byte length), and
+    uncompressed reads are slices of a shared read-only mmap.
+
+    A `read_only` store (e.g. a server worker while the ETL appends)
+    never truncates the files and rejects `add`.
+    """
+
+    def __init__(self, directory: str = "data/texts", compress: bool = False, read_only: bool = False):
+        self.directory = directory
+        self.compress = compress
+        self.read_only = read_only
+        self.data_path = os.path.join(directory, "texts.bin")
+        self.index_path = os.path.join(directory, "texts.jsonl")
+        self.docs: List[Dict[str, Any]] = []
+
+        self._mm: Optional[mmap.mmap] = None
+        self._mm_size = 0
+        self._lock = threading.Lock()
+
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def _load(self):
+        if not os.path.exists(self.index_path):
+            return
+
+        with open(self.index_path, "rb") as f:
+            for line in f:
+                try:
+                    self.docs.append(json.loads(line))
+                except ValueError:
+                    break  # torn last line
+
+        if self.read_only:
+            return  # data past the last entry may be a document being written
+
+        # Drop data written after the last recorded document
+        end = max((self._doc_end(d) for d in self.docs), default=0)
+        if os.path.exists(self.data_path) and os.path.getsize(self.data_path) > end:
+            with open(self.data_path, "r+b") as f:
+                f.truncate(end)
+
+    def _doc_end(self, doc: Dict[str, Any]) -> int:
+        if doc.get("blocks"):
+            offset, length = doc["blocks"][-1]
+            return offset + length
+        return doc["offset"] + doc["nbytes"]
+
+    # ---------------- WRITE ----------------
+    def add(self, name: str, text: str) -> int:
+        """
+        Stores a full document and returns its doc_id.
+        """
+        return self.add_stream(name, [text.encode("utf-8")])
+
+    def add_file(self, name: str, path: str) -> int:
+        """
+        Stores the UTF-8 text file at `path`, copied in blocks.
+        """
+        with open(path, "rb") as f:
+            return self.add_stream(name, iter(lambda: f.read(BLOCK_SIZE), b""))
+
+    def add_stream(self, name: str, pieces: Iterable[bytes]) -> int:
+        """
+        Stores a document given as consecutive UTF-8 byte pieces, without
+        holding it in memory, and returns its doc_id.
+        """
+        if self.read_only:
+            raise RuntimeError("TextStore was opened read-only")
+        os.makedirs(self.directory, exist_ok=True)
+
+        with self._lock:
+            doc_id = len(self.docs)
+            with open(self.data_path, "ab") as f:
+                offset = f.tell()
+                nbytes = 0
+                blocks: List[List[int]] = []
+                pending = b""
+                for piece in pieces:
+                    nbytes += len(piece)
+                    if not self.compress:
+                        f.write(piece)
+                        continue
+                    pending += piece
+                    while len(pending) >= BLOCK_SIZE:
+                        self._write_block(f, pending[:BLOCK_SIZE], blocks)
+                        pending = pending[BLOCK_SIZE:]
+                if pending:
+                    self._write_block(f, pending, blocks)
+
+            entry = {"doc_id": doc_id, "name": name, "offset": offset, "nbytes": nbytes}
+            if self.compress:
+                entry["blocks"] = blocks
+
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+            self.docs.append(entry)
+            return doc_id
+
+    def _write_block(self, f, raw: bytes, blocks: List[List[int]]):
+        packed = zlib.compress(raw)
+        blocks.append([f.tell(), len(packed)])
+        f.write(packed)
+
+    # ---------------- READ ----------------
+    def _view(self, end: int) -> mmap.mmap:
+        if self._mm is None or end > self._mm_size:
+            with self._lock:
+                if self._mm is None or end > self._mm_size:
+                    # The old map is not closed: memoryviews from read_bytes
+                    # may still reference it, and it is unmapped once the
+                    # last of them is released
+                    with open(self.data_path, "rb") as f:
+                        self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    self._mm_size = len(self._mm)
+        return self._mm
+
+    def read_bytes(self, doc_id: int, offset: int = 0, length: Optional[int] = None):
+        """
+        Returns the byte range of a document. For uncompressed stores this
+        is a memoryview over the mmap (no copy).
+        """
+        doc = self.docs[doc_id]
+        if length is None:
+            length = doc["nbytes"] - offset
+        length = max(0, min(length, doc["nbytes"] - offset))
+        if not length:
+            return b""
+
+        if not doc.get("blocks"):
+            start = doc["offset"] + offset
+            return memoryview(self._view(start + length))[start:start + length]
+
+        first, last = offset // BLOCK_SIZE, (offset + length - 1) // BLOCK_SIZE
+        view = self._view(self._doc_end(doc))
+        raw = b"".join(
+            zlib.decompress(view[b_off:b_off + b_len])
+            for b_off, b_len in doc["blocks"][first:last + 1]
+        )
+        start = offset - first * BLOCK_SIZE
+        return raw[start:start + length]
+
+    def read(self, doc_id: int, offset: int = 0, length: Optional[int] = None) -> str:
+        return bytes(self.read_bytes(doc_id, offset, length)).decode("utf-8", errors="ignore")
+
+    def name(self, doc_id: int) -> str:
+        return self.docs[doc_id]["name"]
+
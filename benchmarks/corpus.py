@@ -0,0 +1,139 @@
+import random
+import sys
+from pathlib import Path
+from typing import Iterator, List
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+COURTS = ["Supreme Court of India", "High Court of Delhi", "High Court of Bombay",
+          "High Court of Madras", "High Court of Karnataka", "High Court of Calcutta"]
+ACTS = ["Negotiable Instruments Act, 1881", "Indian Contract Act, 1872", "Transfer of Property Act, 1882",
+        "Hindu Marriage Act, 1955", "Information Technology Act, 2000", "Companies Act, 2013",
+        "Consumer Protection Act, 2019", "Industrial Disputes Act, 1947", "Specific Relief Act, 1963"]
+IPC_SECTIONS = ["302", "304B", "406", "415", "420", "467", "468", "471", "498A", "506", "120B"]
+ARTICLES = ["14", "19", "21", "32", "136", "226", "227", "300A"]
+
+# Vocabulary the classifier scores on, so synthetic text exercises every category
+FACT_PHRASES = [
+    "the accused dishonestly induced the complainant to deliver property",
+    "the cheque issued towards repayment of the loan was dishonoured",
+    "the agreement for sale was executed but the balance payment was never made",
+    "the husband and wife lived separately and maintenance was claimed",
+    "the plot was encroached upon and possession was disputed",
+    "an otp was obtained through a phishing call and the account was hacked",
+    "the director transferred shares without approval of the board",
+    "the product was defective and the refund under warranty was refused",
+    "the workman was terminated without payment of salary and gratuity",
+    "the complainant alleged criminal breach of trust and misappropriation",
+    "the sale deed was registered after the registry office verified ownership",
+    "the employer denied the bonus and the pf contribution to the employee",
+]
+FILLER = ("the learned counsel submitted that the impugned order suffers from errors apparent on the face "
+          "of the record and that the findings of the courts below are perverse and contrary to the "
+          "evidence on record which deserves to be set aside").split()
+
+
+def _citation(rng: random.Random) -> str:
+    kind = rng.random()
+    if kind < 0.45:
+        return f"Section {rng.choice(IPC_SECTIONS)} of the IPC"
+    if kind < 0.75:
+        return f"Article {rng.choice(ARTICLES)} of the Constitution"
+    return f"the {rng.choice(ACTS)}"
+
+
+def _sentence(rng: random.Random) -> str:
+    roll = rng.random()
+    if roll < 0.35:
+        body = rng.choice(FACT_PHRASES)
+    else:
+        start = rng.randrange(len(FILLER) - 12)
+        body = " ".join(FILLER[start:start + rng.randint(8, 12)])
+    if rng.random() < 0.3:
+        # After a comma, so the Act pattern starts at the Act's name
+        body += f", under {_citation(rng)}"
+    return body[0].upper() + body[1:] + ". "
+
+
+def judgment_pages(seed: int, pages: int = 5, chars_per_page: int = 3000) -> List[str]:
+    """
+    Text of one synthetic judgment, page by page. Deterministic for a seed.
+    """
+    rng = random.Random(seed)
+    appellant, respondent = f"Appellant {seed}", f"Respondent {seed}"
+    header = (f"IN THE {rng.choice(COURTS).upper()}\n"
+              f"Civil Appeal No. {rng.randint(100, 9999)} of {rng.randint(1990, 2024)}\n"
+              f"{appellant} v. {respondent}\n\nJUDGMENT\n\n")
+
+    out = []
+    for page_no in range(pages):
+        text = header if page_no == 0 else ""
+        while len(text) < chars_per_page:
+            text += _sentence(rng)
+        out.append(text[:chars_per_page] + "\n")
+    return out
+
+
+def case_description(seed: int, sentences: int = 6) -> str:
+    """
+    A short user-submitted style case description.
+    """
+    rng = random.Random(seed)
+    return "".join(_sentence(rng) for _ in range(sentences)).strip()
+
+
+def iter_judgments(n_docs: int, pages: int = 5, chars_per_page: int = 3000, seed: int = 0) -> Iterator[str]:
+    for i in range(n_docs):
+        yield "".join(judgment_pages(seed + i, pages, chars_per_page))
+
+
+def write_pdfs(
+    out_dir: str,
+    n_docs: int,
+    pages: int = 5,
+    chars_per_page: int = 3000,
+    seed: int = 0
+) -> List[Path]:
+    """
+    Writes `n_docs` synthetic judgment PDFs (one text page per generated
+    page) and returns their paths.
+    """
+    import fitz  # PyMuPDF
+
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(n_docs):
+        path = out / f"judgment_{seed + i:06d}.pdf"
+        doc = fitz.open()
+        for text in judgment_pages(seed + i, pages, chars_per_page):
+            page = doc.new_page()
+            page.insert_textbox(page.rect + (36, 36, -36, -36), text, fontsize=7)
+        doc.save(str(path))
+        doc.close()
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate a synthetic judgment corpus")
+    parser.add_argument("--out", required=True, help="Directory to write PDFs (or .txt with --text)")
+    parser.add_argument("--docs", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=5, help="Pages per judgment")
+    parser.add_argument("--chars-per-page", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--text", action="store_true", help="Write plain text files instead of PDFs")
+
+    args = parser.parse_args()
+
+    if args.text:
+        out = Path(args.out)
+        out.mkdir(parents=True, exist_ok=True)
+        for i, text in enumerate(iter_judgments(args.docs, args.pages, args.chars_per_page, args.seed)):
+            (out / f"judgment_{args.seed + i:06d}.txt").write_text(text, encoding="utf-8")
+    else:
+        write_pdfs(args.out, args.docs, args.pages, args.chars_per_page, args.seed)
+    print(f"Wrote {args.docs} judgments to {args.out}")
@@ -0,0 +1,290 @@
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.corpus import case_description, iter_judgments, write_pdfs
+
+SUITES = ("text", "etl", "search", "analyze")
+
+# name -> {"value": ..., "unit": ..., "better": "higher" | "lower"}
+Results = Dict[str, Dict[str, Any]]
+
+
+def _record(results: Results, name: str, value: float, unit: str, better: str):
+    results[name] = {"value": round(value, 4), "unit": unit, "better": better}
+    print(f"  {name:<44}{value:>14.3f} {unit}")
+
+
+def _percentiles(results: Results, prefix: str, samples_ms: List[float]):
+    ordered = sorted(samples_ms)
+    for p in (50, 95, 99):
+        idx = min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))
+        _record(results, f"{prefix}.p{p}_ms", ordered[idx], "ms", "lower")
+
+
+@contextmanager
+def _workspace(path: str = None):
+    """
+    Runs in a scratch directory: the app's relative data/ and SQLite paths
+    then point there instead of at the real corpus.
+    """
+    root = path or tempfile.mkdtemp(prefix="legalai-bench-")
+    os.makedirs(root, exist_ok=True)
+    cwd = os.getcwd()
+    os.chdir(root)
+    try:
+        yield root
+    finally:
+        os.chdir(cwd)
+        if path is None:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+# ---------------- SUITES ----------------
+def _best_seconds(fn, items, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_text(results: Results, n_docs: int, pages: int, chars_per_page: int, repeat: int = 5):
+    """
+    CaseClassifier.classify and extract_legal_entities over whole judgments
+    (best of `repeat` passes).
+    """
+    from app.agents.classifier import CaseClassifier
+    from app.etl.transformer import extract_legal_entities
+
+    texts = list(iter_judgments(n_docs, pages, chars_per_page, seed=10_000))
+    mb = sum(len(t) for t in texts) / 1e6
+
+    classifier = CaseClassifier()
+    seconds = _best_seconds(classifier.classify, texts, repeat)
+    _record(results, "text.classify.docs_per_s", len(texts) / seconds, "docs/s", "higher")
+    _record(results, "text.classify.mb_per_s", mb / seconds, "MB/s", "higher")
+
+    seconds = _best_seconds(extract_legal_entities, texts, repeat)
+    _record(results, "text.entities.docs_per_s", len(texts) / seconds, "docs/s", "higher")
+    _record(results, "text.entities.mb_per_s", mb / seconds, "MB/s", "higher")
+
+
+def bench_etl(results: Results, n_docs: int, pages: int, chars_per_page: int, extract_workers: int):
+    """
+    run_etl_pipeline over freshly generated PDFs (the store under ./data
+    is then reused by the analyze suite).
+    """
+    from app.etl.pipeline import run_etl_pipeline
+
+    write_pdfs("corpus", n_docs, pages, chars_per_page)
+    stats = run_etl_pipeline("corpus", extract_workers=extract_workers)
+    if stats is None:
+        print("  etl: nothing to index (reused --workdir?), skipped")
+        return
+
+    _record(results, "etl.pages_per_s", stats["pages"] / stats["wall_s"], "pages/s", "higher")
+    _record(results, "etl.chunks_per_s", stats["chunks"] / stats["wall_s"], "chunks/s", "higher")
+    _record(results, "etl.docs_per_s", stats["docs"] / stats["wall_s"], "docs/s", "higher")
+
+
+def bench_search(
+    results: Results,
+    sizes: List[int],
+    n_queries: int,
+    k: int,
+    index_type: str,
+    compression: str
+):
+    """
+    VectorStore.search latency over synthetic clustered vectors. "cold"
+    includes encoding the query, "warm" hits the query cache so it is the
+    index search plus result assembly. Compressed indexes are re-ranked to
+    settings.VECTOR_RERANK candidates from the raw vectors on disk, as in
+    production.
+    """
+    import numpy as np
+    from app.core.config import settings
+    from app.vector_store.faiss_store import VectorStore, build_index, compression_of
+
+    vs = VectorStore(
+        index_path="search/index.bin", metadata_path="search/metadata.pkl",
+        log_path="search/vectors.log", embeddings_path="search/embeddings.f32",
+        entity_index_path="search/entities.pkl", bm25_path="search/bm25.pkl",
+        text_store_dir="search/texts"
+    )
+    queries = [case_description(20_000 + i) for i in range(n_queries)]
+    record = {"source": "synthetic.pdf", "text": "synthetic chunk"}
+
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((256, vs.dimension)).astype("float32")
+
+    def block(n):
+        x = centers[rng.integers(0, len(centers), n)] + 0.3 * rng.standard_normal((n, vs.dimension), dtype="float32")
+        return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+    for size in sizes:
+        index = build_index(index_type, vs.dimension, n_vectors=size, compression=compression)
+        if not index.is_trained:
+            index.train(block(min(size, 100_000)))
+        # Raw vectors go where the re-rank reads them from
+        os.makedirs(os.path.dirname(vs.embeddings_path), exist_ok=True)
+        with open(vs.embeddings_path, "wb") as f:
+            for start in range(0, size, 100_000):
+                x = block(min(100_000, size - start))
+                index.add(x)
+                f.write(x.tobytes())
+
+        vs.index = index
+        vs.metadata = [record] * size
+
+        prefix = f"search.{index_type}.{compression}.{size}"
+        if compression_of(index) != "none":
+            print(f"  {prefix}: re-ranking {settings.VECTOR_RERANK} candidates")
+        vs.query_cache.clear()
+        cold, warm = [], []
+        for q in queries:
+            start = time.perf_counter()
+            vs.search(q, k=k)
+            cold.append((time.perf_counter() - start) * 1000)
+        for q in queries:
+            start = time.perf_counter()
+            vs.search(q, k=k)
+            warm.append((time.perf_counter() - start) * 1000)
+
+        _percentiles(results, prefix + ".cold", cold)
+        _percentiles(results, prefix + ".warm", warm)
+        del index, vs.index
+
+
+def bench_analyze(results: Results, n_requests: int):
+    """
+    POST /api/analyze through the Flask test client, text-only cases,
+    against whatever store is under ./data (the etl suite's, if it ran).
+    """
+    import main
+    from app.core.database import engine
+
+    engine.echo = False  # SQL logging would dominate the timings
+
+    client = main.app.test_client()
+    creds = {"email": "bench@example.com", "password": "bench-password"}
+    client.post("/auth/signup", json={**creds, "full_name": "Benchmark"})
+    token = client.post("/auth/login", json=creds).get_json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def analyze(description: str) -> float:
+        start = time.perf_counter()
+        res = client.post("/api/analyze", data={"description": description}, headers=headers)
+        elapsed = (time.perf_counter() - start) * 1000
+        if res.status_code != 200:
+            raise RuntimeError(f"/api/analyze returned {res.status_code}: {res.get_data(as_text=True)[:200]}")
+        return elapsed
+
+    analyze(case_description(29_999))  # loads the models
+
+    descriptions = [case_description(30_000 + i) for i in range(n_requests)]
+    start = time.perf_counter()
+    latencies = [analyze(d) for d in descriptions]
+    _record(results, "analyze.requests_per_s", n_requests / (time.perf_counter() - start), "req/s", "higher")
+    _percentiles(results, "analyze", latencies)
+
+    # Same submissions again: served from the analysis cache
+    _percentiles(results, "analyze.repeat", [analyze(d) for d in descriptions])
+
+
+# ---------------- BASELINE ----------------
+def compare(results: Results, baseline: Results, threshold: float) -> List[str]:
+    """
+    Returns the metrics that got worse than `baseline` by more than
+    `threshold` (relative, e.g. 0.1 = 10%).
+    """
+    regressions = []
+    print(f"\n{'metric':<44}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base or not base["value"]:
+            continue
+        change = (current["value"] - base["value"]) / base["value"]
+        worse = -change if current["better"] == "higher" else change
+        flag = "  REGRESSION" if worse > threshold else ""
+        print(f"{name:<44}{base['value']:>12.3f}{current['value']:>12.3f}{change:>+10.1%}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark ETL, search, classification and /api/analyze")
+    parser.add_argument("--suites", nargs="*", choices=SUITES, default=list(SUITES))
+    parser.add_argument("--docs", type=int, default=50, help="Synthetic judgments for the etl/text suites")
+    parser.add_argument("--pages", type=int, default=5, help="Pages per judgment")
+    parser.add_argument("--chars-per-page", type=int, default=3000)
+    parser.add_argument("--extract-workers", type=int, default=None)
+    parser.add_argument("--sizes", type=int, nargs="*", default=[10_000, 100_000, 1_000_000],
+                        help="Index sizes for the search suite")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--index-type", default="flat")
+    parser.add_argument("--compression", default="none")
+    parser.add_argument("--requests", type=int, default=100, help="/api/analyze calls")
+    parser.add_argument("--workdir", default=None, help="Scratch directory (default: a temp dir, removed after)")
+    parser.add_argument("--out", default="benchmark_results.json")
+    parser.add_argument("--baseline", default=None, help="Earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed relative slowdown")
+
+    args = parser.parse_args()
+    out_path = os.path.abspath(args.out)
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+
+    results: Results = {}
+    with _workspace(args.workdir):
+        if "text" in args.suites:
+            print("== text")
+            bench_text(results, args.docs, args.pages, args.chars_per_page)
+        if "etl" in args.suites:
+            print("== etl")
+            bench_etl(results, args.docs, args.pages, args.chars_per_page, args.extract_workers)
+        if "search" in args.suites:
+            print("== search")
+            bench_search(results, args.sizes, args.queries, args.k, args.index_type, args.compression)
+        if "analyze" in args.suites:
+            print("== analyze")
+            bench_analyze(results, args.requests)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": vars(args)
+        },
+        "results": results
+    }
+    with open(out_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {out_path}")
+
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}.")
+            sys.exit(1)
+        print("\nNo regressions.")
@@ -0,0 +1,95 @@
+import multiprocessing as mp
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+
+def _memory_mb(pid: int) -> Dict[str, float]:
+    """
+    Rss counts shared pages in full for every process; Pss splits them
+    between the processes mapping them, so summing Pss gives real usage.
+    """
+    out = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, value = line.split(":", 1)
+            if key in ("Rss", "Pss"):
+                out[key] = int(value.split()[0]) / 1024
+    return out
+
+
+def _worker(index_path: str, mmap: bool, ready, done):
+    import faiss
+    import numpy as np
+    from app.vector_store.faiss_store import MMAP_FLAGS
+
+    index = faiss.read_index(index_path, MMAP_FLAGS) if mmap else faiss.read_index(index_path)
+    if hasattr(index, "nprobe"):
+        index.nprobe = index.nlist  # scan every list, so every vector is paged in
+    index.search(np.zeros((1, index.d), dtype="float32"), 5)
+    ready.put(os.getpid())
+    done.wait()
+
+
+def measure(index_path: str, workers: int, mmap: bool) -> Dict[str, float]:
+    ctx = mp.get_context("spawn")
+    ready, done = ctx.Queue(), ctx.Event()
+    procs = [ctx.Process(target=_worker, args=(index_path, mmap, ready, done)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    try:
+        usage = [_memory_mb(ready.get()) for _ in procs]
+    finally:
+        done.set()
+        for p in procs:
+            p.join()
+    return {
+        "rss_per_worker_mb": sum(u["Rss"] for u in usage) / workers,
+        "pss_total_mb": sum(u["Pss"] for u in usage)
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import faiss
+    import numpy as np
+    from app.vector_store.faiss_store import build_index
+
+    parser = argparse.ArgumentParser(
+        description="Memory of N processes serving one index, read into memory vs memory-mapped (Linux)"
+    )
+    parser.add_argument("--vectors", type=int, default=200_000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--index-type", default="flat")
+    parser.add_argument("--compression", default="none")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="legalai-mem-")
+    try:
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((args.vectors, args.dimension), dtype="float32")
+        index = build_index(args.index_type, args.dimension, args.vectors, compression=args.compression)
+        if not index.is_trained:
+            index.train(vectors[:min(len(vectors), 50_000)])
+        index.add(vectors)
+        index_path = os.path.join(workdir, "index.bin")
+        faiss.write_index(index, index_path)
+        del vectors, index
+
+        size_mb = os.path.getsize(index_path) / 2**20
+        print(f"{args.index_type}/{args.compression}: {args.vectors} vectors, {size_mb:.0f} MB on disk, "
+              f"{args.workers} workers")
+        for label, mmap in (("in-memory", False), ("mmap", True)):
+            m = measure(index_path, args.workers, mmap)
+            print(f"  {label:<10} RSS/worker {m['rss_per_worker_mb']:7.0f} MB   "
+                  f"PSS total {m['pss_total_mb']:7.0f} MB")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
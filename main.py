@@ -1,22 +1,51 @@
-from flask import Flask, render_template
+import gc
+import os
+
+from flask import Flask, render_template, jsonify
 from flask_cors import CORS
-from models.ipc_matcher import IPCMatcher
+from sqlalchemy import inspect, text
 
+from app.core.config import settings
 from app.core.database import Base, engine
+from app.core.registry import registry
+from app.models.case import CaseRecord
 from app.auth.router import auth_bp
-from app.api.analysis import analysis_bp
+from app.api.analysis import analysis_bp, job_queue
 from app.api.history import history_bp
+from app.api.metrics import metrics_bp
 
 app = Flask(__name__, template_folder="templates", static_folder="static")
 CORS(app)
 
 # Create DB tables
 Base.metadata.create_all(bind=engine)
+# create_all skips indexes added to tables that already exist
+for index in CaseRecord.__table__.indexes:
+    index.create(bind=engine, checkfirst=True)
+# ... and columns added to existing tables
+if "owner" not in {c["name"] for c in inspect(engine).get_columns("analysis_jobs")}:
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE analysis_jobs ADD COLUMN owner VARCHAR"))
+# Runs in every worker; only jobs whose owning process is gone are failed
+job_queue.recover()
+
+if settings.PRELOAD_MODELS:
+    # Load before the server forks workers; freezing keeps the GC from
+    # touching (and so copying) the preloaded objects in each child.
+    registry.warmup(settings.WARMUP_MODELS)
+    gc.freeze()
 
 # Blueprints
 app.register_blueprint(auth_bp, url_prefix="/auth")
 app.register_blueprint(analysis_bp, url_prefix="/api")
 app.register_blueprint(history_bp, url_prefix="/api/history")
+app.register_blueprint(metrics_bp)
+
+@app.before_request
+def start_warmup():
+    # First request in each serving process (gunicorn workers included,
+    # where nothing else loads the models before /ready is probed)
+    registry.warmup_async(settings.WARMUP_MODELS)
 
 @app.route("/")
 def home():
@@ -34,5 +63,15 @@ def signup():
 def dashboard():
     return render_template("dashboard.html")
 
+@app.route("/ready")
+def ready():
+    status = registry.status()
+    is_ready = all(status[name]["state"] == "ready" for name in settings.WARMUP_MODELS)
+    return jsonify({"ready": is_ready, "models": status}), 200 if is_ready else 503
+
 if __name__ == "__main__":
+    # Load models in the background; /ready reports progress meanwhile.
+    # With the debug reloader only the child (WERKZEUG_RUN_MAIN) serves.
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        registry.warmup_async(settings.WARMUP_MODELS)
     app.run(debug=True, port=8000)
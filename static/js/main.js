@@ -7,6 +7,13 @@ document.addEventListener("DOMContentLoaded", () => {
         return;
     }
 
+    // ---------------- HELPERS ----------------
+    function escapeHtml(value) {
+        const div = document.createElement("div");
+        div.textContent = value ?? "";
+        return div.innerHTML;
+    }
+
     // ---------------- TAB SWITCHING ----------------
     const navLinks = document.querySelectorAll(".nav-link");
     const views = document.querySelectorAll(".dashboard-view");
@@ -123,11 +130,17 @@ document.addEventListener("DOMContentLoaded", () => {
     }
 
     // ---------------- HISTORY ----------------
-    async function loadHistory() {
+    // Pages are fetched with the cursor returned by the previous page
+    let historyCursor = null;
+
+    async function loadHistory(more = false) {
         const list = document.getElementById("historyList");
 
+        if (!more) historyCursor = null;
+
         try {
-            const res = await fetch("/api/history/", {
+            const url = "/api/history/" + (historyCursor ? "?cursor=" + encodeURIComponent(historyCursor) : "");
+            const res = await fetch(url, {
                 headers: {
                     "Authorization": "Bearer " + token
                 }
@@ -135,25 +148,35 @@ document.addEventListener("DOMContentLoaded", () => {
 
             const data = await res.json();
 
-            if (!data.length) {
+            if (!more && !data.items.length) {
                 list.innerHTML = "No history found";
                 return;
             }
 
-            list.innerHTML = data.map(c => `
+            const html = data.items.map(c => `
                 <div class="glass-panel" style="padding:1rem;">
                     <div style="color:#3b82f6;font-weight:600;">
-                        ${c.case_type}
+                        ${escapeHtml(c.case_type)}
                     </div>
                     <div style="font-size:0.8rem;color:#94a3b8;">
                         ${new Date(c.created_at).toLocaleDateString()}
                     </div>
                     <div style="margin-top:6px;">
-                        ${c.description}
+                        ${escapeHtml(c.description)}
                     </div>
                 </div>
             `).join("");
 
+            document.getElementById("historyMore")?.remove();
+            list.innerHTML = (more ? list.innerHTML : "") + html;
+
+            historyCursor = data.next_cursor;
+            if (historyCursor) {
+                list.insertAdjacentHTML("beforeend",
+                    `<button id="historyMore" class="btn-primary" style="margin-top:1rem;">Load more</button>`);
+                document.getElementById("historyMore").addEventListener("click", () => loadHistory(true));
+            }
+
         } catch (e) {
             list.innerHTML = "Failed to load history";
         }
@@ -0,0 +1,138 @@
+import sys
+import zlib
+from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+
+class HashEncoder:
+    """
+    Stands in for the SentenceTransformer: a fixed pseudo-random unit
+    vector per text, so stores can be built without the model.
+    """
+
+    dimension = 384
+
+    def __init__(self):
+        self.encoded = 0
+
+    def encode(self, texts, **kwargs):
+        self.encoded += len(texts)
+        vectors = np.stack([
+            np.random.default_rng(zlib.crc32(t.encode("utf-8"))).standard_normal(self.dimension)
+            for t in texts
+        ]).astype("float32")
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def encoder(monkeypatch):
+    """
+    The HashEncoder every VectorStore opened by the test uses.
+    """
+    from app.vector_store import faiss_store
+
+    shared = HashEncoder()
+    monkeypatch.setattr(faiss_store, "load_encoder", lambda model_name: shared)
+    return shared
+
+
+@pytest.fixture
+def make_store(tmp_path, encoder):
+    """
+    Returns a factory opening a VectorStore under tmp_path; calling it
+    again reopens the same files, as a restart would.
+    """
+    from app.vector_store import faiss_store
+
+    def make(**kwargs):
+        kwargs.setdefault("checkpoint_every", 10**9)
+        return faiss_store.VectorStore(
+            index_path=str(tmp_path / "index.bin"),
+            metadata_path=str(tmp_path / "metadata.pkl"),
+            log_path=str(tmp_path / "vectors.log"),
+            embeddings_path=str(tmp_path / "embeddings.f32"),
+            entity_index_path=str(tmp_path / "entities.pkl"),
+            bm25_path=str(tmp_path / "bm25.pkl"),
+            text_store_dir=str(tmp_path / "texts"),
+            **kwargs
+        )
+
+    return make
+
+
+def chunks(n: int, start: int = 0, source: str = "a.pdf"):
+    """
+    `n` distinct chunk texts and their metadata, numbered from `start`.
+    """
+    texts = [f"chunk {i}: the accused was charged under section {300 + i % 7} IPC" for i in range(start, start + n)]
+    metadatas = [{"source": source, "ipc_sections": [str(300 + i % 7)]} for i in range(start, start + n)]
+    return texts, metadatas
+
+
+@pytest.fixture
+def db(tmp_path):
+    """
+    Points SessionLocal at a fresh SQLite database for the test.
+    """
+    from sqlalchemy import create_engine
+
+    from app.core.database import Base, SessionLocal, engine
+    from app.models import case, job, user  # noqa: F401  (registers the tables)
+
+    test_engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(bind=test_engine)
+    SessionLocal.configure(bind=test_engine)
+    yield SessionLocal
+    SessionLocal.configure(bind=engine)
+    test_engine.dispose()
+
+
+@pytest.fixture
+def api(db, make_store, monkeypatch, tmp_path):
+    """
+    A test client for the analysis endpoints, backed by a fresh registry
+    (real classifier, RAG agent over a HashEncoder store) and database,
+    plus the Authorization header of a stored user.
+    """
+    from types import SimpleNamespace
+
+    from flask import Flask
+
+    from app.agents.classifier import CaseClassifier
+    from app.agents.rag import LegalReasoningAgent
+    from app.api import analysis
+    from app.api.deps import principal_cache
+    from app.core.registry import ModelRegistry
+    from app.core.security import create_access_token
+    from app.models.user import User
+
+    monkeypatch.chdir(tmp_path)  # uploads and caches go under ./data
+
+    store = make_store()
+    store.add_texts(*chunks(50))
+    store.checkpoint()
+    registry = ModelRegistry()
+    registry.register("classifier", CaseClassifier)
+    registry.register("vector_store", lambda: store)
+    registry.register("rag_agent", lambda: LegalReasoningAgent(store))
+    monkeypatch.setattr(analysis, "registry", registry)
+    analysis.analysis_cache.clear()
+    principal_cache.clear()
+
+    session = db()
+    user = User(email="lawyer@example.com", password_hash="x")
+    session.add(user)
+    session.commit()
+    token = create_access_token({"sub": user.email, "uid": user.id}, timedelta(minutes=30))
+    session.close()
+
+    app = Flask(__name__)
+    app.register_blueprint(analysis.analysis_bp, url_prefix="/api")
+    yield SimpleNamespace(client=app.test_client(), headers={"Authorization": f"Bearer {token}"}, store=store)
+    analysis.analysis_cache.clear()
@@ -0,0 +1,112 @@
+from datetime import timedelta
+
+import pytest
+from flask import Flask, jsonify
+
+from app.api import deps
+from app.api.deps import principal_cache, token_required
+from app.core.security import create_access_token
+from app.models.user import User
+
+
+@pytest.fixture
+def client(db):
+    principal_cache.clear()
+    app = Flask(__name__)
+
+    @app.route("/me")
+    @token_required
+    def me(current_user: User):
+        return jsonify({"id": current_user.id, "email": current_user.email, "role": current_user.role})
+
+    yield app.test_client()
+    principal_cache.clear()
+
+
+@pytest.fixture
+def user(db):
+    session = db()
+    row = User(email="a@example.com", full_name="A", password_hash="x", role="user")
+    session.add(row)
+    session.commit()
+    user_id = row.id
+    session.close()
+    return user_id
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    """
+    Counts the sessions token_required opens.
+    """
+    opened = []
+    session_local = deps.SessionLocal
+
+    def counted():
+        opened.append(1)
+        return session_local()
+
+    monkeypatch.setattr(deps, "SessionLocal", counted)
+    return opened
+
+
+def _get(client, email="a@example.com", uid=None, minutes=30):
+    claims = {"sub": email} if uid is None else {"sub": email, "uid": uid}
+    token = create_access_token(claims, timedelta(minutes=minutes))
+    return client.get("/me", headers={"Authorization": f"Bearer {token}"})
+
+
+def _edit(db, user_id, **fields):
+    session = db()
+    row = session.get(User, user_id)
+    for key, value in fields.items():
+        setattr(row, key, value)
+    session.commit()
+    session.close()
+
+
+def test_principal_is_cached(client, user, lookups):
+    for _ in range(3):
+        assert _get(client, uid=user).get_json()["id"] == user
+    assert len(lookups) == 1
+    # Tokens without "uid" look the user up by email
+    principal_cache.clear()
+    assert _get(client).get_json()["id"] == user
+    assert len(lookups) == 2
+
+
+def test_updated_user_is_reloaded(client, db, user, lookups):
+    assert _get(client, uid=user).get_json()["role"] == "user"
+    _edit(db, user, role="admin")
+    assert _get(client, uid=user).get_json()["role"] == "admin"
+    assert len(lookups) == 2
+
+
+def test_old_email_is_rejected_after_a_change(client, db, user):
+    assert _get(client, uid=user).status_code == 200
+    assert _get(client).status_code == 200
+    _edit(db, user, email="b@example.com")
+
+    assert _get(client, uid=user).status_code == 401
+    assert _get(client).status_code == 401
+    assert _get(client, email="b@example.com", uid=user).get_json()["email"] == "b@example.com"
+
+
+def test_deleted_user_is_rejected(client, db, user):
+    assert _get(client, uid=user).status_code == 200
+    session = db()
+    session.delete(session.get(User, user))
+    session.commit()
+    session.close()
+
+    response = _get(client, uid=user)
+    assert response.status_code == 401
+    assert response.get_json()["detail"] == "User not found"
+
+
+def test_bad_tokens_are_rejected(client, user):
+    assert client.get("/me").status_code == 401
+    assert client.get("/me", headers={"Authorization": "Bearer not-a-token"}).status_code == 401
+    expired = _get(client, uid=user, minutes=-1)
+    assert (expired.status_code, expired.get_json()["detail"]) == (401, "Token expired")
+    assert _get(client, email="nobody@example.com").status_code == 401
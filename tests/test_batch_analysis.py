@@ -0,0 +1,60 @@
+import json
+
+from app.api import analysis
+from app.models.case import CaseRecord
+
+CASES = [
+    {"description": "The accused cheated the complainant and misappropriated the money"},
+    {"description": "   "},
+    {"description": "Husband refused maintenance to the wife after the divorce"},
+    "not an object",
+    {"description": "Section 420 IPC"}
+]
+
+
+def _lines(response):
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def _check(lines):
+    assert [line["index"] for line in lines] == list(range(len(CASES)))
+    assert lines[1] == {"index": 1, "error": "Description is required"}
+    assert lines[3] == {"index": 3, "error": "Description is required"}
+    assert lines[0]["classification"]["primary"] == "Criminal"
+    assert lines[2]["classification"]["primary"] == "Family"
+    for i in (0, 2, 4):
+        assert len(lines[i]["analysis"]["similar_precedents"]) == 3
+
+
+def test_dict_list_and_ndjson_bodies(api, db, monkeypatch):
+    monkeypatch.setattr(analysis.settings, "ANALYSIS_BATCH_SIZE", 2)
+    post = api.client.post
+
+    by_dict = _lines(post("/api/analyze/batch", headers=api.headers, json={"cases": CASES}))
+    by_list = _lines(post("/api/analyze/batch", headers=api.headers, json=CASES))
+    ndjson = "\n".join(json.dumps(case) for case in CASES[:3]) + "\n\n{broken\n" + json.dumps(CASES[4]) + "\n"
+    by_ndjson = _lines(post("/api/analyze/batch", headers=api.headers, data=ndjson,
+                            content_type="application/x-ndjson"))
+
+    for lines in (by_dict, by_list, by_ndjson):
+        _check(lines)
+        assert [line.get("classification") for line in lines] == [line.get("classification") for line in by_dict]
+    session = db()
+    assert session.query(CaseRecord).count() == 9
+    assert session.query(CaseRecord).filter(CaseRecord.case_type == "Family").count() == 3
+    session.close()
+
+
+def test_bad_bodies_are_rejected(api):
+    post = api.client.post
+    for kwargs in ({"json": {"cases": "all of them"}}, {"json": {"description": "one case"}},
+                   {"data": "not json", "content_type": "application/json"}, {}):
+        response = post("/api/analyze/batch", headers=api.headers, **kwargs)
+        assert response.status_code == 400
+    assert post("/api/analyze/batch", json=CASES).status_code == 401
+
+
+def test_empty_batch(api):
+    assert _lines(api.client.post("/api/analyze/batch", headers=api.headers, json=[])) == []
@@ -0,0 +1,112 @@
+import threading
+import time
+
+import numpy as np
+
+from app.core import batching
+from app.core.batching import BatchingEncoder
+
+
+def _vectors(texts):
+    return np.array([[float(t), float(t) * 2] for t in texts])
+
+
+class GatedEncode:
+    """
+    encode_fn recording batch sizes; the first call blocks until `release`.
+    """
+
+    def __init__(self):
+        self.sizes = []
+        self.release = threading.Event()
+
+    def __call__(self, texts):
+        self.sizes.append(len(texts))
+        if len(self.sizes) == 1:
+            assert self.release.wait(10)
+        if "fail" in texts:
+            raise ValueError("bad batch")
+        return _vectors(texts)
+
+
+def _encode_all(encoder, requests):
+    results = [None] * len(requests)
+
+    def call(i):
+        try:
+            results[i] = encoder.encode(requests[i])
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(requests))]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def _wait_for(condition):
+    deadline = time.monotonic() + 10
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_queued_requests_flush_at_max_batch_size_then_on_timeout():
+    encode = GatedEncode()
+    encoder = BatchingEncoder(encode, max_batch_size=4, max_wait_ms=50)
+
+    first, first_result = _encode_all(encoder, [["0"]])
+    _wait_for(lambda: encode.sizes == [1])
+    # Queue up while the encoder is busy: 3 + 1 + 1 + 2 texts
+    requests = [["1", "2", "3"], ["4"], ["5"], ["6", "7"]]
+    threads, results = [], []
+    for request in requests:
+        t, r = _encode_all(encoder, [request])
+        threads += t
+        results.append(r)
+        _wait_for(lambda: encoder._queue.qsize() == len(threads))
+    encode.release.set()
+    for thread in first + threads:
+        thread.join(10)
+
+    # 3+1 fills a batch, then 1+2 flushes when max_wait_ms runs out
+    assert encode.sizes == [1, 4, 3]
+    np.testing.assert_array_equal(first_result[0], _vectors(["0"]))
+    for request, result in zip(requests, results):
+        np.testing.assert_array_equal(result[0], _vectors(request))
+    assert encoder.stats()["batches"] == 3
+    assert encoder.stats()["max_batch_size"] == 4
+    assert encoder.stats()["max_queue_depth"] == 4
+
+
+def test_lone_request_is_not_delayed():
+    encoder = BatchingEncoder(_vectors, max_batch_size=32, max_wait_ms=5000)
+    start = time.monotonic()
+    np.testing.assert_array_equal(encoder.encode(["1", "2"]), _vectors(["1", "2"]))
+    assert time.monotonic() - start < 1
+
+
+def test_errors_reach_every_caller_in_the_batch():
+    encode = GatedEncode()
+    encoder = BatchingEncoder(encode, max_batch_size=8, max_wait_ms=50)
+    first, _ = _encode_all(encoder, [["0"]])
+    _wait_for(lambda: encode.sizes == [1])
+    threads, results = _encode_all(encoder, [["1"], ["fail"]])
+    _wait_for(lambda: encoder._queue.qsize() == 2)
+    encode.release.set()
+    for thread in first + threads:
+        thread.join(10)
+
+    assert all(isinstance(r, ValueError) for r in results)
+    # The loop keeps serving after a failed batch
+    np.testing.assert_array_equal(encoder.encode(["9"]), _vectors(["9"]))
+
+
+def test_reset_after_fork_starts_a_new_thread():
+    encoder = BatchingEncoder(_vectors)
+    encoder.encode(["1"])
+    thread = encoder._thread
+    batching._reset_after_fork()
+    assert encoder._thread is None
+    np.testing.assert_array_equal(encoder.encode(["2"]), _vectors(["2"]))
+    assert encoder._thread is not thread
@@ -0,0 +1,54 @@
+import pytest
+
+from benchmarks.corpus import case_description, iter_judgments, judgment_pages
+from benchmarks.run_benchmarks import _percentiles, _record, bench_search, bench_text, compare
+
+
+def test_corpus_is_deterministic():
+    assert judgment_pages(3, pages=2, chars_per_page=500) == judgment_pages(3, pages=2, chars_per_page=500)
+    assert judgment_pages(3) != judgment_pages(4)
+    assert [len(p) for p in judgment_pages(3, pages=4, chars_per_page=500)] == [501] * 4
+    assert case_description(7) == case_description(7)
+    assert list(iter_judgments(2, pages=1, chars_per_page=100, seed=5))[1] == "".join(judgment_pages(6, 1, 100))
+
+
+def test_percentiles():
+    results = {}
+    _percentiles(results, "x", [float(v) for v in range(100, 0, -1)])
+    assert {name: r["value"] for name, r in results.items()} == {"x.p50_ms": 50.0, "x.p95_ms": 95.0, "x.p99_ms": 99.0}
+    _percentiles(results, "one", [3.0])
+    assert results["one.p99_ms"]["value"] == 3.0
+
+
+def test_compare_flags_regressions_in_the_right_direction():
+    baseline, current = {}, {}
+    for results, (throughput, latency, other) in ((baseline, (100, 10, 5)), (current, (85, 10.5, 0.1))):
+        _record(results, "etl.docs_per_s", throughput, "docs/s", "higher")
+        _record(results, "search.p50_ms", latency, "ms", "lower")
+        _record(results, "analyze.p50_ms", other, "ms", "lower")
+    _record(current, "new.metric", 1.0, "ms", "lower")
+    _record(baseline, "zero", 0.0, "ms", "lower")
+    _record(current, "zero", 5.0, "ms", "lower")
+
+    # 15% fewer docs/s regressed; 5% slower search and the faster analyze did not
+    assert compare(current, baseline, threshold=0.10) == ["etl.docs_per_s"]
+    assert compare(current, baseline, threshold=0.20) == []
+    assert compare(current, baseline, threshold=0.01) == ["etl.docs_per_s", "search.p50_ms"]
+
+
+def test_text_suite_records_throughput():
+    results = {}
+    bench_text(results, n_docs=3, pages=1, chars_per_page=500, repeat=1)
+    assert set(results) == {"text.classify.docs_per_s", "text.classify.mb_per_s",
+                            "text.entities.docs_per_s", "text.entities.mb_per_s"}
+    assert all(r["value"] > 0 and r["better"] == "higher" for r in results.values())
+
+
+@pytest.mark.parametrize("index_type,compression", [("flat", "none"), ("ivf", "sq8")])
+def test_search_suite_records_latencies(tmp_path, monkeypatch, encoder, index_type, compression):
+    monkeypatch.chdir(tmp_path)
+    results = {}
+    bench_search(results, sizes=[500], n_queries=5, k=3, index_type=index_type, compression=compression)
+    prefix = f"search.{index_type}.{compression}.500"
+    assert set(results) == {f"{prefix}.{kind}.p{p}_ms" for kind in ("cold", "warm") for p in (50, 95, 99)}
+    assert (tmp_path / "search" / "embeddings.f32").stat().st_size == 500 * 384 * 4
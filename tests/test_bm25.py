@@ -0,0 +1,81 @@
+import math
+
+import pytest
+
+from app.vector_store.bm25 import BM25Index, tokenize
+from conftest import chunks
+
+DOCS = [
+    "The accused cheated the complainant.",
+    "Cheque dishonoured under Section 138; the cheque was returned.",
+    "Maintenance was claimed by the wife.",
+    "The accused was charged with theft and cheating."
+]
+
+
+def _reference_score(docs, query, doc_id, k1=1.5, b=0.75):
+    tokenized = [tokenize(d) for d in docs]
+    avg_len = sum(map(len, tokenized)) / len(docs)
+    score = 0.0
+    for term in set(tokenize(query)):
+        df = sum(term in t for t in tokenized)
+        tf = tokenized[doc_id].count(term)
+        if not tf:
+            continue
+        idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+        score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(tokenized[doc_id]) / avg_len))
+    return score
+
+
+def test_scores_follow_okapi_bm25():
+    bm25 = BM25Index()
+    bm25.add_many(0, DOCS)
+    query = "the accused cheque"
+    scores = bm25.scores(query)
+    assert set(scores) == {0, 1, 2, 3}
+    for doc_id, score in scores.items():
+        assert score == pytest.approx(_reference_score(DOCS, query, doc_id))
+
+    assert [doc_id for doc_id, _ in bm25.search("cheque", k=5)] == [1]
+    assert bm25.search("accused", k=5, allowed={3})[0][0] == 3
+    assert len(bm25.search("the", k=2)) == 2
+    assert bm25.search("unknownterm") == []
+    assert BM25Index().search("anything") == []
+
+
+def test_ids_must_be_added_in_order():
+    bm25 = BM25Index()
+    bm25.add(0, DOCS[0])
+    with pytest.raises(ValueError):
+        bm25.add(2, DOCS[1])
+
+
+def test_remap_matches_a_rebuild(tmp_path):
+    bm25 = BM25Index()
+    bm25.add_many(0, DOCS)
+    bm25.remap([0, -1, 1, -1])
+
+    rebuilt = BM25Index()
+    rebuilt.add_many(0, [DOCS[0], DOCS[2]])
+    assert len(bm25) == 2
+    assert bm25.scores("the accused wife") == rebuilt.scores("the accused wife")
+
+    bm25.save(str(tmp_path / "bm25.pkl"))
+    loaded = BM25Index.load(str(tmp_path / "bm25.pkl"))
+    assert loaded.scores("the accused wife") == rebuilt.scores("the accused wife")
+    (tmp_path / "broken.pkl").write_bytes(b"not a pickle")
+    assert len(BM25Index.load(str(tmp_path / "broken.pkl"))) == 0
+
+
+def test_lexical_search_skips_the_encoder(make_store, encoder):
+    vs = make_store()
+    texts, metas = chunks(20)
+    vs.add_texts(texts, metas)
+    encoded = encoder.encoded
+
+    results = vs.search("chunk 7", k=3, mode="lexical")
+    assert results[0]["text"] == texts[7]
+    assert results[0]["relevance"] == "95% match"
+    assert encoder.encoded == encoded
+    with pytest.raises(ValueError):
+        vs.search("chunk 7", mode="fuzzy")
@@ -0,0 +1,80 @@
+import pytest
+
+from app.core import cache
+from app.core.cache import LRUCache
+from conftest import chunks
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_least_recently_used_entry_is_evicted():
+    lru = LRUCache(maxsize=2)
+    lru.put("a", 1)
+    lru.put("b", 2)
+    assert lru.get("a") == 1  # "b" is now the oldest
+    lru.put("c", 3)
+
+    assert lru.get("b") is None
+    assert (lru.get("a"), lru.get("c")) == (1, 3)
+    assert len(lru) == 2
+    # Overwriting refreshes an entry too
+    lru.put("a", 10)
+    lru.put("d", 4)
+    assert (lru.get("a"), lru.get("c"), lru.get("d")) == (10, None, 4)
+
+
+def test_entries_expire_after_ttl(clock):
+    lru = LRUCache(maxsize=10, ttl=60)
+    lru.put("a", 1)
+    clock[0] += 59
+    assert lru.get("a") == 1
+    clock[0] += 1
+    assert lru.get("a") is None
+    assert len(lru) == 0
+
+    # A hit does not extend the TTL, a put does
+    lru.put("b", 2)
+    clock[0] += 30
+    assert lru.get("b") == 2
+    lru.put("b", 3)
+    clock[0] += 59
+    assert lru.get("b") == 3
+
+
+def test_zero_ttl_never_expires_and_zero_size_stores_nothing(clock):
+    lru = LRUCache(maxsize=10, ttl=0)
+    lru.put("a", 1)
+    clock[0] += 10**9
+    assert lru.get("a") == 1
+
+    off = LRUCache(maxsize=0)
+    off.put("a", 1)
+    assert off.get("a") is None
+    assert off.stats() == {"size": 0, "maxsize": 0, "hits": 0, "misses": 1, "hit_ratio": 0.0}
+
+
+def test_stats_count_hits_and_misses():
+    lru = LRUCache(maxsize=10)
+    lru.put("a", 1)
+    lru.get("a")
+    lru.get("a")
+    lru.get("b")
+    assert lru.stats() == {"size": 1, "maxsize": 10, "hits": 2, "misses": 1, "hit_ratio": 0.6667}
+
+
+def test_repeated_queries_are_encoded_once(make_store, encoder):
+    vs = make_store()
+    vs.add_texts(*chunks(20))
+    encoded = encoder.encoded
+
+    first = vs.search("theft under section 379", k=3)
+    assert vs.search("  theft under\nsection 379 ", k=3) == first
+    vs.search_many(["theft under section 379", "murder", "murder"], k=3)
+    # The original query once, then "murder" once for the batch
+    assert encoder.encoded - encoded == 2
+    assert vs.query_cache.stats()["hits"] == 2
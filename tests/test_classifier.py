@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+from app.agents.classifier import CaseClassifier, KeywordMatcher
+
+PIECES = ["cheat", "cheated", "upi fraud", "fraud", "pf", "pfizer", "otp", "wife", "housewife", "land",
+          "island", "refund", "board", "Sale Deed", " ", " ", ".", "-", "x", "1", "\n"]
+
+
+def _texts(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    return ["".join(rng.choice(PIECES) for _ in range(rng.randint(0, 12))) for _ in range(n)]
+
+
+def _original_classify(classifier: CaseClassifier, text: str):
+    # The per-keyword loop classify() replaced
+    scores = {cat: 0.0 for cat in classifier.categories}
+    text = text.lower()
+    for cat, words in classifier.keywords.items():
+        for w in words:
+            if w in text:
+                scores[cat] += 1.0
+    total = sum(scores.values())
+    if total == 0:
+        return {"Others": 0.6}
+    scores = {k: min(round(v / total, 2), 0.78) for k, v in scores.items() if v > 0}
+    return dict(sorted(scores.items(), key=lambda x: x[1], reverse=True))
+
+
+def test_classify_matches_the_keyword_loop():
+    classifier = CaseClassifier()
+    texts = _texts(3000)
+    for text in texts:
+        assert classifier.classify(text) == _original_classify(classifier, text)
+    assert classifier.classify_many(texts[:50]) == [classifier.classify(t) for t in texts[:50]]
+    assert classifier.classify("nothing relevant here") == {"Others": 0.6}
+
+
+@pytest.mark.parametrize("word_boundary", [False, True])
+def test_automaton_and_fallback_agree(word_boundary):
+    keywords = list(CaseClassifier()._keyword_cats)
+    automaton = KeywordMatcher(keywords)
+    fallback = KeywordMatcher(keywords)
+    fallback._automaton = None
+    for text in _texts(3000, seed=1):
+        text = text.lower()
+        assert automaton.find(text, word_boundary) == fallback.find(text, word_boundary)
+
+
+def test_word_boundary_mode():
+    keywords = ["pf", "wife", "cheat"]
+    matcher = KeywordMatcher(keywords)
+    assert matcher.find("pfizer housewife cheated") == {0, 1, 2}
+    assert matcher.find("pfizer housewife cheated", word_boundary=True) == set()
+    assert matcher.find("pf, wife-cheat", word_boundary=True) == {0, 1, 2}
+
+    classifier = CaseClassifier(word_boundary=True)
+    assert classifier.classify("the housewife island") == {"Others": 0.6}
+    assert "Family" in classifier.classify("the wife")
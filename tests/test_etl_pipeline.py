@@ -0,0 +1,126 @@
+import shutil
+
+import faiss
+import pytest
+
+from app.etl.extractor import iter_pdf_pages
+from app.etl.pipeline import process_pdf, run_etl_pipeline
+from app.vector_store.faiss_store import VectorStore
+
+pytest.importorskip("fitz")
+from benchmarks.corpus import write_pdfs  # noqa: E402
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch, encoder):
+    # The pipeline keeps its store, manifest and dedup state under ./data
+    monkeypatch.chdir(tmp_path)
+    write_pdfs("pdfs", 5, pages=2, chars_per_page=1500)
+    return tmp_path / "pdfs"
+
+
+def _change(pdf_dir, name: str, seed: int):
+    fresh = write_pdfs("fresh", 1, pages=2, chars_per_page=1500, seed=seed)[0]
+    shutil.copy(fresh, pdf_dir / name)
+
+
+def test_changed_pdf_is_the_only_one_reencoded(corpus, encoder, monkeypatch):
+    run_etl_pipeline(str(corpus), extract_workers=0, dedup=False)
+    vs = VectorStore()
+    vs.rebuild_index("ivf", nlist=4)
+    total = vs.index.ntotal
+    changed = sum(1 for m in vs.metadata if m["source"] == "judgment_000002.pdf")
+    kept = {vs.chunk_text(i): vs.full_vectors([i])[0].tolist()
+            for i, m in enumerate(vs.metadata) if m["source"] != "judgment_000002.pdf"}
+
+    trained = []
+    monkeypatch.setattr(VectorStore, "_build_trained", lambda self, *args, **kwargs: trained.append(args))
+    _change(corpus, "judgment_000002.pdf", seed=100)
+    encoded = encoder.encoded
+    stats = run_etl_pipeline(str(corpus), extract_workers=0, dedup=False)
+
+    # Only the new version of the changed PDF was embedded, and the IVF
+    # index kept its trained centroids
+    assert stats["docs"] == 1
+    assert encoder.encoded - encoded == stats["chunks"]
+    assert trained == []
+
+    vs = VectorStore()
+    assert faiss.extract_index_ivf(vs.index).nlist == 4
+    assert vs.index.ntotal == len(vs.metadata) == total - changed + stats["chunks"]
+    for i, m in enumerate(vs.metadata):
+        if m["source"] != "judgment_000002.pdf":
+            assert vs.full_vectors([i])[0].tolist() == kept.pop(vs.chunk_text(i))
+    assert kept == {}
+
+
+def test_removal_without_dedup_invalidates_dedup_state(corpus, encoder):
+    run_etl_pipeline(str(corpus), extract_workers=0, dedup=True)
+    # Renumbers every chunk after judgment_000000's while dedup is off;
+    # the new PDFs keep the store from shrinking below the saved state
+    (corpus / "judgment_000000.pdf").unlink()
+    _change(corpus, "extra_1.pdf", seed=200)
+    _change(corpus, "extra_2.pdf", seed=201)
+    run_etl_pipeline(str(corpus), extract_workers=0, dedup=False)
+
+    shutil.copy(corpus / "judgment_000003.pdf", corpus / "copy.pdf")
+    stats = run_etl_pipeline(str(corpus), extract_workers=0, dedup=True)
+
+    vs = VectorStore()
+    shared = [m for m in vs.metadata if "copy.pdf" in m.get("sources", [])]
+    assert stats["chunks"] == 0
+    assert len(shared) == sum(1 for m in vs.metadata if m["source"] == "judgment_000003.pdf")
+    assert all(m["source"] == "judgment_000003.pdf" for m in shared)
+
+
+def _stored(vs):
+    return [(m["source"], m["page_start"], m["page_end"], m["ipc_sections"], vs.chunk_text(i))
+            for i, m in enumerate(vs.metadata)]
+
+
+def test_worker_pool_matches_inline_extraction(corpus, encoder, monkeypatch, tmp_path):
+    run_etl_pipeline(str(corpus), extract_workers=0, dedup=False)
+    inline = sorted(_stored(VectorStore()))
+
+    batches = []
+    add_texts = VectorStore.add_texts
+
+    def counted(self, texts, metadatas, **kwargs):
+        batches.append(len(texts))
+        return add_texts(self, texts, metadatas, **kwargs)
+
+    monkeypatch.setattr(VectorStore, "add_texts", counted)
+    (tmp_path / "second").mkdir()
+    monkeypatch.chdir(tmp_path / "second")  # a fresh ./data
+    stats = run_etl_pipeline(str(corpus), extract_workers=2, queue_size=1, encode_batch_size=10**6, dedup=False)
+
+    vs = VectorStore()
+    assert stats["docs"] == 5
+    assert sorted(_stored(vs)) == inline
+    # Chunks of every PDF went to the encoder in a single batch
+    assert batches == [len(inline)]
+    assert vs.index.ntotal == len(inline)
+
+
+def test_process_pdf_spools_pages_with_byte_offsets(tmp_path):
+    import fitz
+
+    doc = fitz.open()
+    for n in range(3):
+        line = f"page {n}: café § 420, Section 302 of the IPC — "
+        doc.new_page().insert_text((40, 60), "\n".join([line * 2] * 20), fontsize=8)
+    doc.save(tmp_path / "accented.pdf")
+    pages = list(iter_pdf_pages(str(tmp_path / "accented.pdf")))
+
+    result = process_pdf(str(tmp_path / "accented.pdf"), spool_dir=str(tmp_path / "spool"))
+    assert result["error"] is None and result["pages"] == 3
+    with open(result["document_path"], "rb") as f:
+        document = f.read()
+    assert document.decode("utf-8") == "".join(pages)
+
+    assert len(result["texts"]) > 3
+    for text, meta in zip(result["texts"], result["metadatas"]):
+        assert document[meta["offset"]:meta["offset"] + meta["length"]].decode("utf-8") == text
+        assert 1 <= meta["page_start"] <= meta["page_end"] <= 3
+        assert "302" in meta["ipc_sections"]
+    assert result["metadatas"][-1]["page_end"] == 3
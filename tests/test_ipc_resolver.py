@@ -0,0 +1,57 @@
+import pytest
+
+from conftest import HashEncoder
+
+pytest.importorskip("pandas")
+from app.models import ipc_resolver  # noqa: E402
+
+CSV = """section,title,description
+302,Punishment for murder,Whoever commits murder shall be punished with death
+379,Punishment for theft,Whoever commits theft shall be punished with imprisonment
+420,Cheating,Whoever cheats and thereby dishonestly induces delivery of property
+"""
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    """
+    Records every model load; the loaded "model" is a HashEncoder.
+    """
+    loaded = []
+
+    def load_encoder(model_name, backend=None):
+        loaded.append(HashEncoder())
+        return loaded[-1]
+
+    monkeypatch.setattr(ipc_resolver, "load_encoder", load_encoder)
+    monkeypatch.setattr(ipc_resolver.settings, "EMBED_BATCHING", False)
+    return loaded
+
+
+def _matcher(tmp_path, csv=CSV, model_name="legal-bert"):
+    path = tmp_path / "ipc.csv"
+    path.write_text(csv)
+    return ipc_resolver.IPCMatcher(str(path), model_name=model_name, cache_dir=str(tmp_path / "cache"))
+
+
+def test_section_index_is_reused_across_starts(tmp_path, loads):
+    first = _matcher(tmp_path)
+    assert len(loads) == 1 and loads[0].encoded == 3
+    assert len(list((tmp_path / "cache").glob("*.index"))) == 1
+
+    # Warm start: the index is read back and the model is not loaded
+    second = _matcher(tmp_path)
+    assert len(loads) == 1
+    assert second.index.ntotal == 3
+
+    query = first.texts[2]
+    assert second.find_ipc(query, top_k=1)[0]["section"] == "IPC 420"
+    assert len(loads) == 2 and loads[1].encoded == 1
+
+
+def test_section_index_follows_csv_and_model(tmp_path, loads):
+    _matcher(tmp_path)
+    _matcher(tmp_path, csv=CSV + "498A,Cruelty,Husband or relative subjecting a woman to cruelty\n")
+    _matcher(tmp_path, model_name="other-model")
+    assert [encoder.encoded for encoder in loads] == [3, 4, 3]
+    assert len(list((tmp_path / "cache").glob("*.index"))) == 3
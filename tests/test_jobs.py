@@ -0,0 +1,82 @@
+import os
+import socket
+import subprocess
+import sys
+
+from app.core import jobs
+from app.core.jobs import INTERRUPTED, JobQueue
+from app.models.job import AnalysisJob
+
+
+def _finished(queue: JobQueue):
+    queue.executor.shutdown(wait=True)
+    queue._executor = None
+
+
+def _dead_pid() -> int:
+    child = subprocess.Popen([sys.executable, "-c", "pass"])
+    child.wait()
+    return child.pid
+
+
+def test_jobs_run_in_the_background(db):
+    queue = JobQueue(max_workers=1)
+    done = queue.submit(1, lambda a, b: {"sum": a + b}, 2, b=3)
+
+    def boom():
+        raise RuntimeError("model not loaded")
+
+    failed = queue.submit(1, boom)
+    _finished(queue)
+
+    assert queue.get(done, user_id=1)["status"] == "done"
+    assert queue.get(done, user_id=1)["result"] == {"sum": 5}
+    assert queue.get(failed, user_id=1)["status"] == "failed"
+    assert queue.get(failed, user_id=1)["error"] == "model not loaded"
+    # Only the owner sees a job
+    assert queue.get(done, user_id=2) is None
+    assert queue.get("missing", user_id=1) is None
+
+
+def test_recover_fails_only_jobs_of_dead_processes(db):
+    host, boot_id = socket.gethostname(), jobs._boot_id()
+    owners = {
+        "dead pid": f"{host}:{boot_id}:{_dead_pid()}",
+        "earlier boot": f"{host}:not-{boot_id}:{os.getppid()}",
+        "no owner": None,
+        "this pid, earlier process": f"{host}:{boot_id}:{os.getpid()}",
+        "live pid": f"{host}:{boot_id}:{os.getppid()}",
+        "other host": f"not-{host}:{boot_id}:1"
+    }
+    session = db()
+    for name, owner in owners.items():
+        session.add(AnalysisJob(id=name, user_id=1, status="running", owner=owner))
+    session.add(AnalysisJob(id="finished", user_id=1, status="done", owner=owners["dead pid"]))
+    session.commit()
+    session.close()
+
+    queue = JobQueue()
+    queue.recover()
+
+    status = {name: queue.get(name, user_id=1) for name in list(owners) + ["finished"]}
+    for name in ("dead pid", "earlier boot", "no owner", "this pid, earlier process"):
+        assert (status[name]["status"], status[name]["error"]) == ("failed", INTERRUPTED)
+    for name in ("live pid", "other host"):
+        assert status[name]["status"] == "running"
+    assert status["finished"]["status"] == "done"
+
+
+def test_poll_fails_a_job_whose_worker_died_after_recovery(db):
+    queue = JobQueue()
+    queue.recover()
+    session = db()
+    session.add(AnalysisJob(id="orphan", user_id=1, status="queued",
+                            owner=f"{socket.gethostname()}:{jobs._boot_id()}:{_dead_pid()}"))
+    session.commit()
+    session.close()
+
+    assert queue.get("orphan", user_id=1)["error"] == INTERRUPTED
+    session = db()
+    assert session.get(AnalysisJob, "orphan").status == "failed"
+    session.close()
+
@@ -0,0 +1,76 @@
+from app.etl.manifest import EtlManifest
+
+
+def _chunk(source, *shared):
+    return {"source": source, "sources": [source, *shared]}
+
+
+def test_bootstrap_contiguous_ranges(tmp_path):
+    pdf_dir = tmp_path / "pdfs"
+    pdf_dir.mkdir()
+    (pdf_dir / "a.pdf").write_bytes(b"%PDF a")
+    metadata = [_chunk("a.pdf"), _chunk("a.pdf"), _chunk("b.pdf", "a.pdf"), _chunk("b.pdf")]
+
+    manifest = EtlManifest.bootstrap(str(tmp_path / "manifest.json"), metadata, str(pdf_dir))
+    assert manifest.n_chunks == 4
+    assert manifest.files["a.pdf"]["chunks"] == [0, 2]
+    assert manifest.files["a.pdf"]["shared"] == [2]
+    assert manifest.files["a.pdf"]["dir"] == str(pdf_dir)
+    assert manifest.files["a.pdf"]["size"] == 6
+    assert manifest.files["b.pdf"]["chunks"] == [2, 4]
+    # Not in pdf_dir: never treated as deleted
+    assert manifest.files["b.pdf"]["dir"] is None
+
+
+def test_bootstrap_after_ownership_moved(tmp_path):
+    # c.pdf took over chunk 1 when its first source was released, so its
+    # own chunks are not one range
+    metadata = [
+        _chunk("a.pdf"), _chunk("c.pdf"), _chunk("a.pdf"),
+        _chunk("b.pdf"), _chunk("c.pdf"), _chunk("c.pdf")
+    ]
+    manifest = EtlManifest.bootstrap(str(tmp_path / "manifest.json"), metadata, str(tmp_path))
+
+    assert manifest.files["a.pdf"]["chunks"] == [0, 1]
+    assert manifest.files["a.pdf"]["shared"] == [2]
+    assert manifest.files["b.pdf"]["chunks"] == [3, 4]
+    assert manifest.files["c.pdf"]["chunks"] == [4, 6]
+    assert manifest.files["c.pdf"]["shared"] == [1]
+
+    # Releasing a.pdf must not touch b.pdf's chunk between its chunks
+    assert manifest.release("a.pdf", metadata) == [0, 2]
+    assert manifest.release("c.pdf", metadata) == [4, 5, 1]
+    assert metadata[3]["sources"] == ["b.pdf"]
+
+
+def test_release_keeps_chunks_still_shared(tmp_path):
+    metadata = [_chunk("a.pdf"), _chunk("a.pdf", "b.pdf"), _chunk("b.pdf")]
+    manifest = EtlManifest.bootstrap(str(tmp_path / "manifest.json"), metadata, str(tmp_path))
+
+    assert manifest.release("a.pdf", metadata) == [0]
+    assert metadata[1] == {"source": "b.pdf", "sources": ["b.pdf"]}
+    assert manifest.release("missing.pdf", metadata) == []
+
+
+def test_remap_and_save_round_trip(tmp_path):
+    path = str(tmp_path / "manifest.json")
+    metadata = [_chunk("a.pdf"), _chunk("a.pdf"), _chunk("b.pdf", "a.pdf"), _chunk("b.pdf"), _chunk("c.pdf")]
+    manifest = EtlManifest.bootstrap(path, metadata, str(tmp_path))
+    manifest.n_chunks = 5
+
+    # VectorStore.remove_ids dropped chunks 0 and 1
+    manifest.files.pop("a.pdf")
+    manifest.remap([-1, -1, 0, 1, 2])
+    manifest.save()
+
+    loaded = EtlManifest.load(path)
+    assert loaded.n_chunks == 3
+    assert loaded.files["b.pdf"]["chunks"] == [0, 2]
+    assert loaded.files["c.pdf"]["chunks"] == [2, 3]
+
+
+def test_load_rejects_corrupt_file(tmp_path):
+    path = tmp_path / "manifest.json"
+    assert EtlManifest.load(str(path)) is None
+    path.write_text("{not json")
+    assert EtlManifest.load(str(path)) is None
@@ -0,0 +1,146 @@
+import re
+
+from app.core.metrics import BUCKETS, Metrics
+
+
+def _samples(text: str, name: str):
+    pattern = re.compile(rf"^{re.escape(name)}(?:\{{(.*)\}})? (\S+)$")
+    out = {}
+    for line in text.splitlines():
+        match = pattern.match(line)
+        if match:
+            out[match.group(1) or ""] = float(match.group(2))
+    return out
+
+
+def test_histogram_buckets_are_cumulative():
+    m = Metrics(enabled=True)
+    for seconds in (0.0002, 0.001, 0.003, 0.003, 100.0):
+        m.observe("search.faiss", seconds)
+    text = m.render()
+
+    assert "# TYPE legalai_stage_seconds histogram" in text
+    buckets = _samples(text, "legalai_stage_seconds_bucket")
+    assert buckets['stage="search.faiss",le="0.0005"'] == 1
+    # Upper bounds are inclusive
+    assert buckets['stage="search.faiss",le="0.001"'] == 2
+    assert buckets['stage="search.faiss",le="0.005"'] == 4
+    assert buckets['stage="search.faiss",le="60.0"'] == 4
+    assert buckets['stage="search.faiss",le="+Inf"'] == 5
+    values = [buckets[f'stage="search.faiss",le="{b}"'] for b in BUCKETS]
+    assert values == sorted(values)
+
+    assert _samples(text, "legalai_stage_seconds_count") == {'stage="search.faiss"': 5}
+    assert abs(_samples(text, "legalai_stage_seconds_sum")['stage="search.faiss"'] - 100.0072) < 1e-6
+
+
+def test_collectors_and_label_escaping():
+    m = Metrics(enabled=True)
+    m.register_collector(lambda: [
+        ("legalai_cache_hits_total", "counter", "Cache hits.", [({"cache": 'a"b\\c\nd'}, 3)]),
+        ("legalai_index_vectors", "gauge", "Vectors in the FAISS index.", [({}, 42)])
+    ])
+
+    def broken():
+        raise RuntimeError("not loaded")
+        yield
+
+    m.register_collector(broken)
+    text = m.render()
+
+    assert "# TYPE legalai_cache_hits_total counter" in text
+    assert 'legalai_cache_hits_total{cache="a\\"b\\\\c\\nd"} 3' in text
+    assert "legalai_index_vectors 42" in text
+    assert "legalai_http_requests_in_flight 0" in text
+    assert text.endswith("\n")
+
+
+def test_requests_and_server_timing():
+    m = Metrics(enabled=True)
+    m.request_started()
+    assert "legalai_http_requests_in_flight 1" in m.render()
+    with m.span("analyze.classify"):
+        pass
+    m.observe("search.faiss", 0.002)
+    m.observe("search.faiss", 0.003)
+
+    header = m.server_timing(0.010)
+    parts = dict(p.split(";dur=") for p in header.split(", "))
+    assert list(parts) == ["analyze.classify", "search.faiss", "total"]
+    assert parts["search.faiss"] == "5.00"
+    assert parts["total"] == "10.00"
+
+    m.request_finished("analysis.analyze", 0.010)
+    text = m.render()
+    assert "legalai_http_requests_in_flight 0" in text
+    assert _samples(text, "legalai_http_request_seconds_count") == {'endpoint="analysis.analyze"': 1}
+    # Spans outside a request still reach the histograms
+    m.observe("etl.extract", 1.0)
+    assert m.server_timing(0.0) == "total;dur=0.00"
+
+
+def test_disabled_metrics_record_nothing():
+    m = Metrics(enabled=False)
+    m.request_started()
+    with m.span("search.faiss"):
+        pass
+    m.observe("etl.extract", 1.0)
+    m.request_finished("analysis.analyze", 0.1)
+
+    text = m.render()
+    assert "legalai_stage_seconds_count" not in text
+    assert "legalai_http_request_seconds_count" not in text
+    assert "legalai_http_requests_in_flight 0" in text
+
+
+def test_server_timing_header_skips_streamed_responses(monkeypatch):
+    from flask import Flask, Response, stream_with_context
+
+    from app.api.metrics import metrics, metrics_bp
+
+    app = Flask(__name__)
+    app.register_blueprint(metrics_bp)
+
+    @app.route("/plain")
+    def plain():
+        with metrics.span("analyze.classify"):
+            return "ok"
+
+    @app.route("/stream")
+    def stream():
+        def generate():
+            with metrics.span("analyze.classify"):
+                yield "{}\n"
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+    monkeypatch.setattr(metrics, "enabled", True)
+    client = app.test_client()
+    assert client.get("/plain").headers["Server-Timing"].startswith("analyze.classify;dur=")
+    response = client.get("/stream")
+    assert response.data == b"{}\n"
+    assert "Server-Timing" not in response.headers
+    assert client.get("/metrics").status_code == 200
+
+
+def test_streamed_request_is_counted_once(monkeypatch):
+    from flask import Flask, Response, stream_with_context
+
+    from app.api.metrics import metrics, metrics_bp
+
+    app = Flask(__name__)
+    app.register_blueprint(metrics_bp)
+
+    @app.route("/batch")
+    def batch():
+        return Response(stream_with_context(iter(["{}\n"] * 3)), mimetype="application/x-ndjson")
+
+    monkeypatch.setattr(metrics, "enabled", True)
+    client = app.test_client()
+    key = 'endpoint="batch"'
+    before = _samples(metrics.render(), "legalai_http_request_seconds_count").get(key, 0)
+    for _ in range(3):
+        assert client.get("/batch").data == b"{}\n" * 3
+
+    text = metrics.render()
+    assert "legalai_http_requests_in_flight 0" in text
+    assert _samples(text, "legalai_http_request_seconds_count")[key] == before + 3
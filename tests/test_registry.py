@@ -0,0 +1,81 @@
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from app.core.registry import ModelRegistry
+
+
+def test_entries_load_lazily_and_once():
+    calls = []
+
+    def factory():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    registry = ModelRegistry()
+    registry.register("model", factory)
+    assert calls == []
+    assert registry.status()["model"]["state"] == "not_loaded"
+
+    got = []
+    threads = [threading.Thread(target=lambda: got.append(registry.get("model"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(instance is got[0] for instance in got)
+    assert registry.is_loaded("model")
+    assert registry.status()["model"]["state"] == "ready"
+    with pytest.raises(KeyError):
+        registry.get("missing")
+
+
+def test_failed_load_is_recorded_and_retried():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError("weights not found")
+        return "model"
+
+    registry = ModelRegistry()
+    registry.register("model", flaky)
+    registry.warmup()  # does not raise
+    assert registry.status()["model"]["state"] == "failed"
+    assert registry.status()["model"]["error"] == "weights not found"
+
+    assert registry.get("model") == "model"
+    assert (registry.status()["model"]["state"], registry.status()["model"]["error"]) == ("ready", None)
+
+
+def test_warmup_async_runs_once_per_process():
+    loaded = threading.Event()
+    calls = []
+    registry = ModelRegistry()
+    registry.register("model", lambda: calls.append(1) or loaded.set() or "model")
+
+    registry.warmup_async()
+    registry.warmup_async()
+    assert loaded.wait(5)
+    time.sleep(0.05)
+    assert calls == [1]
+
+
+def test_importing_the_app_loads_no_models():
+    # A fresh interpreter, since other tests import these modules
+    code = (
+        "import sys\n"
+        "import app.api.analysis, app.api.history, app.api.metrics, app.auth.router, app.core.registry\n"
+        "print(sorted(m for m in ('faiss', 'fitz', 'pandas', 'sentence_transformers', 'torch') if m in sys.modules))\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         cwd=Path(__file__).parent.parent)
+    assert out.stdout.strip() == "[]"
@@ -0,0 +1,87 @@
+import os
+
+import pytest
+
+from app.vector_store.text_store import BLOCK_SIZE, TextStore
+
+
+def test_load_drops_data_after_last_document(tmp_path):
+    store = TextStore(str(tmp_path))
+    store.add("a.pdf", "first judgment")
+    store.add("b.pdf", "second judgment")
+    size = os.path.getsize(store.data_path)
+    # A document whose index line never made it to texts.jsonl
+    with open(store.data_path, "ab") as f:
+        f.write(b"half-written third judgment")
+
+    store = TextStore(str(tmp_path))
+    assert len(store) == 2
+    assert os.path.getsize(store.data_path) == size
+    doc_id = store.add("c.pdf", "third judgment")
+    assert store.read(doc_id) == "third judgment"
+
+
+def test_load_ignores_torn_index_line(tmp_path):
+    store = TextStore(str(tmp_path))
+    store.add("a.pdf", "first judgment")
+    end = os.path.getsize(store.data_path)
+    store.add("b.pdf", "second judgment")
+    with open(store.index_path, "rb+") as f:
+        f.truncate(os.path.getsize(store.index_path) - 5)
+
+    store = TextStore(str(tmp_path))
+    assert len(store) == 1
+    assert os.path.getsize(store.data_path) == end
+    assert store.read(0) == "first judgment"
+
+
+def test_read_only_store_never_truncates(tmp_path):
+    store = TextStore(str(tmp_path))
+    store.add("a.pdf", "first judgment")
+    with open(store.data_path, "ab") as f:
+        f.write(b"document being written by the ETL")
+    size = os.path.getsize(store.data_path)
+
+    reader = TextStore(str(tmp_path), read_only=True)
+    assert os.path.getsize(store.data_path) == size
+    assert reader.read(0) == "first judgment"
+    with pytest.raises(RuntimeError):
+        reader.add("b.pdf", "second judgment")
+
+
+def test_views_stay_valid_when_the_file_grows(tmp_path):
+    store = TextStore(str(tmp_path))
+    store.add("a.pdf", "first judgment")
+    view = store.read_bytes(0, 6, 8)
+    # Re-maps the grown file while `view` still references the old map
+    doc_id = store.add("b.pdf", "second judgment")
+    assert store.read(doc_id) == "second judgment"
+    assert bytes(view) == b"judgment"
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_range_reads(tmp_path, compress):
+    text = "".join(f"para {i} – the court held that section {i % 500} applies.\n" for i in range(5000))
+    data = text.encode("utf-8")
+    assert len(data) > 3 * BLOCK_SIZE
+
+    store = TextStore(str(tmp_path), compress=compress)
+    store.add("short.pdf", "short")
+    doc_id = store.add("long.pdf", text)
+    store = TextStore(str(tmp_path), compress=compress)
+
+    for offset, length in ((0, 100), (BLOCK_SIZE - 10, 20), (BLOCK_SIZE // 2, 2 * BLOCK_SIZE), (len(data) - 7, 50)):
+        assert bytes(store.read_bytes(doc_id, offset, length)) == data[offset:offset + length]
+    assert store.read(doc_id) == text
+    assert store.read(0) == "short"
+
+
+def test_add_file_streams_in_blocks(tmp_path):
+    source = tmp_path / "doc.txt"
+    text = "x" * (2 * BLOCK_SIZE + 123)
+    source.write_text(text, encoding="utf-8")
+
+    store = TextStore(str(tmp_path / "texts"), compress=True)
+    doc_id = store.add_file("doc.pdf", str(source))
+    assert len(store.docs[doc_id]["blocks"]) == 3
+    assert store.read(doc_id) == text
@@ -0,0 +1,112 @@
+import random
+import re
+
+import pytest
+
+from app.etl.transformer import (
+    chunk_text, extract_legal_entities, find_legal_entities, iter_chunk_entities, iter_chunks
+)
+
+CITATIONS = [
+    "Section 420 of the IPC", "section 498A of IPC", "IPC Section 302", "Section 406 Indian Penal Code",
+    "Article 21 of the Constitution", "article 300A of Constitution",
+    "Negotiable Instruments Act, 1881", "Indian Contract Act, 1872"
+]
+WORDS = "the learned counsel submitted that the impugned order is perverse and deserves to be set aside".split()
+
+
+def _document(seed: int, n_sentences: int = 400) -> str:
+    rng = random.Random(seed)
+    sentences = []
+    for _ in range(n_sentences):
+        words = rng.sample(WORDS, rng.randint(3, 10))
+        if rng.random() < 0.5:
+            words.insert(rng.randint(0, len(words)), "under " + rng.choice(CITATIONS))
+        sentences.append(" ".join(words).capitalize() + rng.choice([". ", ".\n", "; ", ", "]))
+    return "".join(sentences)
+
+
+def _pages(text: str, rng: random.Random, n: int = 25):
+    cuts = sorted(rng.sample(range(1, len(text)), n))
+    return [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+
+
+@pytest.mark.parametrize("chunk_size,overlap", [(1000, 200), (50, 0), (7, 3)])
+def test_iter_chunks_matches_chunk_text(chunk_size, overlap):
+    rng = random.Random(chunk_size)
+    text = _document(chunk_size, n_sentences=60)
+    pages = _pages(text, rng, n=10)
+    pages.insert(3, "")  # a blank page
+
+    got = list(iter_chunks(pages, chunk_size=chunk_size, overlap=overlap))
+    assert [c["text"] for c in got] == chunk_text(text, chunk_size, overlap)
+
+    page_of = [n for n, page in enumerate(pages, 1) for _ in page]
+    for chunk in got:
+        assert text[chunk["start"]:chunk["start"] + len(chunk["text"])] == chunk["text"]
+        assert chunk["page_start"] == page_of[chunk["start"]]
+        assert chunk["page_end"] == page_of[chunk["start"] + len(chunk["text"]) - 1]
+
+
+def test_iter_chunks_of_nothing():
+    assert list(iter_chunks([])) == list(iter_chunks(["", ""])) == []
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_chunks_get_the_entities_they_contain(seed):
+    text = _document(seed)
+    matches = find_legal_entities(text)
+
+    got = list(iter_chunk_entities(iter_chunks(_pages(text, random.Random(seed)))))
+    assert [c["text"] for c, _ in got] == chunk_text(text)
+    for chunk, entities in got:
+        start, end = chunk["start"], chunk["start"] + len(chunk["text"])
+        inside = [m for m in matches if m["start"] >= start and m["end"] <= end]
+        assert entities == {
+            kind: sorted({m["value"] for m in inside if m["type"] == kind})
+            for kind in ("ipc_sections", "articles", "acts")
+        }
+        # Same as scanning the chunk on its own unless a match crosses its edges
+        if not any(m["start"] < start < m["end"] or m["start"] < end < m["end"] for m in matches):
+            assert entities == extract_legal_entities(chunk["text"])
+
+
+def test_match_across_chunk_and_page_boundaries():
+    filler = "x" * 780 + ". The "
+    text = filler + "Negotiable Instruments Act, 1881 applies. Section 138 of the IPC"
+    # Pages split inside both citations
+    pages = [text[:800], text[800:830], text[830:]]
+
+    got = list(iter_chunk_entities(iter_chunks(pages, chunk_size=810, overlap=20)))
+    assert len(got) == 2
+    (first, first_entities), (second, second_entities) = got
+    # The act starts in the first chunk and ends in the second: only the
+    # second contains it whole (not the shorter "Instruments Act, 1881")
+    assert first_entities["acts"] == []
+    assert second_entities["acts"] == []
+    assert second_entities["ipc_sections"] == ["138"]
+
+    got = list(iter_chunk_entities(iter_chunks(pages, chunk_size=810, overlap=100)))
+    assert got[1][1]["acts"] == ["The Negotiable Instruments Act, 1881"]
+
+
+def test_ipc_pattern_matches_plain_case_insensitive_pattern():
+    number = r"\d+[A-Za-z]?\b"
+    reference = re.compile(
+        rf"Section\s+{number}\s+of\s+(?:the\s+)?IPC|IPC\s+Section\s+{number}"
+        rf"|Section\s+{number}\s+Indian\s+Penal\s+Code",
+        re.IGNORECASE
+    )
+    pieces = ["Section ", "SECTION ", "ſection ", "İPC ", "ipc ", "IPC", "420 ", "498a ", "of ", "the ",
+              "Indian Penal Code ", "Iection ", "SPC ", "x", "\n", ","]
+    rng = random.Random(0)
+    for _ in range(20000):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(1, 8)))
+        expected = [(m.start(), m.end()) for m in reference.finditer(text)]
+        assert [(m["start"], m["end"]) for m in find_legal_entities(text) if m["type"] == "ipc_sections"] == expected
+
+
+def test_text_without_breaks_is_still_scanned():
+    text = ("word " * 20000) + "Section 302 of IPC"
+    got = list(iter_chunk_entities(iter_chunks([text[i:i + 5000] for i in range(0, len(text), 5000)])))
+    assert got[-1][1]["ipc_sections"] == ["302"]
@@ -0,0 +1,87 @@
+import hashlib
+import io
+import os
+
+import pytest
+
+from app.api import analysis
+from app.core import uploads
+from app.core.uploads import extract_text_cached, save_upload, upload_digest
+from app.models.case import CaseRecord
+from conftest import chunks
+
+
+def _pdf(text: str) -> bytes:
+    fitz = pytest.importorskip("fitz")
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), text)
+    return doc.tobytes()
+
+
+class _Upload:
+    def __init__(self, data: bytes):
+        self.stream = io.BytesIO(data)
+
+
+def test_uploads_are_stored_by_content(tmp_path):
+    upload_dir = str(tmp_path / "uploads")
+    first = save_upload(_Upload(b"%PDF same"), upload_dir)
+    again = save_upload(_Upload(b"%PDF same"), upload_dir)
+    other = save_upload(_Upload(b"%PDF other"), upload_dir)
+
+    assert first == again != other
+    assert sorted(os.listdir(upload_dir)) == sorted([os.path.basename(first), os.path.basename(other)])
+    assert upload_digest(first) == hashlib.sha256(b"%PDF same").hexdigest()
+
+
+def test_extraction_is_cached_and_pruned(tmp_path, monkeypatch):
+    extracted = []
+    monkeypatch.setattr(uploads, "extract_text_from_pdf", lambda path: extracted.append(path) or "x" * 100)
+    cache_dir = str(tmp_path / "cache")
+    paths = [str(tmp_path / f"{digest}.pdf") for digest in ("aa", "bb", "cc")]
+
+    assert extract_text_cached(paths[0], cache_dir) == "x" * 100
+    assert extract_text_cached(paths[0], cache_dir) == "x" * 100
+    assert extracted == [paths[0]]
+
+    # Room for two entries: the least recently read one goes
+    monkeypatch.setattr(uploads.settings, "EXTRACT_CACHE_MAX_MB", 250 / 1024 / 1024)
+    extract_text_cached(paths[1], cache_dir)
+    os.utime(os.path.join(cache_dir, "aa.txt"), (0, 0))
+    os.utime(os.path.join(cache_dir, "bb.txt"), (1, 1))
+    extract_text_cached(paths[2], cache_dir)
+    assert sorted(os.listdir(cache_dir)) == ["bb.txt", "cc.txt"]
+
+
+def test_repeat_uploads_share_one_analysis(api, db, monkeypatch):
+    analyzed = []
+    analyze = analysis._analyze
+    monkeypatch.setattr(analysis, "_analyze", lambda *args: analyzed.append(args[:2]) or analyze(*args))
+
+    def post(description, *pdfs):
+        files = [(io.BytesIO(data), f"upload{i}.pdf") for i, data in enumerate(pdfs)]
+        response = api.client.post("/api/analyze", headers=api.headers,
+                                   data={"description": description, "files": files})
+        assert response.status_code == 200
+        return response.get_json()
+
+    cheque = _pdf("The cheque was dishonoured under Section 138.")
+    first = post("Cheque bounced after the loan", cheque)
+    # Same PDF (under another name) and description modulo whitespace
+    second = post("  Cheque bounced\nafter the   loan ", cheque)
+    assert len(analyzed) == 1
+    assert second["analysis"] == first["analysis"]
+    assert second["id"] != first["id"]
+
+    post("Cheque bounced after the loan", _pdf("The land was encroached upon."))
+    post("Cheque bounced after the loan")
+    assert [len(paths) for _, paths in analyzed] == [1, 1, 0]
+
+    # New vectors change the index version
+    api.store.add_texts(*chunks(5, start=50))
+    post("Cheque bounced after the loan", cheque)
+    assert len(analyzed) == 4
+
+    session = db()
+    assert session.query(CaseRecord).count() == 5
+    session.close()
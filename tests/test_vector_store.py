@@ -0,0 +1,373 @@
+import json
+import os
+import shutil
+from contextlib import contextmanager
+
+import faiss
+import numpy as np
+import pytest
+
+from app.vector_store.faiss_store import index_type_of
+from app.vector_store.mmap_metadata import MmapMetadata, write_mmap_metadata
+from conftest import HashEncoder, chunks
+
+
+class Crash(Exception):
+    pass
+
+
+@contextmanager
+def crash_on_replace(should_crash):
+    """
+    Makes os.replace raise Crash for the renames `should_crash` selects,
+    as if the process died there.
+    """
+    real_replace = os.replace
+
+    def replace(src, dst):
+        if should_crash(src, dst):
+            raise Crash(dst)
+        return real_replace(src, dst)
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(os, "replace", replace)
+        with pytest.raises(Crash):
+            yield
+
+
+# ---------------- APPEND LOG ----------------
+def test_replay_recovers_adds_not_checkpointed(make_store):
+    vs = make_store()
+    texts, metas = chunks(20)
+    vs.add_texts(texts, metas)
+    del vs  # "crash": nothing was checkpointed
+
+    vs = make_store()
+    assert vs.index.ntotal == 20
+    assert [m["text"] for m in vs.metadata] == texts
+    np.testing.assert_allclose(vs.load_embeddings(), HashEncoder().encode(texts))
+    assert vs.chunk_ids_for({"ipc_sections": ["301"]}) == [1, 8, 15]
+
+
+def test_replay_skips_entries_already_checkpointed(make_store, tmp_path):
+    vs = make_store()
+    vs.add_texts(*chunks(10))
+    log = tmp_path / "vectors.log"
+    shutil.copy(log, tmp_path / "kept.log")
+    vs.checkpoint()
+    # Crash after the checkpoint was written but before the log was removed
+    shutil.copy(tmp_path / "kept.log", log)
+
+    vs = make_store()
+    assert vs.index.ntotal == 10
+    assert len(vs.metadata) == 10
+    assert len(vs.load_embeddings()) == 10
+
+
+def test_replay_stops_at_torn_entry(make_store, tmp_path):
+    vs = make_store()
+    vs.add_texts(*chunks(10))
+    first_entry = os.path.getsize(tmp_path / "vectors.log")
+    vs.add_texts(*chunks(10, start=10))
+    with open(tmp_path / "vectors.log", "r+b") as f:
+        f.truncate(first_entry + 100)
+
+    vs = make_store()
+    assert vs.index.ntotal == 10
+    assert [m["text"] for m in vs.metadata] == chunks(10)[0]
+
+
+def test_replay_applies_metadata_edits(make_store):
+    vs = make_store()
+    vs.add_texts(*chunks(5))
+    vs.checkpoint()
+    vs.update_metadata(3, sources=["a.pdf", "b.pdf"])
+
+    vs = make_store()
+    assert vs.metadata[3]["sources"] == ["a.pdf", "b.pdf"]
+    assert vs.index.ntotal == 5
+
+
+def test_load_truncates_embeddings_past_the_index(make_store, tmp_path):
+    vs = make_store()
+    vs.add_texts(*chunks(10))
+    vs.checkpoint()
+    # Vectors appended by a checkpoint that died before replacing the index
+    with open(tmp_path / "embeddings.f32", "ab") as f:
+        f.write(np.ones((3, vs.dimension), dtype="float32").tobytes())
+
+    vs = make_store()
+    assert os.path.getsize(tmp_path / "embeddings.f32") == 10 * vs.dimension * 4
+    assert len(vs.load_embeddings()) == vs.index.ntotal == 10
+
+
+@pytest.mark.parametrize("crash_at", ["metadata.pkl", "index.bin.commit"])
+def test_crash_during_checkpoint(make_store, crash_at):
+    vs = make_store()
+    vs.add_texts(*chunks(10))
+    vs.checkpoint()
+    texts, metas = chunks(5, start=10)
+    vs.add_texts(texts, metas)
+    with crash_on_replace(lambda src, dst: dst.endswith(crash_at)):
+        vs.checkpoint()
+
+    vs = make_store()
+    assert vs.index.ntotal == len(vs.metadata) == len(vs.load_embeddings()) == 15
+    assert vs.search(texts[2], k=1)[0]["text"] == texts[2]
+    assert not os.path.exists(vs.commit_path)
+
+
+def test_read_only_store_ignores_log(make_store):
+    vs = make_store()
+    vs.add_texts(*chunks(5))
+    vs.checkpoint()
+    vs.add_texts(*chunks(5, start=5))
+
+    reader = make_store(read_only=True)
+    assert reader.index.ntotal == 5
+    writer = make_store()
+    assert writer.index.ntotal == 10
+
+
+# ---------------- REMOVE IDS ----------------
+def _indexed_store(make_store, n=300, index_type="flat", **params):
+    vs = make_store()
+    texts, metas = chunks(n)
+    vs.add_texts(texts, metas)
+    vs.checkpoint()
+    if index_type != "flat":
+        vs.rebuild_index(index_type, **params)
+    return vs, texts
+
+
+def test_remove_ids_renumbers_everything(make_store):
+    vs, texts = _indexed_store(make_store, n=20)
+    remapped = []
+    mapping = vs.remove_ids([0, 5, 6], on_remap=remapped.append)
+
+    assert mapping[:8] == [-1, 0, 1, 2, 3, -1, -1, 4]
+    assert remapped == [mapping]
+    kept = [t for i, t in enumerate(texts) if i not in (0, 5, 6)]
+
+    vs = make_store()
+    assert vs.index.ntotal == len(vs.metadata) == 17
+    assert [m["text"] for m in vs.metadata] == kept
+    np.testing.assert_allclose(vs.load_embeddings(), HashEncoder().encode(kept))
+    # section 300 + i % 7: chunks 1, 8, 15 -> 0, 5, 12
+    assert vs.chunk_ids_for({"ipc_sections": ["301"]}) == [0, 5, 12]
+    assert vs.search(kept[3], k=1, mode="lexical")[0]["text"] == kept[3]
+    assert not os.path.exists(vs.commit_path)
+
+
+def test_remove_ids_keeps_nlist_and_raw_vectors(make_store, tmp_path):
+    vs, texts = _indexed_store(make_store, n=300, index_type="ivf", compression="sq8", nlist=8)
+    vs.remove_ids(range(100))
+
+    vs = make_store()
+    info = json.loads((tmp_path / "index.bin.json").read_text())
+    assert (info["index_type"], info["compression"], info["nlist"], info["ntotal"]) == ("ivf", "sq8", 8, 200)
+    assert os.path.getsize(tmp_path / "embeddings.f32") == 200 * vs.dimension * 4
+    np.testing.assert_allclose(vs.full_vectors([0]), HashEncoder().encode([texts[100]]))
+
+
+def _pq_codes(index, vectors):
+    """
+    Codes of `vectors` under the index's PQ codebook, which only change
+    if it was retrained.
+    """
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        index = faiss.downcast_index(index.storage)
+    return index.pq.compute_codes(vectors)
+
+
+@pytest.mark.parametrize("index_type,params", [("ivfpq", {"nlist": 8}), ("hnsw", {"compression": "pq"})])
+def test_small_removal_keeps_training(make_store, monkeypatch, index_type, params):
+    vs, texts = _indexed_store(make_store, n=300, index_type=index_type, **params)
+    probe = HashEncoder().encode(texts[:20])
+    codes = _pq_codes(vs.index, probe)
+    monkeypatch.setattr(type(vs), "_build_trained", lambda *args, **kwargs: pytest.fail("retrained"))
+    vs.remove_ids(range(0, 300, 10))
+
+    vs = make_store()
+    np.testing.assert_array_equal(_pq_codes(vs.index, probe), codes)
+    assert vs.index.ntotal == len(vs.metadata) == 270
+    assert vs.search(texts[11], k=1)[0]["text"] == texts[11]
+
+
+def test_crash_before_commit_keeps_old_store(make_store):
+    vs, texts = _indexed_store(make_store, n=30)
+    vs.add_texts(*chunks(5, start=30))  # still only in the log
+    with crash_on_replace(lambda src, dst: dst.endswith(".commit")):
+        vs.remove_ids(range(10))
+
+    vs = make_store()
+    assert vs.index.ntotal == len(vs.metadata) == 35
+    assert len(vs.load_embeddings()) == 35
+    assert vs.metadata[0]["text"] == texts[0]
+
+
+def test_crash_during_commit_is_finished_on_load(make_store):
+    vs, texts = _indexed_store(make_store, n=30)
+    vs.add_texts(*chunks(5, start=30))
+    renamed = []
+
+    def crash_after_two(src, dst):
+        if src.endswith(".new"):
+            renamed.append(dst)
+        return len(renamed) > 2
+
+    with crash_on_replace(crash_after_two):
+        vs.remove_ids(range(10))
+    assert os.path.exists(vs.commit_path)
+
+    with pytest.raises(RuntimeError):
+        make_store(read_only=True)
+
+    vs = make_store()
+    assert not os.path.exists(vs.commit_path)
+    assert not os.path.exists(vs.log_path)
+    assert vs.index.ntotal == len(vs.metadata) == 25
+    assert len(vs.load_embeddings()) == 25
+    assert vs.metadata[0]["text"] == texts[10]
+    assert vs.metadata[-1]["text"] == chunks(1, start=34)[0][0]
+
+
+# ---------------- MMAP ----------------
+@pytest.mark.parametrize("index_type,compression", [("flat", "none"), ("flat", "sq8"), ("ivf", "none")])
+def test_mmap_store_matches_loaded_store(make_store, index_type, compression):
+    vs, texts = _rebuilt_store(make_store, index_type, compression)
+    queries = [texts[5], texts[150], "section 303"]
+    expected = [vs.search(q, k=5, nprobe=8, filters=f) for q in queries for f in (None, {"ipc_sections": ["303"]})]
+
+    mapped = make_store(mmap=True)
+    assert mapped.read_only
+    assert isinstance(mapped.metadata, MmapMetadata)
+    assert len(mapped.metadata) == mapped.index.ntotal == 300
+    assert [mapped.search(q, k=5, nprobe=8, filters=f) for q in queries
+            for f in (None, {"ipc_sections": ["303"]})] == expected
+    with pytest.raises(RuntimeError):
+        mapped.add_texts(*chunks(1, start=300))
+
+
+def test_mmap_metadata_round_trip(tmp_path):
+    records = [{"source": "a.pdf", "text": "ünïcode"}, {}, {"ipc_sections": ["420"]}]
+    write_mmap_metadata(records, str(tmp_path / "m.jsonl"), str(tmp_path / "m.offsets"))
+    view = MmapMetadata(str(tmp_path / "m.jsonl"), str(tmp_path / "m.offsets"))
+    assert list(view) == records
+    assert view[-1] == records[-1]
+    assert view[1:] == records[1:]
+    with pytest.raises(IndexError):
+        view[3]
+
+    write_mmap_metadata([], str(tmp_path / "e.jsonl"), str(tmp_path / "e.offsets"))
+    assert len(MmapMetadata(str(tmp_path / "e.jsonl"), str(tmp_path / "e.offsets"))) == 0
+
+
+def test_mmap_falls_back_without_offsets(make_store, tmp_path):
+    vs, texts = _indexed_store(make_store, n=20)
+    os.remove(tmp_path / "metadata.offsets")
+    mapped = make_store(mmap=True)
+    assert isinstance(mapped.metadata, list)
+    assert mapped.search(texts[3], k=1)[0]["text"] == texts[3]
+
+
+# ---------------- ENTITY FILTERS ----------------
+def _cited_store(make_store):
+    vs = make_store()
+    texts, metas = chunks(30)
+    for i, m in enumerate(metas):
+        m["articles"] = ["Article 21 of the Constitution"] if i % 2 else []
+        m["acts"] = ["Negotiable  Instruments Act, 1881"] if i % 3 == 0 else []
+    vs.add_texts(texts, metas)
+    return vs, texts
+
+
+def test_filters_are_normalized_and_combined(make_store):
+    vs, texts = _cited_store(make_store)
+    assert vs.chunk_ids_for({"ipc_sections": ["Section 302 of the IPC"]}) == [2, 9, 16, 23]
+    assert vs.chunk_ids_for({"ipc_sections": "302"}) == [2, 9, 16, 23]
+    # OR within a type, AND across types
+    assert vs.chunk_ids_for({"ipc_sections": ["302", "303"]}) == [2, 3, 9, 10, 16, 17, 23, 24]
+    assert vs.chunk_ids_for({"ipc_sections": ["302", "303"], "articles": ["21"]}) == [3, 9, 17, 23]
+    assert vs.chunk_ids_for({
+        "articles": ["article 21"], "acts": ["Negotiable Instruments Act, 1881"]
+    }) == [3, 9, 15, 21, 27]
+    assert vs.chunk_ids_for({"ipc_sections": ["999"]}) == []
+
+    with pytest.raises(ValueError):
+        vs.chunk_ids_for({"courts": ["Delhi"]})
+    assert vs.search(texts[2], k=5, filters={"ipc_sections": ["999"]}) == []
+    results = vs.search(texts[2], k=10, filters={"ipc_sections": ["302"], "articles": ["21"]})
+    assert sorted(r["text"] for r in results) == sorted([texts[9], texts[23]])
+
+
+def test_entity_index_survives_reopen(make_store, tmp_path):
+    vs, _ = _cited_store(make_store)
+    vs.checkpoint()
+    vs.add_texts(*chunks(7, start=30))  # only in the log
+    expected = vs.chunk_ids_for({"ipc_sections": ["302"]})
+    assert expected == [2, 9, 16, 23, 30]
+
+    assert make_store().chunk_ids_for({"ipc_sections": ["302"]}) == expected
+    # Rebuilt from the metadata when the saved postings are gone
+    os.remove(tmp_path / "entities.pkl")
+    vs = make_store()
+    assert vs.chunk_ids_for({"ipc_sections": ["302"]}) == expected
+    assert vs.chunk_ids_for({"articles": ["21"]}) == list(range(1, 30, 2))
+
+
+# ---------------- INDEX TYPES ----------------
+INDEX_CONFIGS = [
+    ("flat", "none"), ("flat", "fp16"), ("flat", "sq8"), ("flat", "pq"),
+    ("ivf", "none"), ("ivf", "fp16"), ("ivf", "sq8"), ("ivf", "pq"),
+    ("hnsw", "none"), ("hnsw", "fp16"), ("hnsw", "sq8"), ("hnsw", "pq"),
+    ("ivfpq", "pq")
+]
+
+
+def _rebuilt_store(make_store, index_type, compression, n=300):
+    vs = make_store()
+    texts, metas = chunks(n)
+    vs.add_texts(texts, metas)
+    vs.checkpoint()
+    vs.rebuild_index(index_type, compression=compression, nlist=8, hnsw_m=16, pq_m=8, pq_bits=4)
+    return vs, texts
+
+
+@pytest.mark.parametrize("index_type,compression", INDEX_CONFIGS)
+def test_filtered_and_hybrid_search(make_store, index_type, compression):
+    vs, texts = _rebuilt_store(make_store, index_type, compression)
+    allowed = set(vs.chunk_ids_for({"ipc_sections": ["301"]}))
+    assert len(allowed) == 43
+
+    filtered = vs.search(texts[8], k=5, filters={"ipc_sections": ["301"]}, nprobe=8, ef_search=64)
+    assert len(filtered) == 5
+    assert all("301" in r["ipc_sections"] for r in filtered)
+    assert filtered[0]["text"] == texts[8]
+
+    hybrid = vs.search(texts[8], k=5, mode="hybrid", nprobe=8, ef_search=64)
+    assert hybrid[0]["text"] == texts[8]
+
+
+@pytest.mark.parametrize("index_type", ["flat", "ivf", "hnsw", "ivfpq"])
+def test_search_each_index_type(make_store, tmp_path, index_type):
+    vs, texts = _rebuilt_store(make_store, index_type, "pq" if index_type == "ivfpq" else "none")
+    assert json.loads((tmp_path / "index.bin.json").read_text())["index_type"] == index_type
+
+    vs = make_store()
+    assert index_type_of(vs.index) == index_type
+    assert vs.index.ntotal == 300
+    queries = [texts[0], texts[123], texts[299]]
+    for query in queries:
+        assert vs.search(query, k=3, nprobe=8, ef_search=64)[0]["text"] == query
+    assert [r[0]["text"] for r in vs.search_many(queries, k=3, nprobe=8, ef_search=64)] == queries
+
+
+def test_unknown_index_type_is_rejected(make_store):
+    vs, _ = _indexed_store(make_store, n=10)
+    with pytest.raises(ValueError):
+        vs.rebuild_index("lsh")
+    with pytest.raises(ValueError):
+        vs.rebuild_index("flat", compression="int4")
+    assert index_type_of(make_store().index) == "flat"